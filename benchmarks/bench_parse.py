@@ -0,0 +1,82 @@
+"""Compare the streaming aggregation with the full-DataFrame path.
+
+    python benchmarks/bench_parse.py --size-mb 300
+
+Both run ExchangeAdapter.aggregate() (parsers.aggregate_stream) with fast=True
+and fast=False over the same file, with the adapter's real column map, dtypes
+and metrics. Each parse runs in a fresh process so peak RSS is measured per mode.
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synthetic import make_bse_csv, make_nse_zip  # noqa: E402
+
+DATE_NSE = "02062025"
+DATE_BSE = "20250602"
+
+
+def _run(kind, path, fast, queue):
+    from datetime import datetime
+
+    from nse_bse.aggregation import BSE_METRICS, NSE_METRICS
+    from nse_bse.exchanges import ADAPTERS
+    from nse_bse.metrics import peak_rss_mb
+    from nse_bse.parsers import aggregate_stream  # noqa: F401  (pandas loaded before the clock starts)
+
+    # The shipped path: the adapter's column map, dtypes and every metric
+    metrics = NSE_METRICS if kind == "NSE" else BSE_METRICS
+    start = time.perf_counter()
+    aggregator = ADAPTERS[kind]().aggregate(path, datetime.strptime(DATE_BSE, "%Y%m%d"), metrics, fast=fast)
+    result = aggregator.result()
+    queue.put((time.perf_counter() - start, peak_rss_mb() or float("nan"), result))
+
+
+def measure(kind, path, fast):
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_run, args=(kind, path, fast, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=float, default=300, help="uncompressed size per synthetic file")
+    parser.add_argument("--workdir", help="keep generated files here instead of a temp dir")
+    args = parser.parse_args()
+
+    workdir = args.workdir or tempfile.mkdtemp(prefix="bench_parse_")
+    os.makedirs(workdir, exist_ok=True)
+    target = int(args.size_mb * 1024 * 1024)
+
+    print(f"Generating ~{args.size_mb:.0f} MB synthetic files in {workdir} ...")
+    files = {
+        "NSE": make_nse_zip(workdir, DATE_NSE, target),
+        "BSE": make_bse_csv(workdir, DATE_BSE, target),
+    }
+
+    print(f"\n{'file':<6}{'mode':<8}{'seconds':>10}{'peak RSS MB':>14}{'trades':>18}")
+    for kind, path in files.items():
+        headline = "NSE_NO_OF_TRADE" if kind == "NSE" else "BSE_No_of_Trades"
+        results = {}
+        for mode, fast in (("full", False), ("stream", True)):
+            elapsed, rss, values = measure(kind, path, fast)
+            results[mode] = (elapsed, values)
+            print(f"{kind:<6}{mode:<8}{elapsed:>10.2f}{rss:>14.0f}{values[headline]:>18}")
+        full, stream = results["full"][1], results["stream"][1]
+        differ = [k for k in full if full[k] != stream[k] and abs(full[k] - stream[k]) > 1e-6 * abs(full[k])]
+        assert not differ, f"{kind}: metrics differ: {differ}"
+        print(f"{kind}: stream is {results['full'][0] / results['stream'][0]:.1f}x faster")
+
+
+if __name__ == "__main__":
+    main()
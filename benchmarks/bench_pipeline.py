@@ -0,0 +1,222 @@
+"""End-to-end benchmark of the combined NSE/BSE pipeline against fake exchanges.
+
+    python benchmarks/bench_pipeline.py --days 20 --nse-mb 40 --bse-mb 10 --latency 0.2
+
+Synthetic fo{DDMMYYYY}.zip / MS_{YYYYMMDD}-01.csv files are served by two
+local FakeExchange servers (NSE on 127.0.0.1, BSE on localhost, so each gets
+its own pooled session). An nse_bse Pipeline is pointed at them and run in
+daily mode (cold caches), then optionally again in rebuild mode. Reports wall time, per-stage busy time, peak RSS and
+throughput; --json writes the same numbers to a file.
+
+For the parser alone see bench_parse.py.
+"""
+import argparse
+import contextlib
+import functools
+import io
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+import zipfile
+from datetime import datetime
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+REPO_DIR = os.path.dirname(BENCH_DIR)
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, BENCH_DIR)
+
+from fake_exchange import FakeExchange  # noqa: E402
+from synthetic import BSE_HEADER, NSE_HEADER, _bse_row, _nse_row, write_csv  # noqa: E402
+
+# With --ingest the streaming parse also writes the contract rows; "ingest"
+# only gets calls of its own in the full-read mode
+STAGES = ["fetch", "parse", "ingest"]
+
+
+def build_files(dates, nse_mb, bse_mb, workdir):
+    """Generate one CSV body per exchange and package it under every date's name."""
+    nse_csv = os.path.join(workdir, "nse_body.csv")
+    bse_csv = os.path.join(workdir, "bse_body.csv")
+    write_csv(nse_csv, NSE_HEADER, _nse_row, int(nse_mb * 1024 * 1024), seed=1)
+    write_csv(bse_csv, BSE_HEADER, _bse_row, int(bse_mb * 1024 * 1024), seed=2)
+    with open(nse_csv, "rb") as f:
+        nse_body = f.read()
+    with open(bse_csv, "rb") as f:
+        bse_body = f.read()
+
+    nse_files, bse_files = {}, {}
+    for d in dates:
+        nse_date = d.strftime("%d%m%Y")
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1) as z:
+            z.writestr(f"op{nse_date}.csv", nse_body)
+        nse_files[f"/archives/fo/mkt/fo{nse_date}.zip"] = buf.getvalue()
+        bse_files[f"/download/Bhavcopy/Derivative/MS_{d.strftime('%Y%m%d')}-01.csv"] = bse_body
+    return nse_files, bse_files
+
+
+class StageTimer:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = {}
+
+    def wrap(self, stage, fn):
+        """Time `fn(exchange, ...)` under (stage, exchange)."""
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            key = (stage, args[0])
+            start = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self.lock:
+                    seconds, calls = self.totals.get(key, (0.0, 0))
+                    self.totals[key] = (seconds + elapsed, calls + 1)
+        return timed
+
+
+def build_pipeline(nse, bse, start, end, args):
+    from nse_bse import config
+    from nse_bse.exchanges import BseDerivativeAdapter, NseFoAdapter
+    from nse_bse.fetcher import HostRateLimits
+    from nse_bse.http_session import ExchangeSessions
+    from nse_bse.pipeline import Pipeline
+
+    return Pipeline(
+        output=os.path.abspath("sample.csv"),
+        start=start,
+        end=end,
+        adapters={
+            "NSE": NseFoAdapter(nse.base_url + "/archives/fo/mkt/fo{}.zip"),
+            "BSE": BseDerivativeAdapter(bse.base_url + "/download/Bhavcopy/Derivative/MS_{}.csv"),
+        },
+        sessions=ExchangeSessions(
+            {
+                "NSE": {"hosts": ["127.0.0.1"], "warmup_url": nse.base_url + "/"},
+                "BSE": {"hosts": ["localhost"], "headers": config.BSE_HEADERS},
+            },
+            headers=config.DEFAULT_HEADERS,
+            pool_size=max(args.nse_workers, args.bse_workers),
+        ),
+        rate_limits=HostRateLimits({"127.0.0.1": args.nse_interval, "localhost": args.bse_interval}),
+        concurrency={"NSE": args.nse_workers, "BSE": args.bse_workers},
+        retries=args.retries,
+        backoff=args.backoff,
+        ingest=args.ingest,
+    )
+
+
+def run_stage(fn, verbose):
+    sink = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    start = time.perf_counter()
+    with sink:
+        fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--days", type=int, default=20, help="trading days to backfill")
+    parser.add_argument("--start", default="2025-06-02")
+    parser.add_argument("--nse-mb", type=float, default=20, help="uncompressed op*.csv size per day")
+    parser.add_argument("--bse-mb", type=float, default=5, help="MS_*.csv size per day")
+    parser.add_argument("--latency", type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of responses that are HTTP 500")
+    parser.add_argument("--max-rps", type=int, default=None, help="answer 429 above this many requests/s per server")
+    parser.add_argument("--bandwidth-kbps", type=int, default=None, help="throttle response bodies")
+    parser.add_argument("--nse-workers", type=int, default=4)
+    parser.add_argument("--bse-workers", type=int, default=2)
+    parser.add_argument("--nse-interval", type=float, default=0.0, help="min seconds between NSE requests")
+    parser.add_argument("--bse-interval", type=float, default=0.0, help="min seconds between BSE requests")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--backoff", type=float, default=0.1, help="base of the jittered retry backoff")
+    parser.add_argument("--ingest", action="store_true", help="also write the Parquet contract store")
+    parser.add_argument("--rebuild-workers", type=int, default=0, help="also time rebuild mode with N processes")
+    parser.add_argument("--workdir", help="run here instead of a temp dir")
+    parser.add_argument("--json", help="write the report to this file")
+    parser.add_argument("--verbose", action="store_true", help="show the pipeline's own output")
+    args = parser.parse_args()
+    if args.json:
+        args.json = os.path.abspath(args.json)
+
+    import numpy as np
+
+    from nse_bse.metrics import peak_rss_mb
+    from nse_bse.trading_calendar import get_calendar
+
+    workdir = os.path.abspath(args.workdir or tempfile.mkdtemp(prefix="bench_pipeline_"))
+    os.makedirs(workdir, exist_ok=True)
+    horizon = np.datetime64(args.start, "D") + 2 * args.days + 30
+    sessions = get_calendar("NSE").trading_days(args.start, horizon)[:args.days]
+    dates = [datetime(d.year, d.month, d.day) for d in sessions.astype(object)]
+
+    print(f"Generating {len(dates)} days of synthetic files in {workdir} ...")
+    gen_start = time.perf_counter()
+    nse_files, bse_files = build_files(dates, args.nse_mb, args.bse_mb, workdir)
+    print(f"  done in {time.perf_counter() - gen_start:.1f}s")
+
+    server_opts = dict(
+        latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+        max_rps=args.max_rps, bytes_per_sec=args.bandwidth_kbps and args.bandwidth_kbps * 1024,
+    )
+    os.chdir(workdir)
+    report = {"config": vars(args)}
+    with FakeExchange(nse_files, host="127.0.0.1", seed=1, **server_opts) as nse, \
+            FakeExchange(bse_files, host="localhost", seed=2, **server_opts) as bse:
+        pipeline = build_pipeline(nse, bse, dates[0], dates[-1], args)
+        timer = StageTimer()
+        for stage in STAGES:
+            setattr(pipeline, stage, timer.wrap(stage, getattr(pipeline, stage)))
+
+        http = {}
+        pipeline.report_sessions = lambda: http.update(pipeline.sessions.counters())
+        wall = run_stage(pipeline.run_daily, args.verbose)
+        served = nse.stats["bytes"] + bse.stats["bytes"]
+        report["daily"] = {
+            "wall_s": wall,
+            "days_per_s": len(dates) / wall,
+            "download_mb_per_s": served / (1024 * 1024) / wall,
+            "stages": {f"{s}:{e}": {"busy_s": t, "calls": c} for (s, e), (t, c) in sorted(timer.totals.items())},
+            # The pipeline's own instrumentation, with unzip/parse/aggregate split apart
+            "pipeline_stages": {f"{s}:{e}": t for (s, e), t in sorted(pipeline.metrics.stages.items(), key=str)},
+            "http": http,
+            "limits": pipeline.rate_limits.report(),
+            "servers": {"NSE": dict(nse.stats), "BSE": dict(bse.stats)},
+        }
+
+        if args.rebuild_workers:
+            wall = run_stage(functools.partial(pipeline.run_rebuild, args.rebuild_workers), args.verbose)
+            report["rebuild"] = {"wall_s": wall, "days_per_s": len(dates) / wall, "workers": args.rebuild_workers}
+    report["peak_rss_mb"] = {"self": peak_rss_mb(), "children": peak_rss_mb(children=True)}
+
+    daily = report["daily"]
+    print(f"\nDaily run: {daily['wall_s']:.2f}s wall, {daily['days_per_s']:.2f} days/s, "
+          f"{daily['download_mb_per_s']:.1f} MB/s downloaded")
+    print(f"{'stage':<14}{'busy s':>10}{'calls':>8}{'avg ms':>10}")
+    for key, st in daily["stages"].items():
+        print(f"{key:<14}{st['busy_s']:>10.2f}{st['calls']:>8}{1000 * st['busy_s'] / max(1, st['calls']):>10.1f}")
+    for name, stats in daily["servers"].items():
+        print(f"{name} server: {stats}")
+    for name, counters in daily["http"].items():
+        print(f"{name} client: {counters}")
+    for host, stats in daily["limits"].items():
+        print(f"{host} limiter: {stats}")
+    if "rebuild" in report:
+        rb = report["rebuild"]
+        print(f"Rebuild ({rb['workers']} workers): {rb['wall_s']:.2f}s, {rb['days_per_s']:.2f} days/s")
+    rss = report["peak_rss_mb"]
+    print(f"Peak RSS: {rss['self'] or 0:.0f} MB (pipeline), {rss['children'] or 0:.0f} MB (largest child)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2, default=str)
+        print(f"Report written to {args.json}")
+
+
+if __name__ == "__main__":
+    main()
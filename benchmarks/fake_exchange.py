@@ -0,0 +1,121 @@
+"""Local stand-in for the NSE/BSE archive servers.
+
+Serves in-memory files by path with injectable latency, random 5xx errors,
+throttling (429 above a request rate) and a cookie-setting homepage, so the
+pipeline can be exercised and timed without touching the real exchanges.
+"""
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class FakeExchange:
+    def __init__(self, files=None, latency=0.0, jitter=0.0, error_rate=0.0,
+                 max_rps=None, bytes_per_sec=None, seed=0, host="127.0.0.1"):
+        self.files = dict(files or {})
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.max_rps = max_rps
+        self.bytes_per_sec = bytes_per_sec
+        self.rng = random.Random(seed)
+        self.host = host
+        self.stats = {"requests": 0, "200": 0, "404": 0, "429": 0, "500": 0, "bytes": 0}
+        self._lock = threading.Lock()
+        self._window = []
+        self._server = None
+
+    # ---- behaviour ----
+
+    def _throttled(self):
+        if not self.max_rps:
+            return False
+        now = time.monotonic()
+        with self._lock:
+            self._window = [t for t in self._window if now - t < 1.0]
+            if len(self._window) >= self.max_rps:
+                return True
+            self._window.append(now)
+            return False
+
+    def _respond(self, handler, head_only=False):
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = self.latency + (self.rng.uniform(0, self.jitter) if self.jitter else 0.0)
+            fail = self.rng.random() < self.error_rate
+        if delay:
+            time.sleep(delay)
+
+        path = handler.path.split("?", 1)[0]
+        headers = {}
+        if self._throttled():
+            status, body = 429, b"Too Many Requests"
+            headers["Retry-After"] = "1"
+        elif fail:
+            status, body = 500, b"Internal Server Error"
+        elif path == "/":
+            status, body = 200, b"<html>home</html>"
+            headers["Set-Cookie"] = "nsit=bench; Path=/"
+        elif path in self.files:
+            status, body = 200, self.files[path]
+        else:
+            status, body = 404, b"Not Found"
+
+        with self._lock:
+            self.stats[str(status)] += 1
+            if status == 200 and not head_only:
+                self.stats["bytes"] += len(body)
+
+        handler.send_response(status)
+        for name, value in headers.items():
+            handler.send_header(name, value)
+        handler.send_header("Content-Length", str(len(body)))
+        handler.end_headers()
+        if head_only:
+            return
+        if self.bytes_per_sec and status == 200:
+            step = max(1, self.bytes_per_sec // 10)
+            for i in range(0, len(body), step):
+                handler.wfile.write(body[i:i + step])
+                time.sleep(0.1)
+        else:
+            handler.wfile.write(body)
+
+    # ---- server ----
+
+    def start(self):
+        exchange = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_GET(self):
+                exchange._respond(self)
+
+            def do_HEAD(self):
+                exchange._respond(self, head_only=True)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((self.host, 0), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self._server.server_port}"
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,83 @@
+import os
+import random
+import zipfile
+
+# ----------------- SYNTHETIC BHAVCOPIES ------------------
+# Files shaped like the real NSE op{DDMMYYYY}.csv (inside fo{DDMMYYYY}.zip)
+# and BSE MS_{YYYYMMDD}-01.csv, generated to an approximate target size.
+
+NSE_HEADER = [
+    "INSTRUMENT", "SYMBOL", "EXP_DATE", "STR_PRICE", "OPT_TYPE", "OPEN_PRICE",
+    "HI_PRICE", "LO_PRICE", "CLOSE_PRICE", "OPEN_INT*", "TRD_QTY",
+    "NO_OF_CONT", "NO_OF_TRADE", "NOTION_VAL", "PR_VAL",
+]
+
+BSE_HEADER = [
+    "Market Summary Date", "Series Code", "Series Id", "Product Type",
+    "Asset Code", "Expiry Date", "Strike Price", "Option Type", "Open Price",
+    "High Price", "Low Price", "Close Price", "Previous Close",
+    "Open Interest", "No. of Trades", "No. of Contracts", "Turnover",
+    "Premium Turnover",
+]
+
+NSE_SYMBOLS = ["NIFTY", "BANKNIFTY", "FINNIFTY", "MIDCPNIFTY", "RELIANCE", "HDFCBANK", "INFY", "TCS"]
+BSE_SYMBOLS = ["SENSEX", "BANKEX", "SENSEX50"]
+
+
+def _nse_row(rng):
+    instrument = rng.choice(["OPTIDX", "OPTSTK"])
+    price = round(rng.uniform(0.05, 900), 2)
+    trades = rng.randint(0, 50_000)
+    return (
+        f"{instrument},{rng.choice(NSE_SYMBOLS)},26-JUN-2025,{rng.randrange(15000, 60000, 50)}.00,"
+        f"{rng.choice(['CE', 'PE'])},{price},{price},{price},{price},{rng.randint(0, 10**7)},"
+        f"{rng.randint(0, 10**8)},{trades * 3},{trades},{rng.uniform(0, 1e10):.2f},{rng.uniform(0, 1e8):.2f}\n"
+    )
+
+
+def _bse_row(rng):
+    price = round(rng.uniform(0.05, 900), 2)
+    trades = rng.randint(0, 80_000)
+    symbol = rng.choice(BSE_SYMBOLS)
+    return (
+        f"2025-06-02,{symbol}25JUN,{rng.randint(10**6, 10**7)},IO,{symbol},2025-06-24,"
+        f"{rng.randrange(70000, 90000, 100)},{rng.choice(['CE', 'PE'])},{price},{price},{price},"
+        f"{price},{price},{rng.randint(0, 10**6)},{trades},{trades * 2},"
+        f"{rng.uniform(0, 1e10):.2f},{rng.uniform(0, 1e8):.2f}\n"
+    )
+
+
+def write_csv(path, header, row_fn, target_bytes, seed=0):
+    """Write a CSV of roughly `target_bytes`; returns the row count."""
+    rng = random.Random(seed)
+    rows = 0
+    written = 0
+    with open(path, "w", newline="") as f:
+        line = ",".join(header) + "\n"
+        f.write(line)
+        written += len(line)
+        while written < target_bytes:
+            block = "".join(row_fn(rng) for _ in range(1000))
+            f.write(block)
+            written += len(block)
+            rows += 1000
+    return rows
+
+
+def make_nse_zip(directory, date_str, target_bytes, member_ext="csv", seed=0):
+    """Create fo{date_str}.zip containing op{date_str}.{member_ext}."""
+    member = f"op{date_str}.{member_ext}"
+    member_path = os.path.join(directory, member)
+    write_csv(member_path, NSE_HEADER, _nse_row, target_bytes, seed)
+    zip_path = os.path.join(directory, f"fo{date_str}.zip")
+    with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as z:
+        z.write(member_path, member)
+    os.remove(member_path)
+    return zip_path
+
+
+def make_bse_csv(directory, date_str, target_bytes, seed=0):
+    """Create MS_{date_str}-01.csv."""
+    path = os.path.join(directory, f"MS_{date_str}-01.csv")
+    write_csv(path, BSE_HEADER, _bse_row, target_bytes, seed)
+    return path
@@ -0,0 +1,8 @@
+"""NSE/BSE derivatives bhavcopy pipeline.
+
+    python -m nse_bse                  # daily NSE + BSE summary (sample.csv)
+    python -m nse_bse rebuild --workers 4
+    python -m nse_bse --profile nse    # NSE trade counts only
+
+Submodules are imported on demand; importing the package itself is free.
+"""
@@ -0,0 +1,112 @@
+from collections import namedtuple
+
+# ----------------- AGGREGATION SPEC ------------------
+# A metric is declared once over the canonical column names of
+# exchanges.NSE_COLUMN_MAP / BSE_COLUMN_MAP and becomes one column of the wide
+# daily summary. All metrics of an exchange are evaluated together on each
+# chunk of the file, so extra metrics cost no extra read of the file.
+#
+#   Metric(name, column, op)                              -> column `name`
+#   Metric(name, column, op, group_by=col, groups=(...))  -> `name`_<group> per group
+#
+# op is one of "sum", "count" (non-empty cells), "min", "max".
+
+Metric = namedtuple("Metric", ["name", "column", "op", "group_by", "groups"], defaults=(None, ()))
+
+OPS = ("sum", "count", "min", "max")
+
+NSE_METRICS = [
+    Metric("NSE_NO_OF_TRADE", "trades", "sum"),
+    Metric("NSE_CONTRACTS", "contracts", "sum"),
+    Metric("NSE_TURNOVER", "turnover", "sum"),
+    Metric("NSE_PREMIUM_TURNOVER", "premium_turnover", "sum"),
+    Metric("NSE_OPEN_INTEREST", "open_interest", "sum"),
+    Metric("NSE_NO_OF_TRADE", "trades", "sum", group_by="instrument", groups=("OPTIDX", "OPTSTK")),
+]
+
+BSE_METRICS = [
+    Metric("BSE_No_of_Trades", "trades", "sum"),
+    Metric("BSE_CONTRACTS", "contracts", "sum"),
+    Metric("BSE_TURNOVER", "turnover", "sum"),
+    Metric("BSE_PREMIUM_TURNOVER", "premium_turnover", "sum"),
+    Metric("BSE_OPEN_INTEREST", "open_interest", "sum"),
+]
+
+
+def output_columns(metrics):
+    columns = []
+    for metric in metrics:
+        if metric.op not in OPS:
+            raise ValueError(f"{metric.name}: unknown op {metric.op!r}")
+        if metric.group_by:
+            columns.extend(f"{metric.name}_{group}" for group in metric.groups)
+        else:
+            columns.append(metric.name)
+    return list(dict.fromkeys(columns))
+
+
+def input_columns(metrics):
+    return {m.column for m in metrics} | {m.group_by for m in metrics if m.group_by}
+
+
+def _missing(value):
+    # None for an empty chunk; NaN (or pd.NA, from Int64 columns) for an all-empty min/max
+    try:
+        return value is None or bool(value != value)
+    except TypeError:
+        return True
+
+
+def _combine(op, current, value):
+    if _missing(value):
+        return current
+    if current is None:
+        return value
+    if op in ("sum", "count"):
+        return current + value
+    if op == "min":
+        return min(current, value)
+    return max(current, value)
+
+
+class Aggregator:
+    """Running, chunk-by-chunk evaluation of a metric list."""
+
+    def __init__(self, metrics):
+        self.metrics = metrics
+        self.columns = output_columns(metrics)
+        self.values = {}
+        self.seen = set()
+
+    def update(self, chunk):
+        import pandas as pd
+
+        self.seen.update(chunk.columns)
+        for metric in self.metrics:
+            if metric.column not in chunk.columns:
+                continue
+            values = pd.to_numeric(chunk[metric.column], errors="coerce")
+            if not metric.group_by:
+                self.values[metric.name] = _combine(metric.op, self.values.get(metric.name), values.agg(metric.op))
+                continue
+            if metric.group_by not in chunk.columns:
+                continue
+            keys = chunk[metric.group_by].astype("string").str.strip()
+            grouped = values.groupby(keys).agg(metric.op)
+            for group in metric.groups:
+                out = f"{metric.name}_{group}"
+                value = grouped.get(group)
+                if value is None and metric.op in ("sum", "count"):
+                    value = 0
+                self.values[out] = _combine(metric.op, self.values.get(out), value)
+
+    def missing_columns(self):
+        return sorted(input_columns(self.metrics) - self.seen)
+
+    def result(self):
+        """Output column -> value; None where the input column never appeared."""
+        return {column: _plain(self.values.get(column)) for column in self.columns}
+
+
+def _plain(value):
+    return value.item() if hasattr(value, "item") else value
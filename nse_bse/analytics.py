@@ -0,0 +1,200 @@
+import hashlib
+import io
+import json
+import os
+
+from .summary_store import atomic_write, latest_cells
+
+# ----------------- SUMMARY ANALYTICS ------------------
+# Derived daily series over the summary CSV, as whole-column pandas/NumPy
+# operations: rolling means, EWMA, day-over-day change, z-score spike flags
+# and each exchange's share of the combined volume. They go to
+# <summary>.analytics.csv, with <summary>.analytics.json remembering the
+# parameters and how much of the summary they cover.
+#
+# A daily run appends a day or two to the summary. If the summary only grew
+# (the last bytes of what was covered hash the same, and the new dates come
+# after the last one), just the bytes past the covered length are read:
+# the rolling kernels see the last `context` days, kept in the state file,
+# and the EWMA carries on from its last value. So a write costs O(new days),
+# like the summary append itself. Anything else (a filled gap, compaction,
+# other parameters) recomputes the whole history, which is a few thousand
+# rows at most. pandas/NumPy are only imported when analytics are computed.
+
+ANALYTICS_SUFFIX = ".analytics.csv"
+STATE_SUFFIX = ".analytics.json"
+# Bytes before the covered length that must hash the same for an append
+FINGERPRINT_BYTES = 4096
+
+
+def ewma(values, span, seed=None):
+    """EWMA without bias adjustment, continuing from `seed` (the previous value)."""
+    import pandas as pd
+
+    series = pd.Series(values, dtype="float64")
+    if seed is not None and seed == seed:
+        series = pd.concat([pd.Series([seed], dtype="float64"), series], ignore_index=True)
+        return series.ewm(span=span, adjust=False, ignore_na=True).mean().to_numpy()[1:]
+    return series.ewm(span=span, adjust=False, ignore_na=True).mean().to_numpy()
+
+
+def zscore(values, window):
+    """Distance of each value from the mean of the `window` days before it, in standard deviations."""
+    import numpy as np
+    import pandas as pd
+
+    series = pd.Series(values, dtype="float64")
+    previous = series.shift(1).rolling(window, min_periods=max(2, window // 2))
+    mean, std = previous.mean(), previous.std()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return ((series - mean) / std.where(std > 0)).to_numpy()
+
+
+def compute(frame, columns, windows=(5, 20), span=20, z_window=60, z_threshold=3.0, shares=True):
+    """Analytics for the (date-sorted) summary `frame`, one row per date."""
+    import numpy as np
+    import pandas as pd
+
+    out = pd.DataFrame({"Date": frame["Date"].to_numpy()})
+    values = {column: pd.to_numeric(frame[column], errors="coerce").to_numpy(dtype="float64")
+              for column in columns}
+    for column, x in values.items():
+        series = pd.Series(x)
+        for window in windows:
+            out[f"{column}_ma{window}"] = series.rolling(window, min_periods=window).mean().to_numpy()
+        out[f"{column}_ewma{span}"] = ewma(x, span)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            out[f"{column}_dod"] = x / np.concatenate([[np.nan], x[:-1]]) - 1
+        z = zscore(x, z_window)
+        out[f"{column}_z{z_window}"] = z
+        out[f"{column}_spike"] = np.abs(np.nan_to_num(z)) >= z_threshold
+    if shares and len(columns) > 1:
+        stacked = np.vstack(list(values.values()))
+        with np.errstate(divide="ignore", invalid="ignore"):
+            share = stacked / stacked.sum(axis=0)
+        for column, row in zip(columns, share):
+            out[f"{column}_share"] = row
+            out[f"{column}_share_ma{max(windows)}"] = pd.Series(row).rolling(max(windows), min_periods=1).mean().to_numpy()
+    return out
+
+
+def resample(frame, columns, period="M"):
+    """Weekly ("W") or monthly ("M") totals, daily means and trading days."""
+    import pandas as pd
+
+    series = frame.set_index(pd.to_datetime(frame["Date"]))[list(columns)].apply(pd.to_numeric, errors="coerce")
+    rule = {"W": "W-FRI", "M": "ME"}[period]
+    try:
+        grouped = series.resample(rule)
+    except ValueError:  # pandas < 2.2 spells month-end "M"
+        grouped = series.resample("M")
+    out = grouped.sum(min_count=1).add_suffix("_total")
+    out = out.join(grouped.mean().add_suffix("_daily_mean"))
+    out["trading_days"] = grouped.size()
+    out.index.name = "Period"
+    return out[out["trading_days"] > 0]
+
+
+def _fingerprint(f, size):
+    f.seek(max(0, size - FINGERPRINT_BYTES))
+    return hashlib.sha256(f.read(min(size, FINGERPRINT_BYTES))).hexdigest()
+
+
+class SummaryAnalytics:
+    def __init__(self, summary_path, columns, windows=(5, 20), span=20, z_window=60, z_threshold=3.0):
+        self.summary_path = summary_path
+        self.path = summary_path + ANALYTICS_SUFFIX
+        self.state_path = summary_path + STATE_SUFFIX
+        self.columns = list(columns)
+        self.params = {
+            "columns": self.columns, "windows": list(windows), "span": span,
+            "z_window": z_window, "z_threshold": z_threshold,
+        }
+        # Days before the first new one that the rolling kernels look at
+        self.context = max(max(windows), z_window) + 1
+
+    def _load_state(self):
+        if not os.path.exists(self.state_path) or not os.path.exists(self.path):
+            return None
+        with open(self.state_path) as f:
+            state = json.load(f)
+        return state if state.get("params") == self.params and "context" in state else None
+
+    def _kwargs(self):
+        return {k: v for k, v in self.params.items() if k != "columns"}
+
+    def update(self):
+        """Bring the analytics up to date with the summary; returns the rows computed."""
+        import pandas as pd
+
+        if not os.path.exists(self.summary_path):
+            return 0
+        state = self._load_state()
+        with open(self.summary_path, "rb") as f:
+            size = f.seek(0, io.SEEK_END)
+            if state is not None and size >= state["size"] and _fingerprint(f, state["size"]) == state["fingerprint"]:
+                if size == state["size"]:
+                    return 0
+                f.seek(state["size"])
+                added = f.read(size - state["size"])
+                new = pd.read_csv(io.BytesIO(added), names=state["header"], header=None, dtype={"Date": str})
+                if new.empty or (new["Date"].is_unique and new["Date"].min() > state["last_date"]):
+                    return self._append(state, size, f, new)
+            f.seek(0)
+            data = f.read(size)
+        return self._recompute(pd.read_csv(io.BytesIO(data), dtype={"Date": str}), size)
+
+    def _append(self, state, size, f, new):
+        import pandas as pd
+
+        new = new.sort_values("Date", kind="stable").reset_index(drop=True)
+        context = pd.DataFrame(state["context"], columns=["Date"] + self.columns)
+        tail = pd.concat([context, new[["Date"] + self.columns]], ignore_index=True)
+        result = compute(tail, self.columns, **self._kwargs()).iloc[len(context):].copy()
+        for column in self.columns:
+            result[self._ewma_column(column)] = ewma(
+                pd.to_numeric(new[column], errors="coerce").to_numpy(dtype="float64"),
+                self.params["span"], seed=state["ewma"][column],
+            )
+        with open(self.path, "a", newline="") as out:
+            result.to_csv(out, header=False, index=False, lineterminator="\n")
+        last = {column: float(result[self._ewma_column(column)].iloc[-1]) if len(result) else state["ewma"][column]
+                for column in self.columns}
+        self._save_state(f, size, state["header"], tail, state["rows"] + len(new), last)
+        return len(result)
+
+    def _recompute(self, frame, size):
+        header = list(frame.columns)
+        frame = latest_cells(frame)
+        result = compute(frame, self.columns, **self._kwargs())
+        atomic_write(self.path, result.to_csv(index=False, lineterminator="\n").encode())
+        last = {column: float(result[self._ewma_column(column)].iloc[-1]) if len(result) else None
+                for column in self.columns}
+        with open(self.summary_path, "rb") as f:
+            self._save_state(f, size, header, frame, len(frame), last)
+        return len(result)
+
+    def _ewma_column(self, column):
+        return f"{column}_ewma{self.params['span']}"
+
+    def _save_state(self, f, size, header, frame, rows, last_ewma):
+        context = frame[["Date"] + self.columns].tail(self.context)
+        state = {
+            "params": self.params,
+            # Covered length of the summary and a hash of its last bytes
+            "size": size,
+            "fingerprint": _fingerprint(f, size),
+            "header": header,
+            "rows": rows,
+            "last_date": frame["Date"].iloc[-1] if len(frame) else "",
+            # Raw values the rolling kernels need for the next append
+            "context": json.loads(context.to_json(orient="values")),
+            # Where the EWMA continues from on the next append
+            "ewma": last_ewma,
+        }
+        atomic_write(self.state_path, json.dumps(state, indent=1).encode())
+
+    def read_frame(self):
+        import pandas as pd
+
+        return pd.read_csv(self.path, parse_dates=["Date"])
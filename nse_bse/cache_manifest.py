@@ -0,0 +1,384 @@
+import gzip
+import hashlib
+import io
+import json
+import os
+import shutil
+import threading
+import time
+import zipfile
+
+from .summary_store import atomic_write
+
+# ----------------- CACHE MANIFEST ------------------
+# One manifest.json per cache directory. Each cached file has an entry with
+# its size, sha256, whether the content looked right (zip / CSV, not an HTML
+# error page) and how parsing went. Files that fail validation or parsing
+# are moved to <cache>/quarantine so the next run downloads them again.
+# Files the exchange does not have are remembered as negative entries until
+# their TTL runs out, so known-missing days cost no network at all.
+#
+# The bytes themselves are content-addressed: <cache>/objects/ab/<sha256>
+# plus a codec suffix, so an identical download under another name is kept
+# once. Zips are stored as they come (already deflated); CSVs are
+# compressed with zstd when the zstandard package is installed, gzip
+# otherwise, and read back as a stream. Plain files from before this layout
+# (in the cache dir itself or in `legacy_dirs`) are adopted on first lookup.
+#
+# An `indexer` (ExchangeAdapter.indexer) adds an "archive_index" to
+# each entry when the bytes are stored, e.g. where the bhavcopy member sits
+# inside a zip, so reading it later skips the archive's directory.
+#
+# enforce_limits() evicts least recently used objects past an age and/or
+# byte cap, taking first the ones already archived elsewhere (their rows are
+# in the Parquet contract store), so a long history fits a small volume.
+#
+# Changes only mark the manifest dirty; flush() writes it once, at the end of
+# a batch (Pipeline.flush_cache_writes()), instead of rewriting and fsyncing
+# the whole file per file stored. A crash before the flush loses only those
+# entries: their objects are re-downloaded (or reused, being content-addressed).
+
+MANIFEST_NAME = "manifest.json"
+QUARANTINE_DIR = "quarantine"
+OBJECTS_DIR = "objects"
+
+HIT = "hit"
+MISSING = "missing"
+MISS = "miss"
+
+
+def _zstd():
+    try:
+        import zstandard
+    except ImportError:
+        return None
+    return zstandard
+
+
+def compress(data):
+    """(suffix, compressed bytes) with the best codec available."""
+    zstd = _zstd()
+    if zstd is not None:
+        return ".zst", zstd.ZstdCompressor(level=10).compress(data)
+    return ".gz", gzip.compress(data, compresslevel=6, mtime=0)
+
+
+def open_cached(path):
+    """Binary stream over a cached object, decompressing on the fly."""
+    if path.endswith(".gz"):
+        return gzip.open(path, "rb")
+    if path.endswith(".zst"):
+        zstd = _zstd()
+        if zstd is None:
+            raise ImportError(f"{path} is zstd-compressed: pip install zstandard")
+        return zstd.ZstdDecompressor().stream_reader(open(path, "rb"), closefd=True)
+    return open(path, "rb")
+
+
+def looks_like_zip(data):
+    if not data.startswith(b"PK\x03\x04"):
+        return False, "not a zip archive"
+    try:
+        with zipfile.ZipFile(io.BytesIO(data)) as z:
+            if not z.namelist():
+                return False, "empty zip archive"
+    except zipfile.BadZipFile as e:
+        return False, f"truncated or corrupt zip: {e}"
+    return True, ""
+
+
+def looks_like_csv(data):
+    head = data[:2048].lstrip()
+    if not head:
+        return False, "empty file"
+    if head[:1] == b"<":
+        return False, "HTML/XML page instead of CSV"
+    first_line = head.split(b"\n", 1)[0]
+    if b"," not in first_line:
+        return False, "no CSV header line"
+    return True, ""
+
+
+def _sha256_file(path):
+    digest = hashlib.sha256()
+    with open_cached(path) as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class CacheManifest:
+    def __init__(self, cache_dir, validator, compressed=False, legacy_dirs=(), manifest_name=MANIFEST_NAME,
+                 indexer=None):
+        self.cache_dir = cache_dir
+        self.validator = validator
+        self.indexer = indexer
+        self.compressed = compressed
+        self.legacy_dirs = list(legacy_dirs)
+        self.path = os.path.join(cache_dir, manifest_name)
+        self._lock = threading.Lock()
+        self._dirty = False
+        self.entries = {}
+        self.missing = {}
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                data = json.load(f)
+            self.entries = data.get("entries", {})
+            self.missing = data.get("missing", {})
+
+    def _save(self):
+        data = {"entries": self.entries, "missing": self.missing}
+        atomic_write(self.path, json.dumps(data, indent=1, sort_keys=True).encode())
+        self._dirty = False
+
+    def flush(self):
+        """Write the manifest if anything changed since the last write."""
+        with self._lock:
+            if self._dirty:
+                self._save()
+
+    def file_path(self, filename):
+        """Where the bytes of a HIT entry live (an object, possibly compressed)."""
+        entry = self.entries.get(filename)
+        if entry is not None and entry.get("object"):
+            return os.path.join(self.cache_dir, entry["object"])
+        return os.path.join(self.cache_dir, filename)
+
+    def _legacy_path(self, filename):
+        for directory in [self.cache_dir] + self.legacy_dirs:
+            path = os.path.join(directory, filename)
+            if os.path.isfile(path):
+                return path
+        return None
+
+    def lookup(self, filename):
+        """HIT if a valid cached copy exists, MISSING if the file is known not to
+        exist upstream (negative entry still fresh), otherwise MISS."""
+        with self._lock:
+            negative = self.missing.get(filename)
+            if negative is not None:
+                if negative["until"] > time.time():
+                    return MISSING
+                del self.missing[filename]
+                self._dirty = True
+
+            entry = self.entries.get(filename)
+            if entry is not None and entry.get("object"):
+                path = os.path.join(self.cache_dir, entry["object"])
+                if os.path.exists(path) and entry["content_ok"]:
+                    entry["last_used"] = time.time()
+                    self._dirty = True
+                    return HIT
+                del self.entries[filename]
+                self._dirty = True
+
+            # A plain file cached before objects existed (or by an older script)
+            path = self._legacy_path(filename)
+            if path is None:
+                return MISS
+            with open(path, "rb") as f:
+                data = f.read()
+            ok, reason = self.validator(data)
+            if not ok:
+                if os.path.dirname(path) == self.cache_dir:
+                    self._quarantine_file(filename, path, reason)
+                return MISS
+            self._put(filename, data)
+            if os.path.dirname(path) == self.cache_dir:
+                os.remove(path)
+            self._dirty = True
+            return HIT
+
+    def _index(self, filename, raw):
+        try:
+            return self.indexer(filename, raw)
+        except Exception as e:
+            # Readers fall back to opening the file the slow way
+            print(f"⚠️ Warning: could not index {filename}: {e}")
+            return None
+
+    def archive_index(self, filename):
+        """The indexer's record for a HIT entry, built (and kept) on first use
+        for files cached before there was one."""
+        if self.indexer is None:
+            return None
+        with self._lock:
+            entry = self.entries.get(filename)
+            if entry is None or not entry.get("object"):
+                return None
+            if "archive_index" not in entry:
+                with open_cached(os.path.join(self.cache_dir, entry["object"])) as raw:
+                    entry["archive_index"] = self._index(filename, raw)
+                # Written with the next flush()
+                self._dirty = True
+            return entry["archive_index"]
+
+    def _put(self, filename, data):
+        sha = hashlib.sha256(data).hexdigest()
+        if self.compressed:
+            suffix, stored = compress(data)
+        else:
+            suffix, stored = os.path.splitext(filename)[1], data
+        relative = os.path.join(OBJECTS_DIR, sha[:2], sha + suffix)
+        path = os.path.join(self.cache_dir, relative)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            atomic_write(path, stored)
+        previous = self.entries.get(filename)
+        self.entries[filename] = {
+            "size": len(data),
+            "sha256": sha,
+            "object": relative,
+            "stored_bytes": len(stored),
+            "content_ok": True,
+            "parse_status": None,
+            "archived": False,
+            "stored_at": time.time(),
+            "last_used": time.time(),
+        }
+        if self.indexer is not None:
+            self.entries[filename]["archive_index"] = self._index(filename, io.BytesIO(data))
+        if previous is not None and previous.get("object") and previous["object"] != relative:
+            self._release(previous["object"])
+
+    def _release(self, relative):
+        """Delete an object no entry points at any more."""
+        if any(entry.get("object") == relative for entry in self.entries.values()):
+            return 0
+        path = os.path.join(self.cache_dir, relative)
+        if not os.path.exists(path):
+            return 0
+        size = os.path.getsize(path)
+        os.remove(path)
+        return size
+
+    def store(self, filename, data, validate=True):
+        """Validate and cache downloaded bytes; returns (ok, reason).
+
+        validate=False skips the content check for bytes the caller already
+        validated (and parsed) from memory.
+        """
+        if validate:
+            ok, reason = self.validator(data)
+            if not ok:
+                return False, reason
+        with self._lock:
+            self._put(filename, data)
+            self.missing.pop(filename, None)
+            self._dirty = True
+        return True, ""
+
+    def mark_missing(self, filename, ttl, reason):
+        with self._lock:
+            self.missing[filename] = {"until": time.time() + ttl, "reason": reason}
+            self._dirty = True
+
+    def mark_parsed(self, filename, ok, detail=""):
+        """Record the parse outcome; a file that failed to parse is quarantined."""
+        with self._lock:
+            if not ok:
+                self._quarantine(filename, detail or "parse failed")
+                return
+            entry = self.entries.get(filename)
+            if entry is not None:
+                entry["parse_status"] = detail or "ok"
+                self._dirty = True
+
+    def mark_archived(self, filename):
+        """The file's rows are kept elsewhere (contract store): evict it first."""
+        with self._lock:
+            entry = self.entries.get(filename)
+            if entry is not None and not entry.get("archived"):
+                entry["archived"] = True
+                self._dirty = True
+
+    def _quarantine(self, filename, reason):
+        entry = self.entries.pop(filename, None)
+        if entry is not None and entry.get("object"):
+            path = os.path.join(self.cache_dir, entry["object"])
+            shared = any(e.get("object") == entry["object"] for e in self.entries.values())
+            if os.path.exists(path) and not shared:
+                suffix = os.path.splitext(path)[1] if self.compressed else ""
+                self._quarantine_file(filename + suffix, path, reason)
+        self._dirty = True
+
+    def _quarantine_file(self, filename, path, reason):
+        target_dir = os.path.join(self.cache_dir, QUARANTINE_DIR)
+        os.makedirs(target_dir, exist_ok=True)
+        target = os.path.join(target_dir, f"{int(time.time())}-{filename}")
+        shutil.move(path, target)
+        print(f"⚠️ Warning: quarantined {filename} ({reason}) -> {target}")
+
+    def verify(self, filename):
+        """Full checksum check of a cached file against its manifest entry."""
+        entry = self.entries.get(filename)
+        if entry is None or not entry.get("object"):
+            return False
+        path = os.path.join(self.cache_dir, entry["object"])
+        return os.path.exists(path) and _sha256_file(path) == entry["sha256"]
+
+    def merge(self, path):
+        """Fold another manifest of this cache directory (a backfill shard's)
+        into this one; newer entries win. Returns the number of entries taken."""
+        with open(path) as f:
+            data = json.load(f)
+        taken = 0
+        with self._lock:
+            for filename, entry in data.get("entries", {}).items():
+                current = self.entries.get(filename)
+                if current is not None and current.get("stored_at", 0) >= entry.get("stored_at", 0):
+                    continue
+                self.entries[filename] = entry
+                self.missing.pop(filename, None)
+                if current is not None and current.get("object") and current["object"] != entry.get("object"):
+                    self._release(current["object"])
+                taken += 1
+            for filename, negative in data.get("missing", {}).items():
+                if filename not in self.entries and negative["until"] > self.missing.get(filename, {}).get("until", 0):
+                    self.missing[filename] = negative
+            self._save()
+        return taken
+
+    # ---- retention ----
+
+    def stored_bytes(self):
+        # Deduplicated: an object shared by several names counts once
+        objects = {
+            entry["object"]: entry.get("stored_bytes", 0)
+            for entry in self.entries.values() if entry.get("object")
+        }
+        return sum(objects.values())
+
+    def enforce_limits(self, max_bytes=None, max_age=None):
+        """Evict objects older than `max_age` seconds (by last use), then
+        least recently used ones until at most `max_bytes` are stored.
+        Returns (files evicted, bytes freed)."""
+        with self._lock:
+            now = time.time()
+            # Entries whose object is gone (e.g. a manifest restored from a
+            # state snapshot without the cache) neither count nor get evicted
+            for name in [n for n, e in self.entries.items() if e.get("object")]:
+                if not os.path.exists(os.path.join(self.cache_dir, self.entries[name]["object"])):
+                    del self.entries[name]
+                    self._dirty = True
+            # Archived first, then oldest use first
+            order = sorted(
+                (name for name, entry in self.entries.items() if entry.get("object")),
+                key=lambda name: (not self.entries[name].get("archived"), self.entries[name].get("last_used", 0)),
+            )
+            evicted = freed = 0
+            total = self.stored_bytes()
+            for name in order:
+                entry = self.entries[name]
+                too_old = max_age is not None and now - entry.get("last_used", 0) > max_age
+                too_big = max_bytes is not None and total > max_bytes
+                if not (too_old or too_big):
+                    continue
+                del self.entries[name]
+                released = self._release(entry["object"])
+                total -= released
+                freed += released
+                evicted += 1
+            if evicted or self._dirty:
+                self._save()
+            return evicted, freed
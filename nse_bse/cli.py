@@ -0,0 +1,157 @@
+import argparse
+from contextlib import nullcontext
+from datetime import datetime
+
+from . import config
+from .metrics import RunMetrics, cpu_profile
+from .pipeline import PROFILES, Pipeline
+from .snapshot import DEFAULT_SNAPSHOT
+from .trading_calendar import CalendarNotCovered
+
+# ----------------- COMMAND LINE ------------------
+#   python -m nse_bse [daily|rebuild|ingest|compact|total] [--profile ...]
+#   python -m nse_bse backfill --from 2021-01-01 --to 2025-05-30 --shards 4
+#       [--shard-index I  (one shard only, e.g. per CI job) | --merge]
+#   python -m nse_bse series --symbol NIFTY [--instrument OPTIDX] [--contracts]
+#   python -m nse_bse serve [--port 8765] [--table NAME=PATH ...]
+# The root scripts are thin wrappers around main() with their old defaults.
+# Every run ends with a per-stage summary; --metrics, --cprofile and
+# --tracemalloc add detail for profiling.
+
+COMMANDS = {
+    "daily": "fetch and append new days (default)",
+    "poll": "fetch up to today, waiting for files the exchanges have not published yet (until --until)",
+    "rebuild": "re-aggregate the caches on all cores",
+    "ingest": "load cached files into the contract store",
+    "compact": "sort and de-duplicate the summary CSV",
+    "total": "print the grand total over the date range; writes no summary",
+    "export": "save summary, watermarks and cache manifests to one snapshot file",
+    "import": "restore a snapshot written by export",
+    "analytics": "update the rolling/EWMA/share/spike series next to the summary and list recent spikes",
+    "backfill": "fetch a long date range in --shards parallel shards, then merge them into the summary",
+    "series": "print one underlying's daily history (--symbol) from the series index",
+    "serve": "answer read-only HTTP/JSON queries over the summary CSVs (--host, --port)",
+}
+
+
+def _date(text):
+    return datetime.strptime(text, "%Y-%m-%d")
+
+
+def _clock(text):
+    hour, minute = text.split(":")
+    return int(hour), int(minute)
+
+
+def _table(text):
+    name, sep, path = text.partition("=")
+    if not sep or not name or not path:
+        raise argparse.ArgumentTypeError(f"expected NAME=PATH, got {text!r}")
+    return name, path
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="nse_bse", description="NSE/BSE daily trade summary")
+    parser.add_argument("mode", nargs="?", default="daily", choices=list(COMMANDS),
+                        help="; ".join(f"{name}: {text}" for name, text in COMMANDS.items()))
+    parser.add_argument("--profile", default="combined", choices=list(PROFILES),
+                        help="exchanges and metrics to summarise (default: combined)")
+    parser.add_argument("--output", help="summary CSV (default depends on the profile)")
+    parser.add_argument("--start", "--from", dest="start", type=_date,
+                        help="first date, YYYY-MM-DD (default: 2025-06-02)")
+    parser.add_argument("--end", "--to", dest="end", type=_date,
+                        help="last date, YYYY-MM-DD (default: today after 19:30 IST, else yesterday)")
+    parser.add_argument("--workers", type=int, default=None,
+                        help="worker processes for rebuild (default: all cores) and backfill (default: one per shard)")
+    parser.add_argument("--no-ingest", action="store_true", help="do not write the Parquet contract store")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="parse downloads from memory only; do not keep them in the cache directories")
+    parser.add_argument("--snapshot", default=DEFAULT_SNAPSHOT, help=f"state snapshot file (default: {DEFAULT_SNAPSHOT})")
+    parser.add_argument("--with-cache", action="store_true", help="export: include the cached bhavcopies")
+    parser.add_argument("--with-contracts", action="store_true", help="export: include the contract store")
+    parser.add_argument("--force", action="store_true", help="import: overwrite local files")
+    parser.add_argument("--interval", type=float, default=None,
+                        help="poll: seconds between checks for unpublished files (default: 600)")
+    parser.add_argument("--until", type=_clock, default=None,
+                        help="poll: stop waiting at this IST time, HH:MM (default: 23:00)")
+    parser.add_argument("--window", type=float, default=None,
+                        help="poll: wait at most this many minutes in this run, e.g. in a re-triggered CI job")
+    parser.add_argument("--shards", type=int, default=1, help="backfill: number of shards (default: 1)")
+    parser.add_argument("--shard-index", type=int,
+                        help="backfill: run only this shard (0-based), e.g. one per CI job; no merge")
+    parser.add_argument("--merge", action="store_true",
+                        help="backfill: only merge the finished shards into the summary")
+    parser.add_argument("--period", choices=["W", "M"],
+                        help="analytics: also print weekly (W) or monthly (M) totals")
+    parser.add_argument("--symbol", help="series: underlying to print, e.g. NIFTY")
+    parser.add_argument("--instrument", help="series: only this instrument type, e.g. OPTIDX")
+    parser.add_argument("--expiry", help="series: only this expiry, YYYY-MM-DD")
+    parser.add_argument("--contracts", action="store_true",
+                        help="series: one row per instrument and expiry instead of daily totals")
+    parser.add_argument("--host", default=config.QUERY_HOST,
+                        help=f"serve: address to listen on (default: {config.QUERY_HOST})")
+    parser.add_argument("--port", type=int, default=config.QUERY_PORT,
+                        help=f"serve: port (default: {config.QUERY_PORT})")
+    parser.add_argument("--table", type=_table, action="append", default=[], metavar="NAME=PATH",
+                        help="serve: also serve this summary CSV, e.g. nse_legacy=Combined/nse_daily_trade_summary.csv")
+    parser.add_argument("--metrics", metavar="FILE",
+                        help="append per-stage metrics (JSON lines) to FILE")
+    parser.add_argument("--cprofile", metavar="FILE",
+                        help="run under cProfile, write the stats to FILE and print the top entries")
+    parser.add_argument("--tracemalloc", action="store_true",
+                        help="trace Python allocations and report their peak per day")
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.mode == "series" and not args.symbol:
+        parser.error("series needs --symbol")
+    metrics = RunMetrics(args.metrics, trace_memory=args.tracemalloc)
+    if args.mode == "poll" and args.end is None:
+        # Today is included whatever the time; poll waits for its files
+        args.end = config.today()
+    pipeline = Pipeline(
+        profile=args.profile, output=args.output, start=args.start, end=args.end,
+        ingest=not args.no_ingest, cache=not args.no_cache, metrics=metrics,
+    )
+    try:
+        with cpu_profile(args.cprofile) if args.cprofile else nullcontext():
+            run(pipeline, args)
+    except CalendarNotCovered as e:
+        print(f"\n⚠️ Error: {e}")
+        return 2
+    finally:
+        metrics.close()
+    pipeline.report_stages()
+    return 0
+
+
+def run(pipeline, args):
+    if args.mode == "poll":
+        pipeline.run_poll(args.interval, args.until, args.window)
+    elif args.mode == "rebuild":
+        pipeline.run_rebuild(args.workers)
+    elif args.mode == "ingest":
+        pipeline.run_ingest()
+    elif args.mode == "compact":
+        pipeline.run_compact()
+    elif args.mode == "total":
+        pipeline.run_total()
+    elif args.mode == "export":
+        pipeline.run_export(args.snapshot, args.with_cache, args.with_contracts)
+    elif args.mode == "analytics":
+        pipeline.run_analytics(args.period)
+    elif args.mode == "backfill" and args.merge:
+        pipeline.run_merge(args.shards)
+    elif args.mode == "backfill":
+        pipeline.run_backfill(args.shards, args.shard_index, args.workers)
+    elif args.mode == "series":
+        pipeline.run_series(args.symbol, args.instrument, args.expiry, args.contracts)
+    elif args.mode == "serve":
+        pipeline.run_serve(args.host, args.port, args.table)
+    elif args.mode == "import":
+        pipeline.run_import(args.snapshot, args.force)
+    else:
+        pipeline.run_daily()
@@ -0,0 +1,151 @@
+from datetime import datetime, timedelta, timezone
+
+# ------------- CONFIGURATION ------------------
+# Plain constants only: importing this module must stay cheap, since every
+# CLI invocation reads it before deciding whether there is any work to do.
+
+IST = timezone(timedelta(hours=5, minutes=30), "IST")
+
+START_DATE = datetime.strptime("2025-06-02", "%Y-%m-%d")
+
+# Dates outside the years nse_bse/holidays.csv covers raise an error instead
+# of counting every weekday as a session; False falls back to weekdays (with
+# a warning)
+CALENDAR_STRICT = True
+# Scheduled runs warn once the holiday data ends within this many days
+CALENDAR_WARN_DAYS = 60
+
+# Today's bhavcopies are only expected after this time (IST)
+PUBLISH_CUTOFF = (19, 30)
+
+# Poll mode: probe unpublished files every POLL_INTERVAL seconds until
+# POLL_UNTIL (IST), downloading each one as soon as it appears
+POLL_INTERVAL = 10 * 60
+POLL_UNTIL = (23, 0)
+# Minutes a single poll run may wait (CLI --window). A scheduled job that is
+# re-triggered through the evening polls briefly each time and leaves the
+# rest to the next run; None waits all the way to POLL_UNTIL.
+POLL_WINDOW = None
+
+# NSE (DDMMYYYY)
+NSE_BASE_URL = "https://nsearchives.nseindia.com/archives/fo/mkt/fo{}.zip"
+NSE_CACHE_DIR = "nse_fo_cache"
+NSE_COLUMN = "NO_OF_TRADE"  # headline metric; full list in aggregation.NSE_METRICS
+
+# BSE (YYYYMMDD)
+BSE_BASE_URL = "https://www.bseindia.com/download/Bhavcopy/Derivative/MS_{}.csv"
+BSE_CACHE_DIR = "bse_csv_cache"
+BSE_COLUMN = "No. of Trades"  # headline metric; full list in aggregation.BSE_METRICS
+
+OUTPUT_CSV = "sample.csv"
+
+RETRIES = 3
+TIMEOUT = 60
+# Jittered exponential backoff between attempts: BACKOFF * 2**n seconds,
+# at most BACKOFF_CAP (a Retry-After from the server is honoured on top)
+BACKOFF = 2
+BACKOFF_CAP = 60
+
+# Negative cache: how long a file the exchange does not have is remembered.
+# Days close to today get a short TTL since the file may just be late.
+NEGATIVE_TTL = 30 * 24 * 3600
+NEGATIVE_TTL_RECENT = 6 * 3600
+RECENT_DAYS = 3
+# A (date, exchange) gap is retried at most this many times; after that the
+# day is taken to be one the exchange never publishes (e.g. a holiday missing
+# from holidays.csv) and is left empty instead of being re-fetched forever
+GAP_MAX_ATTEMPTS = 5
+
+# Keep downloaded files in the cache directories. Downloads are parsed from
+# memory either way; False (CLI --no-cache) suits throwaway CI runners.
+CACHE_DOWNLOADS = True
+
+# Retention, per cache directory: objects unused for CACHE_MAX_AGE_DAYS
+# (None: no age limit) are evicted, then least recently used ones until the
+# directory holds at most CACHE_MAX_BYTES. Files already in the contract
+# store go first.
+CACHE_MAX_BYTES = 2 * 1024 ** 3
+CACHE_MAX_AGE_DAYS = None
+
+# Stream bhavcopies in chunks and read only the needed columns; set to False
+# to fall back to loading the whole file into a DataFrame.
+FAST_PARSE = True
+
+# Normalised per-contract rows of every parsed file go to this Parquet dataset
+# (needs pyarrow; skipped with a warning when it is not installed)
+INGEST_CONTRACTS = True
+CONTRACT_STORE_DIR = "contract_store"
+
+# Daily totals per underlying x instrument type x expiry, appended as each
+# day is ingested (series_index.py); `python -m nse_bse series --symbol X`
+SERIES_INDEX = True
+SERIES_INDEX_DIR = "series_index"
+
+# Fetch stage: parallel downloads per exchange and the starting spacing per
+# host; fetcher.HostRateLimits speeds each host up to 4x this while it
+# answers cleanly and backs off / pauses it when it throttles or fails
+FETCH_CONCURRENCY = {"NSE": 4, "BSE": 2}
+HOST_MIN_INTERVAL = {
+    "nsearchives.nseindia.com": 0.5,
+    "www.nseindia.com": 1.0,
+    "www.bseindia.com": 1.0,
+}
+
+# Derived series (analytics.py) kept next to the summary CSV and extended
+# whenever it is written: rolling means over these windows, EWMA span,
+# z-score window and the |z| that flags a spike
+ANALYTICS = True
+ANALYTICS_WINDOWS = (5, 20)
+ANALYTICS_EWMA_SPAN = 20
+ANALYTICS_Z_WINDOW = 60
+ANALYTICS_Z_THRESHOLD = 3.0
+
+# Backfill shards write their summary rows and gaps after every this many
+# days, so an interrupted shard resumes from its last checkpoint
+BACKFILL_BATCH_DAYS = 20
+
+# `python -m nse_bse serve`: read-only HTTP/JSON queries over the summaries
+# (query_service.py); local only unless the host is changed
+QUERY_HOST = "127.0.0.1"
+QUERY_PORT = 8765
+QUERY_CACHE_SIZE = 256
+
+DEFAULT_HEADERS = {
+    "User-Agent": (
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+        "AppleWebKit/537.36 (KHTML, like Gecko) "
+        "Chrome/114.0.0.0 Safari/537.36"
+    ),
+}
+
+BSE_HEADERS = {
+    **DEFAULT_HEADERS,
+    "Referer": "https://www.bseindia.com/",
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
+}
+
+SESSION_CONFIG = {
+    "NSE": {
+        "hosts": ["nsearchives.nseindia.com", "www.nseindia.com"],
+        "warmup_url": "https://www.nseindia.com",
+    },
+    "BSE": {
+        "hosts": ["www.bseindia.com"],
+        "headers": BSE_HEADERS,
+    },
+}
+
+
+def today(now=None):
+    """Today's date in IST (naive midnight), whatever the time."""
+    now_ist = now or datetime.now(IST)
+    return datetime(now_ist.year, now_ist.month, now_ist.day)
+
+
+def default_end_date(now=None):
+    """Today once the publish cutoff has passed in IST, otherwise yesterday (naive midnight)."""
+    now_ist = now or datetime.now(IST)
+    cutoff = now_ist.replace(hour=PUBLISH_CUTOFF[0], minute=PUBLISH_CUTOFF[1], second=0, microsecond=0)
+    if now_ist < cutoff:
+        now_ist -= timedelta(days=1)
+    return datetime(now_ist.year, now_ist.month, now_ist.day)
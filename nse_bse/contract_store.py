@@ -0,0 +1,136 @@
+import os
+import shutil
+
+import pandas as pd
+
+# ----------------- PER-CONTRACT PARQUET STORE ------------------
+# Every parsed bhavcopy row is kept once, normalised, in a hive-partitioned
+# dataset: <root>/exchange=NSE/trade_date=2025-06-02/part-0.parquet
+# Analyses scan it with partition pruning and row-group statistics instead of
+# re-reading the raw zips. pyarrow is only needed when the store is used;
+# exchanges.py feeds it (ExchangeAdapter.ingest).
+
+STRING_COLUMNS = ["instrument", "symbol", "contract", "option_type"]
+FLOAT_COLUMNS = ["strike", "open", "high", "low", "close", "turnover", "premium_turnover"]
+INT_COLUMNS = ["open_interest", "quantity", "contracts", "trades"]
+
+
+def _pa():
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise ImportError("The contract store needs pyarrow: pip install pyarrow") from e
+    return pa
+
+
+def contract_schema():
+    pa = _pa()
+    text = pa.dictionary(pa.int32(), pa.string())
+    return pa.schema(
+        [(name, text) for name in STRING_COLUMNS]
+        + [("expiry", pa.date32())]
+        + [(name, pa.float64()) for name in FLOAT_COLUMNS]
+        + [(name, pa.int64()) for name in INT_COLUMNS]
+    )
+
+
+def partition_schema():
+    pa = _pa()
+    return pa.schema([("exchange", pa.string()), ("trade_date", pa.date32())])
+
+
+def to_arrow(chunk, expiry_format=None):
+    """Normalise one canonical-named chunk to the typed contract schema."""
+    pa = _pa()
+    schema = contract_schema()
+    arrays = []
+    for field in schema:
+        name = field.name
+        if name not in chunk.columns:
+            arrays.append(pa.nulls(len(chunk), type=field.type))
+            continue
+        col = chunk[name]
+        if name in STRING_COLUMNS:
+            values = col.astype("string").str.strip()
+            arrays.append(pa.array(values, type=pa.string(), from_pandas=True).dictionary_encode())
+        elif name == "expiry":
+            values = pd.to_datetime(col.astype("string").str.strip(), format=expiry_format, errors="coerce")
+            arrays.append(pa.array(values.dt.date, type=pa.date32(), from_pandas=True))
+        elif name in INT_COLUMNS:
+            values = pd.to_numeric(col, errors="coerce").round().astype("Int64")
+            arrays.append(pa.array(values, type=pa.int64(), from_pandas=True))
+        else:
+            arrays.append(pa.array(pd.to_numeric(col, errors="coerce"), type=pa.float64(), from_pandas=True))
+    return pa.Table.from_arrays(arrays, schema=schema)
+
+
+class ContractStore:
+    def __init__(self, root):
+        self.root = root
+
+    def partition_dir(self, exchange, iso_date):
+        return os.path.join(self.root, f"exchange={exchange}", f"trade_date={iso_date}")
+
+    def has_day(self, exchange, iso_date):
+        return os.path.exists(os.path.join(self.partition_dir(exchange, iso_date), "part-0.parquet"))
+
+    def write_day(self, exchange, iso_date, chunks, expiry_format=None):
+        """Write one day's rows (an iterable of DataFrame chunks); replaces the partition."""
+        import pyarrow.parquet as pq
+
+        part_dir = self.partition_dir(exchange, iso_date)
+        # Staged under "_staging" (ignored by dataset discovery), then swapped
+        # in. Each writer process has its own directory there and removes only
+        # that: rebuild workers share the parent, which is left in place.
+        tmp_dir = os.path.join(self.root, "_staging", f"{os.getpid()}-{exchange}-{iso_date}")
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        os.makedirs(tmp_dir)
+        os.makedirs(os.path.dirname(part_dir), exist_ok=True)
+        rows = 0
+        try:
+            with pq.ParquetWriter(
+                os.path.join(tmp_dir, "part-0.parquet"),
+                contract_schema(),
+                compression="zstd",
+                use_dictionary=True,
+            ) as writer:
+                for chunk in chunks:
+                    writer.write_table(to_arrow(chunk, expiry_format))
+                    rows += len(chunk)
+            shutil.rmtree(part_dir, ignore_errors=True)
+            os.replace(tmp_dir, part_dir)
+        finally:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+        return rows
+
+    def dataset(self):
+        import pyarrow.dataset as ds
+
+        return ds.dataset(
+            self.root,
+            format="parquet",
+            partitioning=ds.partitioning(partition_schema(), flavor="hive"),
+            exclude_invalid_files=True,
+        )
+
+    def scan(self, columns=None, start=None, end=None, exchange=None, symbols=None, filter=None):
+        """Columnar scan; date/exchange prune partitions, symbols push down to row groups."""
+        import datetime
+
+        import pyarrow.dataset as ds
+
+        expr = filter
+        conditions = []
+        if start is not None:
+            conditions.append(ds.field("trade_date") >= datetime.date.fromisoformat(str(start)[:10]))
+        if end is not None:
+            conditions.append(ds.field("trade_date") <= datetime.date.fromisoformat(str(end)[:10]))
+        if exchange is not None:
+            conditions.append(ds.field("exchange") == exchange)
+        if symbols is not None:
+            conditions.append(ds.field("symbol").isin(list(symbols)))
+        for condition in conditions:
+            expr = condition if expr is None else expr & condition
+        if not os.path.isdir(self.root):
+            return pd.DataFrame(columns=columns or [])
+        return self.dataset().to_table(columns=columns, filter=expr).to_pandas()
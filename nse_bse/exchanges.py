@@ -0,0 +1,290 @@
+import io
+import zipfile
+from contextlib import contextmanager
+
+from . import config
+from .cache_manifest import looks_like_csv, looks_like_zip, open_cached
+
+# ----------------- EXCHANGE ADAPTERS ------------------
+# Everything that differs between the NSE F&O zip and the BSE derivative CSV:
+# where the file lives, what it is called, how to open the bhavcopy inside it
+# and how its headers map to canonical column names. The pipeline only ever
+# talks to an adapter, so fetch/parse/store code is shared. pandas is only
+# imported when a file is actually parsed.
+
+# Raw bhavcopy headers -> canonical per-contract column names
+NSE_COLUMN_MAP = {
+    "INSTRUMENT": "instrument",
+    "SYMBOL": "symbol",
+    "EXP_DATE": "expiry",
+    "STR_PRICE": "strike",
+    "OPT_TYPE": "option_type",
+    "OPEN_PRICE": "open",
+    "HI_PRICE": "high",
+    "LO_PRICE": "low",
+    "CLOSE_PRICE": "close",
+    "OPEN_INT*": "open_interest",
+    "TRD_QTY": "quantity",
+    "NO_OF_CONT": "contracts",
+    "NO_OF_TRADE": "trades",
+    "NOTION_VAL": "turnover",
+    "PR_VAL": "premium_turnover",
+}
+
+# BSE has renamed MS_*.csv headers over time; any of the aliases is accepted
+BSE_COLUMN_MAP = {
+    "Product Type": "instrument",
+    "Instrument Type": "instrument",
+    "Asset Code": "symbol",
+    "Underlying": "symbol",
+    "Series Code": "contract",
+    "Expiry Date": "expiry",
+    "Strike Price": "strike",
+    "Option Type": "option_type",
+    "Open Price": "open",
+    "High Price": "high",
+    "Low Price": "low",
+    "Close Price": "close",
+    "Open Interest": "open_interest",
+    "No. of Trades": "trades",
+    "No. of Contracts": "contracts",
+    "Traded Quantity": "quantity",
+    "Turnover": "turnover",
+    "Premium Turnover": "premium_turnover",
+}
+
+
+# Column types pinned while parsing (canonical names), so pandas neither
+# infers them nor falls back to object columns: counts are float64 (a blank
+# count is NaN, not a reason to re-read the file; nullable Int64 parses about
+# 2.5x slower), prices and values float64, and the repetitive text columns
+# categorical.
+COUNT_DTYPES = {name: "float64" for name in ("open_interest", "quantity", "contracts", "trades")}
+VALUE_DTYPES = {
+    name: "float64" for name in ("strike", "open", "high", "low", "close", "turnover", "premium_turnover")
+}
+TEXT_DTYPES = {name: "category" for name in ("instrument", "symbol", "contract", "option_type", "expiry")}
+COLUMN_DTYPES = {**COUNT_DTYPES, **VALUE_DTYPES, **TEXT_DTYPES}
+
+
+def nse_member_name(names, date_str):
+    names = set(names)
+    for candidate in (f"op{date_str}.csv", f"op{date_str}.dat"):
+        if candidate in names:
+            return candidate
+    return None
+
+
+def index_fo_zip(filename, raw):
+    """zip_index.build_index() of a cached fo{DDMMYYYY}.zip."""
+    from .zip_index import build_index
+
+    date_str = filename[2:-len(".zip")]
+    return build_index(raw, lambda names: nse_member_name(names, date_str))
+
+
+def _layout(index):
+    """Header and delimiter the indexer recorded, as parser keyword arguments."""
+    if not index or not index.get("header"):
+        return {}
+    return {"header": index["header"], "delimiter": index.get("delimiter") or ","}
+
+
+def _raw(source):
+    if isinstance(source, (bytes, bytearray)):
+        # BytesIO over bytes shares the buffer instead of copying it
+        return io.BytesIO(source)
+    return open_cached(source)
+
+
+class ExchangeAdapter:
+    name = None
+    column_map = {}
+    # Canonical column -> dtype for the chunked reader; empty: inferred
+    dtypes = {}
+    validator = None
+    # Builds the manifest's per-file index of the container (None: plain files)
+    indexer = None
+    expiry_format = None
+    headers = None
+    # Cache objects: compress them (CSVs) or keep them as served (zips), and
+    # older plain-file caches to adopt
+    compress_cache = False
+    legacy_cache_dirs = ()
+
+    def __init__(self, base_url=None, cache_dir=None):
+        self.base_url = base_url or self.default_base_url
+        self.cache_dir = cache_dir or self.default_cache_dir
+
+    def filename(self, date_obj):
+        raise NotImplementedError
+
+    def url(self, date_obj):
+        raise NotImplementedError
+
+    @contextmanager
+    def open(self, source, date_obj, index=None):
+        """Binary stream of the bhavcopy CSV in `source`: a cached file's path,
+        or the downloaded bytes themselves (parsed without touching disk).
+        `index` is what `indexer` recorded for the cached file, if anything."""
+        with _raw(source) as f:
+            yield f
+
+    def read_typed(self, read, stats=None):
+        """read(dtypes) with the declared column types; a file that does not
+        fit them (stray text in a numeric column) is read again with inferred
+        ones, with `stats` put back to what it was before the first attempt."""
+        from .parsers import ColumnTypeError
+
+        if not self.dtypes:
+            return read(None)
+        before = dict(stats) if stats is not None else None
+        try:
+            return read(self.dtypes)
+        except ColumnTypeError as e:
+            print(f"{self.name}: file does not fit the declared column types ({e}); reading it untyped")
+            if stats is not None:
+                stats.clear()
+                stats.update(before)
+            return read(None)
+
+    def aggregate(self, source, date_obj, metrics, fast=True, stats=None, index=None):
+        """Aggregator over the bhavcopy; a `stats` dict collects read/aggregate
+        timings and byte/row counts for metrics.RunMetrics.parse_pass()."""
+        from .parsers import aggregate_stream
+
+        def read(dtypes):
+            with self.open(source, date_obj, index) as f:
+                if stats is not None:
+                    from .metrics import CountingReader
+
+                    f = CountingReader(f, stats)
+                return aggregate_stream(
+                    f, self.column_map, metrics, fast, stats=stats, dtypes=dtypes, **_layout(index)
+                )
+
+        return self.read_typed(read, stats)
+
+    def ingest(self, store, source, date_obj, series=None, index=None):
+        """Write the day to the contract store; a series_index.DaySeries passed
+        as `series` sums the same chunks on their way through."""
+        from .parsers import iter_column_chunks
+
+        def read(dtypes):
+            with self.open(source, date_obj, index) as f:
+                chunks = iter_column_chunks(f, self.column_map, dtypes=dtypes, **_layout(index))
+                if series is not None:
+                    from .series_index import tap
+
+                    series.reset()
+                    chunks = tap(chunks, series)
+                return store.write_day(self.name, date_obj.strftime("%Y-%m-%d"), chunks, self.expiry_format)
+
+        return self.read_typed(read)
+
+    def aggregate_and_ingest(self, store, source, date_obj, metrics, series=None, stats=None, index=None):
+        """aggregate() and ingest() off one read of the file: each chunk is
+        summed into the metrics (and `series`) on its way to the contract
+        store. Returns (Aggregator, rows stored)."""
+        from .aggregation import Aggregator
+        from .parsers import iter_column_chunks, tally
+
+        def read(dtypes):
+            with self.open(source, date_obj, index) as f:
+                if stats is not None:
+                    from .metrics import CountingReader
+
+                    f = CountingReader(f, stats)
+                aggregator = Aggregator(metrics)
+                chunks = tally(
+                    iter_column_chunks(f, self.column_map, dtypes=dtypes, **_layout(index)), aggregator, stats
+                )
+                if series is not None:
+                    from .series_index import tap
+
+                    series.reset()
+                    chunks = tap(chunks, series)
+                rows = store.write_day(self.name, date_obj.strftime("%Y-%m-%d"), chunks, self.expiry_format)
+                return aggregator, rows
+
+        return self.read_typed(read, stats)
+
+
+class NseFoAdapter(ExchangeAdapter):
+    """fo{DDMMYYYY}.zip holding op{DDMMYYYY}.csv (older archives: .dat)."""
+
+    name = "NSE"
+    default_base_url = config.NSE_BASE_URL
+    default_cache_dir = config.NSE_CACHE_DIR
+    column_map = NSE_COLUMN_MAP
+    dtypes = COLUMN_DTYPES
+    validator = staticmethod(looks_like_zip)
+    indexer = staticmethod(index_fo_zip)
+    expiry_format = "%d-%b-%Y"
+    # The old NSE-only scripts kept their own copy of the same zips here
+    legacy_cache_dirs = ("nse_zip_cache",)
+
+    def filename(self, date_obj):
+        return f"fo{date_obj.strftime('%d%m%Y')}.zip"
+
+    def url(self, date_obj):
+        return self.base_url.format(date_obj.strftime("%d%m%Y"))
+
+    @contextmanager
+    def open(self, source, date_obj, index=None):
+        date_str = date_obj.strftime("%d%m%Y")
+        if index is not None:
+            if index["member"] is None:
+                raise KeyError(f"op{date_str}.csv/.dat not found in ZIP")
+            # Straight to the member's data: no directory read, no name probing
+            from .zip_index import open_member
+
+            with _raw(source) as raw, open_member(raw, index) as f:
+                yield f
+            return
+        # The member is inflated as it is read, from the file or from memory
+        with _raw(source) as raw, zipfile.ZipFile(raw, "r") as z:
+            inner_file = nse_member_name(z.namelist(), date_str)
+            if inner_file is None:
+                raise KeyError(f"op{date_str}.csv/.dat not found in ZIP")
+            with z.open(inner_file) as f:
+                yield f
+
+
+class BseDerivativeAdapter(ExchangeAdapter):
+    """MS_{YYYYMMDD}-01.csv, served directly."""
+
+    name = "BSE"
+    default_base_url = config.BSE_BASE_URL
+    default_cache_dir = config.BSE_CACHE_DIR
+    column_map = BSE_COLUMN_MAP
+    dtypes = COLUMN_DTYPES
+    validator = staticmethod(looks_like_csv)
+    headers = config.BSE_HEADERS
+    compress_cache = True
+
+    def filename(self, date_obj):
+        return f"MS_{date_obj.strftime('%Y%m%d')}-01.csv"
+
+    def url(self, date_obj):
+        return self.base_url.format(f"{date_obj.strftime('%Y%m%d')}-01")
+
+
+ADAPTERS = {"NSE": NseFoAdapter, "BSE": BseDerivativeAdapter}
+
+
+def default_adapters():
+    return {name: cls() for name, cls in ADAPTERS.items()}
+
+
+# ----------------- REBUILD WORKER ------------------
+
+def aggregate_cached_file(adapter, iso_date, path, metrics, fast=True, index=None):
+    """Process-pool job: aggregate one cached file into (metrics dict, error)."""
+    from datetime import datetime
+
+    try:
+        date_obj = datetime.strptime(iso_date, "%Y-%m-%d")
+        return adapter.aggregate(path, date_obj, metrics, fast, index=index).result(), None
+    except Exception as e:
+        return None, str(e)
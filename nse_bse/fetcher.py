@@ -0,0 +1,235 @@
+import random
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import urlparse
+
+# ----------------- RATE LIMITING ------------------
+# One token bucket per host. Every request takes a token; the refill rate
+# starts at 1/interval and follows the server:
+#   - success      -> rate creeps up (additive), up to max_factor x the start
+#                     rate, unless responses are getting slow
+#   - 429/403/503  -> rate halves and Retry-After is honoured
+#   - other 5xx / connection errors -> rate drops by a quarter
+# A host that fails `breaker_threshold` times in a row is paused (circuit
+# open): requests to it fail fast with HostUnavailable for `cooldown`
+# seconds, doubling on every re-trip, while other hosts carry on. After the
+# pause a single probe request decides whether it closes again.
+# Retries come out of a per-host budget (a fraction of successful requests),
+# so a struggling host gets fewer retries, not more; waits between attempts
+# are jittered so parallel workers do not retry in lockstep.
+
+THROTTLE_STATUSES = {403, 429, 503}
+
+
+class HostUnavailable(Exception):
+    pass
+
+
+class _Host:
+    def __init__(self, interval, max_factor, fallback_rate, retry_reserve):
+        unlimited = interval <= 0
+        self.start_rate = fallback_rate if unlimited else 1.0 / interval
+        self.rate = float("inf") if unlimited else self.start_rate
+        self.max_rate = float("inf") if unlimited else self.start_rate * max_factor
+        self.min_rate = max(0.05, self.start_rate / 16)
+        self.tokens = 1.0
+        self.updated = time.monotonic()
+        self.latency = None
+        self.failures = 0
+        self.open_until = 0.0
+        self.cooldown = None
+        self.probing = False
+        self.retry_budget = retry_reserve
+        self.stats = {"requests": 0, "throttled": 0, "errors": 0, "pauses": 0, "retries_denied": 0}
+
+
+class HostRateLimits:
+    """Adaptive per-host token buckets with a circuit breaker and retry budget.
+
+    `intervals` maps a host to its starting minimum spacing in seconds; 0
+    means unlimited until the host first pushes back.
+    """
+
+    def __init__(self, intervals, default_interval=0.0, max_factor=4.0, fallback_rate=2.0,
+                 latency_target=5.0, breaker_threshold=5, cooldown=60.0, max_cooldown=15 * 60,
+                 retry_ratio=0.2, retry_reserve=10.0):
+        self.intervals = dict(intervals)
+        self.default_interval = default_interval
+        self.max_factor = max_factor
+        self.fallback_rate = fallback_rate
+        self.latency_target = latency_target
+        self.breaker_threshold = breaker_threshold
+        self.cooldown = cooldown
+        self.max_cooldown = max_cooldown
+        self.retry_ratio = retry_ratio
+        self.retry_reserve = retry_reserve
+        self._lock = threading.Lock()
+        self._hosts = {}
+
+    def _host(self, url):
+        name = urlparse(url).hostname or ""
+        host = self._hosts.get(name)
+        if host is None:
+            interval = self.intervals.get(name, self.default_interval)
+            host = self._hosts[name] = _Host(interval, self.max_factor, self.fallback_rate, self.retry_reserve)
+        return name, host
+
+    def _refill(self, host, now):
+        if host.rate != float("inf"):
+            host.tokens = min(1.0, host.tokens + (now - host.updated) * host.rate)
+        host.updated = now
+
+    def wait(self, url):
+        """Block until the host has a token; HostUnavailable while it is paused."""
+        with self._lock:
+            name, host = self._host(url)
+            now = time.monotonic()
+            if host.open_until:
+                if now < host.open_until:
+                    raise HostUnavailable(f"{name} paused for another {host.open_until - now:.0f}s")
+                if host.probing:
+                    raise HostUnavailable(f"{name} is being probed after a pause")
+                host.probing = True
+            host.stats["requests"] += 1
+            if host.rate == float("inf") and host.tokens >= 0:
+                return
+            self._refill(host, now)
+            host.tokens -= 1
+            delay = -host.tokens / host.rate if host.tokens < 0 else 0.0
+        if delay > 0:
+            time.sleep(delay)
+
+    def record(self, url, status=None, elapsed=None, retry_after=None):
+        """Feed back one outcome: an HTTP status, or status=None for a connection error."""
+        with self._lock:
+            name, host = self._host(url)
+            now = time.monotonic()
+            if elapsed is not None:
+                host.latency = elapsed if host.latency is None else 0.8 * host.latency + 0.2 * elapsed
+            if status is not None and status < 500 and status not in THROTTLE_STATUSES:
+                self._success(host)
+                return
+            if host.rate == float("inf"):
+                host.rate = host.start_rate
+                host.max_rate = host.start_rate * self.max_factor
+            self._refill(host, now)
+            if status in THROTTLE_STATUSES:
+                host.stats["throttled"] += 1
+                host.rate = max(host.min_rate, host.rate * 0.5)
+                pause = _seconds(retry_after)
+                if pause:
+                    # Nobody gets a token before the server said to come back
+                    host.tokens = min(host.tokens, -pause * host.rate)
+            else:
+                host.stats["errors"] += 1
+                host.rate = max(host.min_rate, host.rate * 0.75)
+            host.failures += 1
+            if host.probing or host.failures >= self.breaker_threshold:
+                self._trip(name, host, now)
+
+    def record_response(self, url, response):
+        """record() for a requests response (e.g. the 401/403 a cookie re-warm replaces)."""
+        self.record(url, response.status_code, response.elapsed.total_seconds(), response.headers.get("Retry-After"))
+
+    def _success(self, host):
+        host.failures = 0
+        host.open_until = 0.0
+        host.cooldown = None
+        host.probing = False
+        host.retry_budget = min(self.retry_reserve * 2, host.retry_budget + self.retry_ratio)
+        if host.latency is not None and self.latency_target and host.latency > self.latency_target:
+            host.rate = max(host.min_rate, host.rate * 0.9)
+        elif host.rate != float("inf"):
+            host.rate = min(host.max_rate, host.rate + host.start_rate * 0.1)
+
+    def _trip(self, name, host, now):
+        host.cooldown = self.cooldown if host.cooldown is None else min(self.max_cooldown, host.cooldown * 2)
+        host.open_until = now + host.cooldown
+        host.probing = False
+        host.failures = 0
+        host.stats["pauses"] += 1
+        print(f"⚠️ Warning: {name} keeps failing; pausing it for {host.cooldown:.0f}s")
+
+    def allow_retry(self, url):
+        """Take one retry from the host's budget; False once it is spent."""
+        with self._lock:
+            _, host = self._host(url)
+            if host.open_until:
+                return False
+            if host.retry_budget >= 1:
+                host.retry_budget -= 1
+                return True
+            host.stats["retries_denied"] += 1
+            return False
+
+    def retry_delay(self, attempt, base, cap=60.0):
+        """Jittered exponential backoff: between half and all of base * 2**attempt."""
+        ceiling = min(cap, base * (2 ** attempt))
+        return ceiling / 2 + random.uniform(0, ceiling / 2)
+
+    def report(self):
+        with self._lock:
+            return {
+                name: {**host.stats, "rate": host.rate, "paused": bool(host.open_until)}
+                for name, host in self._hosts.items()
+            }
+
+
+def _seconds(retry_after):
+    try:
+        return max(0.0, float(retry_after))
+    except (TypeError, ValueError):
+        return 0.0
+
+
+# ----------------- BOUNDED FETCH STAGE ------------------
+
+def iter_fetched(jobs, concurrency, default_workers=1, window=2):
+    """Run fetch jobs on one bounded thread pool per exchange.
+
+    `jobs` is an iterable of (exchange, key, fn) tuples; `fn()` does the actual
+    download. Results are yielded as (exchange, key, result) in completion order
+    so the caller can start parsing while the remaining downloads are in flight.
+    At most `window` x the exchange's workers jobs are submitted ahead of the
+    consumer, and a result is let go once it has been yielded, so downloads
+    held in memory stay bounded however many days are fetched.
+    """
+    queues = {}
+    for exchange, key, fn in jobs:
+        queues.setdefault(exchange, deque()).append((key, fn))
+    pools = {}
+    futures = {}
+
+    def submit(exchange):
+        key, fn = queues[exchange].popleft()
+        futures[pools[exchange].submit(fn)] = (exchange, key)
+
+    try:
+        for exchange, queue in queues.items():
+            workers = max(1, concurrency.get(exchange, default_workers))
+            pools[exchange] = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=f"fetch-{exchange}")
+            for _ in range(min(len(queue), workers * window)):
+                submit(exchange)
+
+        while futures:
+            done, _ = wait(futures, return_when=FIRST_COMPLETED)
+            while done:
+                future = done.pop()
+                exchange, key = futures.pop(future)
+                try:
+                    result = future.result()
+                except Exception as e:
+                    print(f"{exchange}: Fetch job for {key} raised: {e}")
+                    result = None
+                future = None
+                if queues[exchange]:
+                    submit(exchange)
+                yield exchange, key, result
+                result = None
+    finally:
+        for future in futures:
+            future.cancel()
+        for pool in pools.values():
+            pool.shutdown(wait=True)
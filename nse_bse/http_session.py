@@ -0,0 +1,156 @@
+import threading
+import time
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# ----------------- SESSION MANAGER ------------------
+# One long-lived requests.Session per exchange, so TLS connections are pooled
+# and kept alive across days instead of being rebuilt for every download.
+
+COOKIE_REFRESH_STATUSES = {401, 403}
+
+
+class ExchangeSessions:
+    def __init__(self, exchanges, headers=None, pool_size=4, cookie_ttl=30 * 60):
+        """`exchanges` maps a name to a dict with:
+
+        - "hosts": hostnames served by that exchange's session
+        - "headers": extra headers for the session (optional)
+        - "warmup_url": page that hands out cookies before archive downloads (optional)
+        """
+        self.exchanges = exchanges
+        self.headers = dict(headers or {})
+        self.pool_size = pool_size
+        self.cookie_ttl = cookie_ttl
+        self._host_to_exchange = {
+            host: name for name, cfg in exchanges.items() for host in cfg.get("hosts", ())
+        }
+        self._sessions = {}
+        self._warmed_at = {}
+        self._lock = threading.Lock()
+        self._warm_locks = {name: threading.Lock() for name in exchanges}
+        self.stats = {name: {"requests": 0, "warmups": 0} for name in exchanges}
+        # Connection counts of sessions already closed, so counters() survives close()
+        self._retired = {name: (0, 0) for name in exchanges}
+
+    def __reduce__(self):
+        # A process-pool worker gets its own sessions with the same settings
+        return ExchangeSessions, (self.exchanges, self.headers, self.pool_size, self.cookie_ttl)
+
+    def _count(self, exchange, counter):
+        with self._lock:
+            self.stats[exchange][counter] += 1
+
+    def exchange_for(self, url):
+        return self._host_to_exchange.get(urlparse(url).hostname)
+
+    def session(self, exchange):
+        with self._lock:
+            session = self._sessions.get(exchange)
+            if session is None:
+                session = requests.Session()
+                session.headers.update({**self.headers, **self.exchanges[exchange].get("headers", {})})
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=self.pool_size)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                self._sessions[exchange] = session
+            return session
+
+    def _cookies_fresh(self, exchange):
+        warmed_at = self._warmed_at.get(exchange)
+        if warmed_at is None or time.monotonic() - warmed_at > self.cookie_ttl:
+            return False
+        session = self._sessions.get(exchange)
+        now = time.time()
+        # Server-side expiry wins over our TTL when the cookie carries one
+        return not any(c.expires is not None and c.expires <= now for c in session.cookies)
+
+    def warm(self, exchange, timeout=10, force=False, before_request=None):
+        warmup_url = self.exchanges[exchange].get("warmup_url")
+        if not warmup_url:
+            return
+        with self._warm_locks[exchange]:
+            if not force and self._cookies_fresh(exchange):
+                return
+            session = self.session(exchange)
+            try:
+                if before_request:
+                    before_request(warmup_url)
+                session.get(warmup_url, timeout=timeout)
+                self._count(exchange, "warmups")
+            except requests.exceptions.RequestException as e:
+                print(f"⚠️ Warning: Could not fetch {exchange} homepage cookies: {e}")
+            # Record the attempt either way so a dead homepage is not retried per file
+            self._warmed_at[exchange] = time.monotonic()
+
+    def request(self, method, url, timeout, headers=None, before_request=None, after_response=None):
+        """Request through the exchange's pooled session, re-warming cookies on 401/403 once.
+
+        The 401/403 that triggers the re-warm is passed to `after_response`
+        first (it may be throttling, which the caller's limiter should see);
+        the response returned is left to the caller.
+        """
+        exchange = self.exchange_for(url)
+        if exchange is None:
+            if before_request:
+                before_request(url)
+            return requests.request(method, url, headers={**self.headers, **(headers or {})}, timeout=timeout)
+
+        self.warm(exchange, before_request=before_request)
+        session = self.session(exchange)
+        if before_request:
+            before_request(url)
+        response = session.request(method, url, headers=headers, timeout=timeout)
+        self._count(exchange, "requests")
+        if response.status_code in COOKIE_REFRESH_STATUSES and self.exchanges[exchange].get("warmup_url"):
+            if after_response:
+                after_response(response)
+            self.warm(exchange, force=True, before_request=before_request)
+            if before_request:
+                before_request(url)
+            response = session.request(method, url, headers=headers, timeout=timeout)
+            self._count(exchange, "requests")
+        return response
+
+    def get(self, url, timeout, headers=None, before_request=None, after_response=None):
+        return self.request("GET", url, timeout, headers, before_request, after_response)
+
+    def head(self, url, timeout, headers=None, before_request=None, after_response=None):
+        return self.request("HEAD", url, timeout, headers, before_request, after_response)
+
+    def _pool_counts(self, exchange):
+        connections = 0
+        pool_requests = 0
+        session = self._sessions.get(exchange)
+        if session is not None:
+            for adapter in {id(a): a for a in session.adapters.values()}.values():
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is not None:
+                        connections += pool.num_connections
+                        pool_requests += pool.num_requests
+        retired_connections, retired_requests = self._retired[exchange]
+        return connections + retired_connections, pool_requests + retired_requests
+
+    def counters(self):
+        """Per-exchange request, warm-up, handshake (new connection) and reuse counts."""
+        report = {}
+        for name, stats in self.stats.items():
+            connections, pool_requests = self._pool_counts(name)
+            report[name] = {
+                **stats,
+                "handshakes": connections,
+                "reused": max(0, pool_requests - connections),
+            }
+        return report
+
+    def close(self):
+        with self._lock:
+            for name, session in self._sessions.items():
+                self._retired[name] = self._pool_counts(name)
+                session.close()
+            self._sessions.clear()
+            self._warmed_at.clear()
@@ -0,0 +1,189 @@
+import json
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# ----------------- RUN METRICS ------------------
+# Stage-level instrumentation. Every timed stage (fetch, unzip, parse,
+# aggregate, write, cache_write, ingest) becomes one JSON line:
+#   {"ts": ..., "stage": "parse", "exchange": "NSE", "date": "2025-06-02",
+#    "seconds": 0.41, "bytes_in": ..., "bytes_out": ..., ...}
+# plus one "day" line per (date, exchange) with peak memory, and counters
+# (cache hits/misses, retries). The JSON-lines file is optional; the summary
+# table at the end of the run is always available.
+#
+# unzip/parse/aggregate run fused in one streaming pass, so they are split
+# by timing the stream's read() calls (decompression + disk) and the
+# aggregator's update() calls; parse is the remainder of the pass.
+
+
+def peak_rss_mb(children=False):
+    """Peak RSS of this process (or its largest finished child) in MB; None on Windows."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_CHILDREN if children else resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+class CountingReader:
+    """Wraps a binary stream; counts bytes and time spent in read()."""
+
+    # pandas looks at .mode to pick text/binary; GzipFile's is an int
+    mode = "rb"
+
+    def __init__(self, stream, stats):
+        self._stream = stream
+        self._stats = stats
+
+    def _timed(self, fn, *args):
+        start = time.perf_counter()
+        data = fn(*args)
+        self._stats["read_s"] = self._stats.get("read_s", 0.0) + time.perf_counter() - start
+        self._stats["bytes_out"] = self._stats.get("bytes_out", 0) + len(data)
+        return data
+
+    def read(self, *args):
+        return self._timed(self._stream.read, *args)
+
+    def read1(self, *args):
+        # io.TextIOWrapper (which pandas puts on top) reads through read1
+        return self._timed(self._stream.read1, *args)
+
+    def readline(self, *args):
+        return self._timed(self._stream.readline, *args)
+
+    def __iter__(self):
+        return iter(self.readline, b"")
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+class RunMetrics:
+    def __init__(self, path=None, trace_memory=False):
+        self.path = path
+        self.trace_memory = trace_memory
+        self._lock = threading.Lock()
+        self._file = None
+        self.stages = {}
+        self.counters = {}
+        if trace_memory:
+            import tracemalloc
+
+            tracemalloc.start()
+
+    def __reduce__(self):
+        # A process-pool worker gets a fresh recorder writing to the same file
+        return RunMetrics, (self.path, self.trace_memory)
+
+    def _write(self, record):
+        if self.path is None:
+            return
+        if self._file is None:
+            # Line buffered: backfill shard processes append to the same file
+            self._file = open(self.path, "a", buffering=1)
+        self._file.write(json.dumps(record, default=str) + "\n")
+
+    def record(self, stage, exchange=None, date=None, seconds=None, **fields):
+        record = {"ts": round(time.time(), 3), "stage": stage, "exchange": exchange, "date": date}
+        if seconds is not None:
+            record["seconds"] = round(seconds, 6)
+        record.update(fields)
+        with self._lock:
+            if seconds is not None:
+                totals = self.stages.setdefault((stage, exchange), {"calls": 0, "seconds": 0.0, "bytes_in": 0, "bytes_out": 0})
+                totals["calls"] += 1
+                totals["seconds"] += seconds
+                totals["bytes_in"] += fields.get("bytes_in") or 0
+                totals["bytes_out"] += fields.get("bytes_out") or 0
+            self._write(record)
+
+    @contextmanager
+    def stage(self, stage, exchange=None, date=None, **fields):
+        """Time a block; the caller may add fields (bytes_out, rows, ...) to the yielded dict."""
+        extra = dict(fields)
+        start = time.perf_counter()
+        try:
+            yield extra
+        finally:
+            self.record(stage, exchange, date, time.perf_counter() - start, **extra)
+
+    def count(self, name, exchange=None, n=1):
+        with self._lock:
+            key = (name, exchange)
+            self.counters[key] = self.counters.get(key, 0) + n
+
+    def memory(self):
+        """Peak memory so far: process RSS and, with tracing, Python allocations."""
+        report = {"peak_rss_mb": peak_rss_mb()}
+        if self.trace_memory:
+            import tracemalloc
+
+            _, peak = tracemalloc.get_traced_memory()
+            report["traced_peak_mb"] = round(peak / (1024 * 1024), 2)
+            if hasattr(tracemalloc, "reset_peak"):  # Python 3.9+: peak per day
+                tracemalloc.reset_peak()
+        return report
+
+    def parse_pass(self, exchange, date, seconds, bytes_in, stats):
+        """Split one fused unzip/parse/aggregate pass (see CountingReader) into three stages."""
+        read_s = stats.get("read_s", 0.0)
+        aggregate_s = stats.get("aggregate_s", 0.0)
+        csv_bytes = stats.get("bytes_out", 0)
+        rows = stats.get("rows", 0)
+        self.record("unzip", exchange, date, read_s, bytes_in=bytes_in, bytes_out=csv_bytes)
+        self.record("parse", exchange, date, max(0.0, seconds - read_s - aggregate_s), bytes_in=csv_bytes, rows=rows)
+        self.record("aggregate", exchange, date, aggregate_s, rows=rows)
+
+    def day(self, exchange, date, **fields):
+        self.record("day", exchange, date, **fields, **self.memory())
+
+    def summary(self):
+        lines = []
+        if self.stages:
+            lines.append(f"{'stage':<20}{'calls':>7}{'total s':>10}{'avg ms':>10}{'MB in':>10}{'MB out':>10}")
+            for (stage, exchange), t in sorted(self.stages.items(), key=lambda kv: -kv[1]["seconds"]):
+                name = f"{stage}:{exchange}" if exchange else stage
+                lines.append(
+                    f"{name:<20}{t['calls']:>7}{t['seconds']:>10.2f}{1000 * t['seconds'] / t['calls']:>10.1f}"
+                    f"{t['bytes_in'] / 1e6:>10.1f}{t['bytes_out'] / 1e6:>10.1f}"
+                )
+        if self.counters:
+            lines.append(", ".join(
+                f"{name}{':' + exchange if exchange else ''}={n}" for (name, exchange), n in sorted(
+                    self.counters.items(), key=lambda kv: (kv[0][0], kv[0][1] or ""))
+            ))
+        memory = self.memory()
+        lines.append(f"peak RSS {memory['peak_rss_mb'] or 0:.0f} MB"
+                     + (f", traced Python peak {memory['traced_peak_mb']} MB" if self.trace_memory else ""))
+        return "\n".join(lines)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                for (name, exchange), n in sorted(self.counters.items(), key=lambda kv: (kv[0][0], kv[0][1] or "")):
+                    self._write({"ts": round(time.time(), 3), "stage": "counter", "name": name,
+                                 "exchange": exchange, "value": n})
+                self._file.close()
+                self._file = None
+
+
+@contextmanager
+def cpu_profile(path, top=25):
+    """cProfile the block; stats go to `path` and the top entries are printed."""
+    import cProfile
+    import pstats
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        profiler.dump_stats(path)
+        print(f"\nCPU profile written to {path} (top {top} by cumulative time):")
+        pstats.Stats(profiler).sort_stats("cumulative").print_stats(top)
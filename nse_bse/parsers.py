@@ -0,0 +1,103 @@
+import time
+
+import pandas as pd
+
+from .aggregation import Aggregator, input_columns
+
+# ----------------- BHAVCOPY PARSING ------------------
+# Format-agnostic CSV readers; exchanges.py opens the right file/member.
+# Fast aggregation mode: the member is streamed in fixed-size row chunks and
+# only the columns being summed are materialised, so memory stays flat no
+# matter how large the day's file is. Header names are stripped once, from
+# the first line, and the adapter's declared dtypes replace type inference.
+
+CHUNK_ROWS = 200_000
+
+
+class ColumnTypeError(ValueError):
+    """A column's values do not fit the dtype pinned for it."""
+
+
+def read_header(stream, delimiter=","):
+    """Consume the header line of a binary CSV stream and return stripped names."""
+    line = stream.readline().decode("utf-8-sig", errors="replace")
+    return [name.strip() for name in line.rstrip("\r\n").split(delimiter)]
+
+
+def iter_column_chunks(stream, column_map, chunksize=CHUNK_ROWS, dtypes=None, header=None, delimiter=","):
+    """Yield chunks holding only the mapped columns, renamed to canonical names.
+
+    `header`/`delimiter` are the file's layout when already known (the zip
+    index records them); the header line is then skipped, not parsed.
+
+    `dtypes` (canonical name -> dtype) pins the parser's column types instead
+    of letting it infer them; a file that does not fit raises ColumnTypeError.
+    Malformed CSV (pandas' ParserError) is raised as is.
+    """
+    if header is None:
+        header = read_header(stream, delimiter)
+    else:
+        stream.readline()
+    wanted = [i for i, name in enumerate(header) if name in column_map]
+    if not wanted:
+        return
+    pinned = {
+        header[i]: dtypes[column_map[header[i]]] for i in wanted if column_map[header[i]] in (dtypes or {})
+    }
+    reader = pd.read_csv(
+        stream, header=None, names=header, usecols=wanted, chunksize=chunksize, dtype=pinned or None,
+        sep=delimiter,
+    )
+    chunks = iter(reader)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        except pd.errors.ParserError:
+            raise
+        except (ValueError, TypeError) as e:
+            if not pinned:
+                raise
+            raise ColumnTypeError(str(e)) from e
+        chunk = chunk.rename(columns=column_map)
+        yield chunk.loc[:, ~chunk.columns.duplicated()]
+
+
+def aggregate_stream(stream, column_map, metrics, fast=True, chunksize=CHUNK_ROWS, stats=None, dtypes=None,
+                     header=None, delimiter=","):
+    """Evaluate every metric in one pass over the file; returns the Aggregator.
+
+    With a `stats` dict, rows and the time spent in Aggregator.update()
+    are added to it ("rows", "aggregate_s").
+    """
+    aggregator = Aggregator(metrics)
+    needed = input_columns(metrics)
+    if fast:
+        wanted_map = {raw: canon for raw, canon in column_map.items() if canon in needed}
+        chunks = iter_column_chunks(stream, wanted_map, chunksize, dtypes, header, delimiter)
+    else:
+        df = pd.read_csv(stream, sep=delimiter)
+        df.columns = df.columns.str.strip()
+        df = df.rename(columns=column_map)
+        chunks = [df.loc[:, ~df.columns.duplicated()]]
+    for _ in tally(chunks, aggregator, stats):
+        pass
+    return aggregator
+
+
+def tally(chunks, aggregator, stats=None):
+    """Pass `chunks` through, feeding each one to aggregator.update() first.
+
+    Lets a second consumer (the contract store) share the read; `stats`
+    is filled as in aggregate_stream().
+    """
+    for chunk in chunks:
+        if stats is None:
+            aggregator.update(chunk)
+        else:
+            start = time.perf_counter()
+            aggregator.update(chunk)
+            stats["aggregate_s"] = stats.get("aggregate_s", 0.0) + time.perf_counter() - start
+            stats["rows"] = stats.get("rows", 0) + len(chunk)
+        yield chunk
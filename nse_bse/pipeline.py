@@ -0,0 +1,1170 @@
+import os
+import time
+from collections import namedtuple
+from datetime import datetime, timedelta
+from functools import partial
+
+from . import config
+from .aggregation import BSE_METRICS, NSE_METRICS, Metric, output_columns
+from .cache_manifest import HIT, MANIFEST_NAME, MISSING, OBJECTS_DIR, CacheManifest, looks_like_csv
+from .exchanges import aggregate_cached_file, default_adapters
+from .fetcher import HostRateLimits, HostUnavailable, iter_fetched
+from .metrics import RunMetrics
+from .summary_store import INDEX_SUFFIX, SummaryStore, latest_cells
+from .trading_calendar import check_coverage, get_calendar, trading_dates
+from .watermark import WATERMARK_SUFFIX, Watermarks
+
+# ----------------- PIPELINE ------------------
+# fetch (manifest-backed cache, pooled sessions) -> parse (declared metrics)
+# -> store (summary CSV, optional contract store), shared by every exchange
+# adapter. requests, pandas and pyarrow are imported the first time a
+# download, parse or contract write actually happens, so a run with nothing
+# to do never loads them.
+
+# What a run produces: which exchanges, which metrics, where the summary goes
+# and which metric is echoed per day.
+Profile = namedtuple("Profile", ["exchanges", "metrics", "output", "headline"])
+
+PROFILES = {
+    # Wide NSE + BSE summary (the scheduled workflow)
+    "combined": Profile(
+        ["NSE", "BSE"],
+        {"NSE": NSE_METRICS, "BSE": BSE_METRICS},
+        config.OUTPUT_CSV,
+        {"NSE": "NSE_NO_OF_TRADE", "BSE": "BSE_No_of_Trades"},
+    ),
+    # Single-exchange trade counts, in the layout of the older per-exchange CSVs
+    "nse": Profile(
+        ["NSE"],
+        {"NSE": [Metric(config.NSE_COLUMN, "trades", "sum")]},
+        "daily_trade_summary.csv",
+        {"NSE": config.NSE_COLUMN},
+    ),
+    "bse": Profile(
+        ["BSE"],
+        {"BSE": [Metric(config.BSE_COLUMN, "trades", "sum")]},
+        "bse_daily_trade_summary.csv",
+        {"BSE": config.BSE_COLUMN},
+    ),
+}
+
+LABELS = {"NSE": config.NSE_COLUMN, "BSE": config.BSE_COLUMN}
+
+
+# Backfill shards: <output>.shards/<i>-of-<n>.csv (+ index and gaps), and
+# one cache manifest per shard next to the shared one
+SHARD_SUFFIX = ".shards"
+
+
+def shard_manifest_name(index, shards):
+    return f"{os.path.splitext(MANIFEST_NAME)[0]}.shard-{index}-of-{shards}.json"
+
+
+class FileNotPublished(Exception):
+    pass
+
+
+class Pipeline:
+    def __init__(self, profile="combined", output=None, start=None, end=None, adapters=None,
+                 sessions=None, rate_limits=None, concurrency=None, retries=config.RETRIES,
+                 timeout=config.TIMEOUT, backoff=config.BACKOFF, fast=config.FAST_PARSE,
+                 ingest=config.INGEST_CONTRACTS, contract_dir=config.CONTRACT_STORE_DIR,
+                 cache=config.CACHE_DOWNLOADS, metrics=None, series=config.SERIES_INDEX,
+                 series_dir=config.SERIES_INDEX_DIR):
+        self.profile = PROFILES[profile] if isinstance(profile, str) else profile
+        self.exchanges = list(self.profile.exchanges)
+        self.output = output or self.profile.output
+        self.start = start or config.START_DATE
+        self.end = end or config.default_end_date()
+        adapters = adapters or default_adapters()
+        self.adapters = {name: adapters[name] for name in self.exchanges}
+        self.concurrency = concurrency or config.FETCH_CONCURRENCY
+        self.retries = retries
+        self.timeout = timeout
+        self.backoff = backoff
+        self.fast = fast
+        self.ingest_contracts = ingest
+        self.contract_dir = contract_dir
+        self.cache_downloads = cache
+        # Per-underlying series, appended alongside contract ingestion
+        self.index_series = series
+        self.series_dir = series_dir
+        # Per-stage timings, bytes and counters (see metrics.py)
+        self.metrics = metrics or RunMetrics()
+        # (exchange, iso date) of files that parsed but held nothing to count
+        self.empty_files = set()
+        # (index, shards) while running one backfill shard
+        self.shard = None
+        self._sessions = sessions
+        self._rate_limits = rate_limits
+        self._manifests = None
+        self._contract_store = None
+        self._series_index = None
+        self._writer = None
+        self._writes = []
+        self._archived = []
+
+    # ---- lazily built resources ----
+
+    @property
+    def sessions(self):
+        if self._sessions is None:
+            from .http_session import ExchangeSessions
+
+            self._sessions = ExchangeSessions(
+                config.SESSION_CONFIG,
+                headers=config.DEFAULT_HEADERS,
+                pool_size=max(self.concurrency.values()),
+            )
+        return self._sessions
+
+    @property
+    def rate_limits(self):
+        if self._rate_limits is None:
+            self._rate_limits = HostRateLimits(config.HOST_MIN_INTERVAL)
+        return self._rate_limits
+
+    @property
+    def manifests(self):
+        if self._manifests is None:
+            manifests = {}
+            for name, adapter in self.adapters.items():
+                os.makedirs(adapter.cache_dir, exist_ok=True)
+                manifest_name = MANIFEST_NAME if self.shard is None else shard_manifest_name(*self.shard)
+                manifests[name] = CacheManifest(
+                    adapter.cache_dir, adapter.validator,
+                    compressed=adapter.compress_cache, legacy_dirs=adapter.legacy_cache_dirs,
+                    manifest_name=manifest_name, indexer=adapter.indexer,
+                )
+                shared = os.path.join(adapter.cache_dir, MANIFEST_NAME)
+                if manifest_name != MANIFEST_NAME and not os.path.exists(manifests[name].path) and os.path.exists(shared):
+                    # A shard starts from what is already cached; its own
+                    # manifest is folded back in by the merge step
+                    manifests[name].merge(shared)
+            self._manifests = manifests
+        return self._manifests
+
+    @property
+    def contract_store(self):
+        if self._contract_store is None:
+            from .contract_store import ContractStore
+
+            self._contract_store = ContractStore(self.contract_dir)
+        return self._contract_store
+
+    @property
+    def series_index(self):
+        if self._series_index is None:
+            from .series_index import SeriesIndex
+
+            self._series_index = SeriesIndex(self.series_dir)
+        return self._series_index
+
+    @property
+    def summary_columns(self):
+        columns = ["Date"]
+        for exchange in self.exchanges:
+            columns += output_columns(self.profile.metrics[exchange])
+        return columns
+
+    def open_summary(self, path=None):
+        path = path or self.output
+        columns = self.summary_columns
+        store = SummaryStore(path, columns)
+        added = [column for column in columns if column not in store.columns]
+        if added:
+            # New metrics need a new header: a one-off rewrite, old cells kept.
+            # Dropped or reordered ones stay in the file until the compact mode.
+            print(f"Migrating {path} to columns {columns}")
+            store.compact(columns=columns)
+        return store
+
+    def negative_ttl(self, date_obj):
+        if (self.end - date_obj).days < config.RECENT_DAYS:
+            return config.NEGATIVE_TTL_RECENT
+        return config.NEGATIVE_TTL
+
+    def plan_from_watermarks(self, state):
+        """{date: exchanges due} after each exchange's watermark; None if there are no usable marks."""
+        if not os.path.exists(self.output) or not state.valid_for(
+            self.start.strftime("%Y-%m-%d"), self.summary_columns, self.exchanges
+        ):
+            return None
+        pending = {}
+        for exchange in self.exchanges:
+            after = datetime.strptime(state.get(exchange), "%Y-%m-%d") + timedelta(days=1)
+            for day in get_calendar(exchange).iter_trading_days(max(after, self.start), self.end):
+                pending.setdefault(datetime(day.year, day.month, day.day), []).append(exchange)
+        return pending
+
+    def plan_from_summary(self, store):
+        """{date: exchanges open} for every trading day the summary does not have yet."""
+        pending = {}
+        skipped = []
+        for current_date, exchanges in self.trading_days():
+            if current_date.strftime("%Y-%m-%d") in store.dates:
+                skipped.append(current_date)
+            else:
+                pending[current_date] = exchanges
+        if skipped:
+            print(f"Skipping {len(skipped)} already processed dates "
+                  f"({skipped[0].strftime('%Y-%m-%d')} to {skipped[-1].strftime('%Y-%m-%d')})")
+        return pending
+
+    def plan_retries(self, state, pending):
+        """{date: exchanges} of recorded gaps that are due again, within the run's range."""
+        retries = {}
+        for iso_date, exchanges in state.gaps_due(self.exchanges).items():
+            date_obj = datetime.strptime(iso_date, "%Y-%m-%d")
+            if self.start <= date_obj <= self.end and date_obj not in pending:
+                retries[date_obj] = exchanges
+        return retries
+
+    def seed_gaps(self, state, store):
+        # One-off for summaries written before gaps were tracked: every empty
+        # exchange block on a day that exchange traded becomes a gap
+        start = self.start.strftime("%Y-%m-%d")
+        for row in store.read_rows():
+            iso_date = row[store.date_column][:10]
+            if iso_date < start:
+                continue
+            for exchange in self.exchanges:
+                columns = output_columns(self.profile.metrics[exchange])
+                if not any(row.get(column) for column in columns) and get_calendar(exchange).is_trading_day(iso_date):
+                    state.add_gap(exchange, iso_date, "empty in summary")
+        if state.gaps:
+            count = sum(len(gaps) for gaps in state.gaps.values())
+            print(f"Found {count} empty (date, exchange) cells in {self.output}; they will be re-fetched")
+
+    def record_outcome(self, state, exchange, date_obj, metrics):
+        """Clear or (re)record the gap for one attempted (date, exchange) cell."""
+        iso_date = date_obj.strftime("%Y-%m-%d")
+        if metrics is not None:
+            state.fill_gap(exchange, iso_date)
+            return
+        filename = self.adapters[exchange].filename(date_obj)
+        manifest = self.manifests[exchange]
+        negative = manifest.missing.get(filename)
+        if negative is not None:
+            # Not published (yet): worth another look once the negative entry expires
+            state.add_gap(exchange, iso_date, negative["reason"], negative["until"])
+        elif (exchange, iso_date) in self.empty_files:
+            # The file parsed but holds nothing to count (e.g. no options member)
+            state.fill_gap(exchange, iso_date)
+        else:
+            state.add_gap(exchange, iso_date, "download or parse failed")
+
+    def advance_watermarks(self, state):
+        # Every trading day up to self.end now has its summary row
+        state.advance(
+            {exchange: self.end.strftime("%Y-%m-%d") for exchange in self.exchanges},
+            self.start.strftime("%Y-%m-%d"),
+            self.summary_columns,
+        )
+        state.save()
+
+    def trading_days(self):
+        """(date, exchanges open that day) for every day any profile exchange trades."""
+        open_days = {}
+        for exchange in self.exchanges:
+            for date_obj in trading_dates(exchange, self.start, self.end):
+                open_days.setdefault(date_obj, []).append(exchange)
+        return sorted(open_days.items())
+
+    # ---- fetch / parse / store ----
+
+    def download(self, url, headers=None, stats=None):
+        # Pooled per-exchange sessions; NSE cookies are warmed once and refreshed
+        # only when they expire or the archive answers 401/403. Pacing, retry
+        # budget and pauses of failing hosts come from the adaptive limiter.
+        # `stats` (a dict) gets the number of attempts made.
+        import requests
+
+        limits = self.rate_limits
+        for attempt in range(self.retries):
+            if stats is not None:
+                stats["attempts"] = attempt + 1
+            if attempt:
+                if not limits.allow_retry(url):
+                    print(f"Retry budget for {url} spent; leaving it for the next run")
+                    break
+                wait_time = limits.retry_delay(attempt - 1, self.backoff, config.BACKOFF_CAP)
+                print(f"Waiting {wait_time:.1f}s before retrying...")
+                time.sleep(wait_time)
+            try:
+                response = self.sessions.get(
+                    url, timeout=self.timeout, headers=headers, before_request=limits.wait,
+                    after_response=partial(limits.record_response, url),
+                )
+            except HostUnavailable as e:
+                print(f"Skipping {url}: {e}")
+                return None
+            except requests.exceptions.RequestException as e:
+                limits.record(url)
+                print(f"Attempt {attempt+1} failed: {e}")
+                continue
+            limits.record(
+                url, response.status_code, response.elapsed.total_seconds(), response.headers.get("Retry-After")
+            )
+            if response.status_code == 200:
+                return response.content
+            elif response.status_code == 404:
+                # Nothing to wait for: the exchange has no file at this URL
+                raise FileNotPublished(f"HTTP 404 for {url}")
+            else:
+                print(f"Attempt {attempt+1}: HTTP {response.status_code} for {url}")
+
+        return None
+
+    def probe(self, exchange, date_obj):
+        """Whether the exchange has published the file, without downloading it:
+        a HEAD request, or a 2 KB ranged GET where HEAD is not allowed."""
+        import requests
+
+        adapter = self.adapters[exchange]
+        url = adapter.url(date_obj)
+        limits = self.rate_limits
+        head = None
+        try:
+            feedback = partial(limits.record_response, url)
+            response = self.sessions.head(
+                url, timeout=self.timeout, headers=adapter.headers, before_request=limits.wait, after_response=feedback
+            )
+            if response.status_code in (405, 501):
+                limits.record(url, response.status_code, response.elapsed.total_seconds())
+                ranged = {**(adapter.headers or {}), "Range": "bytes=0-2047"}
+                response = self.sessions.get(
+                    url, timeout=self.timeout, headers=ranged, before_request=limits.wait, after_response=feedback
+                )
+                head = response.content[:2048]
+        except HostUnavailable:
+            return False
+        except requests.exceptions.RequestException as e:
+            limits.record(url)
+            print(f"{exchange}: could not check {url}: {e}")
+            return False
+        limits.record(url, response.status_code, response.elapsed.total_seconds(), response.headers.get("Retry-After"))
+        self.metrics.record(
+            "probe", exchange, date_obj.strftime("%Y-%m-%d"), status=response.status_code,
+            length=response.headers.get("Content-Length"), etag=response.headers.get("ETag"),
+            last_modified=response.headers.get("Last-Modified"),
+        )
+        if response.status_code not in (200, 206):
+            return False
+        if "html" in response.headers.get("Content-Type", "").lower():
+            # An error page served with status 200
+            return False
+        if head is not None:
+            return head.startswith(b"PK\x03\x04") or looks_like_csv(head)[0]
+        return response.headers.get("Content-Length") != "0"
+
+    def fetch(self, exchange, date_obj):
+        with self.metrics.stage("fetch", exchange, date_obj.strftime("%Y-%m-%d")) as stats:
+            source = self._fetch(exchange, date_obj, stats)
+            if isinstance(source, (bytes, bytearray)):
+                stats["bytes_in"] = len(source)
+            elif source is not None:
+                stats["bytes_in"] = os.path.getsize(source)
+        self.metrics.count(f"cache_{stats['cache']}", exchange)
+        if stats.get("attempts", 0) > 1:
+            self.metrics.count("retries", exchange, stats["attempts"] - 1)
+        return source
+
+    def _fetch(self, exchange, date_obj, stats):
+        adapter = self.adapters[exchange]
+        filename = adapter.filename(date_obj)
+        url = adapter.url(date_obj)
+
+        cache = self.manifests[exchange]
+        status = cache.lookup(filename)
+        stats["cache"] = {HIT: "hit", MISSING: "negative"}.get(status, "miss")
+        if status == HIT:
+            print(f"{exchange}: Using cached file: {filename}")
+            return cache.file_path(filename)
+        if status == MISSING:
+            print(f"{exchange}: {filename} is known to be unavailable (negative cache). Skipping...")
+            return None
+
+        try:
+            content = self.download(url, headers=adapter.headers, stats=stats)
+        except FileNotPublished as e:
+            print(f"{exchange}: {filename} not published ({e}). Skipping...")
+            cache.mark_missing(filename, self.negative_ttl(date_obj), str(e))
+            return None
+        if not content:
+            print(f"{exchange}: Failed to download {filename} from {url}. Skipping...")
+            return None
+        ok, reason = cache.validator(content)
+        if not ok:
+            # e.g. an HTML error page served with status 200
+            print(f"{exchange}: Downloaded {filename} is not usable ({reason}). Skipping...")
+            cache.mark_missing(filename, self.negative_ttl(date_obj), reason)
+            return None
+        # Handed to the parser as bytes; the cache copy is written afterwards
+        return content
+
+    def parse(self, exchange, date_obj, source, ingest=False):
+        """Aggregate a cached file (path) or a fresh download (bytes); with
+        `ingest`, the same read writes the day to the contract store."""
+        iso_date = date_obj.strftime("%Y-%m-%d")
+        filename = self.adapters[exchange].filename(date_obj)
+        index = self.archive_index(exchange, filename, source)
+
+        print(f"\n{exchange}: Processing {iso_date}...")
+
+        # Sized up front: a file that fails to parse is moved to quarantine
+        size = len(source) if isinstance(source, (bytes, bytearray)) else os.path.getsize(source)
+        stats = {}
+        start = time.perf_counter()
+        try:
+            if ingest:
+                aggregator = self.aggregate_and_ingest(exchange, date_obj, source, stats, index)
+            else:
+                aggregator = self.adapters[exchange].aggregate(
+                    source, date_obj, self.profile.metrics[exchange], fast=self.fast, stats=stats, index=index
+                )
+        except KeyError as e:
+            # The archive is fine, the exchange just did not include the member
+            print(f"{exchange}: {e.args[0]}. Skipping...")
+            self.empty_files.add((exchange, iso_date))
+            self.mark_parsed(exchange, filename, source, True, "options member missing")
+            return None
+        except Exception as e:
+            print(f"{exchange}: Error processing {filename}: {e}")
+            self.mark_parsed(exchange, filename, source, False, str(e))
+            return None
+        finally:
+            self.metrics.parse_pass(exchange, iso_date, time.perf_counter() - start, size, stats)
+        return self.report_metrics(exchange, iso_date, filename, source, aggregator)
+
+    def aggregate_and_ingest(self, exchange, date_obj, source, stats, index):
+        # One read feeds the metrics, the contract store and the series index
+        iso_date = date_obj.strftime("%Y-%m-%d")
+        adapter = self.adapters[exchange]
+        metrics = self.profile.metrics[exchange]
+        series = self.day_series(exchange, iso_date)
+        try:
+            aggregator, rows = adapter.aggregate_and_ingest(
+                self.contract_store, source, date_obj, metrics, series, stats=stats, index=index
+            )
+        except KeyError:
+            raise
+        except Exception as e:
+            # The summary must not depend on the store: read the file again
+            # for the metrics alone (a bad file fails there as well)
+            print(f"{exchange}: Error storing contract rows for {iso_date}: {e}")
+            stats.clear()
+            return adapter.aggregate(source, date_obj, metrics, fast=self.fast, stats=stats, index=index)
+        self.metrics.count("contract_rows", exchange, rows)
+        print(f"{exchange}: {iso_date}: stored {rows} contract rows")
+        self._archived.append((exchange, adapter.filename(date_obj)))
+        if series is not None:
+            self.add_series(exchange, iso_date, series)
+        return aggregator
+
+    def archive_index(self, exchange, filename, source):
+        # Cached files only; a fresh download is indexed when it is cached
+        if isinstance(source, (bytes, bytearray)):
+            return None
+        return self.manifests[exchange].archive_index(filename)
+
+    def report_metrics(self, exchange, iso_date, filename, source, aggregator):
+        metrics = aggregator.result()
+        missing = aggregator.missing_columns()
+        if missing:
+            print(f"{exchange}: Columns {missing} not found in {filename}")
+        self.mark_parsed(exchange, filename, source, True, f"missing {missing}" if missing else "")
+        print(f"{exchange}: {iso_date}: {metrics[self.profile.headline[exchange]]} total {LABELS[exchange]}")
+        return metrics
+
+    def mark_parsed(self, exchange, filename, source, ok, detail=""):
+        if isinstance(source, (bytes, bytearray)):
+            self.cache_later(exchange, filename, source, ok, detail)
+        else:
+            self.manifests[exchange].mark_parsed(filename, ok, detail)
+
+    def cache_later(self, exchange, filename, data, ok, detail):
+        # Already parsed from memory, so the disk write is off the critical
+        # path: one background thread, drained at the end of collect()
+        if not self.cache_downloads:
+            return
+        if self._writer is None:
+            from concurrent.futures import ThreadPoolExecutor
+
+            self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="cache-write")
+        self._writes.append(self._writer.submit(self._write_cache, exchange, filename, data, ok, detail))
+
+    def _write_cache(self, exchange, filename, data, ok, detail):
+        cache = self.manifests[exchange]
+        with self.metrics.stage("cache_write", exchange, filename=filename, bytes_in=len(data)) as stats:
+            cache.store(filename, data, validate=False)
+            stats["bytes_out"] = os.path.getsize(cache.file_path(filename))
+        # A file that failed to parse goes straight to quarantine, as before
+        cache.mark_parsed(filename, ok, detail)
+
+    def flush_cache_writes(self):
+        for future in self._writes:
+            try:
+                future.result()
+            except Exception as e:
+                print(f"⚠️ Warning: could not write a download to the cache: {e}")
+        self._writes = []
+        if self._writer is not None:
+            self._writer.shutdown(wait=True)
+            self._writer = None
+        # Only now do fresh downloads have a manifest entry to flag
+        for exchange, filename in self._archived:
+            self.manifests[exchange].mark_archived(filename)
+        self._archived = []
+        self.flush_manifests()
+
+    def flush_manifests(self):
+        # Manifest changes are batched in memory: one write per run (or batch)
+        for cache in (self._manifests or {}).values():
+            cache.flush()
+
+    def trim_caches(self):
+        max_age = config.CACHE_MAX_AGE_DAYS and config.CACHE_MAX_AGE_DAYS * 24 * 3600
+        for exchange, cache in self.manifests.items():
+            evicted, freed = cache.enforce_limits(config.CACHE_MAX_BYTES, max_age)
+            if evicted:
+                print(f"{exchange}: evicted {evicted} cached files ({freed / 1e6:.1f} MB) to stay within the cache limits")
+
+    def can_ingest(self):
+        """Whether contract ingestion is on; it is turned off without pyarrow."""
+        if self.ingest_contracts:
+            try:
+                from .contract_store import _pa
+
+                _pa()
+            except ImportError as e:
+                print(f"⚠️ Warning: {e}. Contract ingestion disabled for this run.")
+                self.ingest_contracts = False
+        return self.ingest_contracts
+
+    def day_series(self, exchange, iso_date):
+        # Shards run side by side, so their days are indexed by the merge
+        if self.index_series and self.shard is None and not self.series_index.has_day(exchange, iso_date):
+            from .series_index import DaySeries
+
+            return DaySeries(self.adapters[exchange].expiry_format)
+        return None
+
+    def ingest(self, exchange, date_obj, source):
+        iso_date = date_obj.strftime("%Y-%m-%d")
+        adapter = self.adapters[exchange]
+        series = self.day_series(exchange, iso_date)
+        try:
+            with self.metrics.stage("ingest", exchange, iso_date) as stats:
+                rows = stats["rows"] = adapter.ingest(
+                    self.contract_store, source, date_obj, series,
+                    index=self.archive_index(exchange, adapter.filename(date_obj), source),
+                )
+            print(f"{exchange}: {iso_date}: stored {rows} contract rows")
+            self._archived.append((exchange, adapter.filename(date_obj)))
+            if series is not None:
+                self.add_series(exchange, iso_date, series)
+        except ImportError as e:
+            print(f"⚠️ Warning: {e}. Contract ingestion disabled for this run.")
+            self.ingest_contracts = False
+        except Exception as e:
+            print(f"{exchange}: Error storing contract rows for {iso_date}: {e}")
+
+    def add_series(self, exchange, iso_date, series):
+        try:
+            with self.metrics.stage("series", exchange, iso_date) as stats:
+                stats["rows"] = self.series_index.add_day(exchange, iso_date, series.frame())
+        except Exception as e:
+            print(f"{exchange}: Error indexing series for {iso_date}: {e}")
+
+    def update_series(self):
+        """Index contract-store days the series index does not hold yet."""
+        from .series_index import KEY_COLUMNS, VALUE_COLUMNS, DaySeries
+
+        added = 0
+        for date_obj, exchanges in self.trading_days():
+            iso_date = date_obj.strftime("%Y-%m-%d")
+            for exchange in exchanges:
+                if self.series_index.has_day(exchange, iso_date) or not self.contract_store.has_day(exchange, iso_date):
+                    continue
+                series = DaySeries()
+                series.add(self.contract_store.scan(KEY_COLUMNS + VALUE_COLUMNS, iso_date, iso_date, exchange))
+                self.add_series(exchange, iso_date, series)
+                added += 1
+        return added
+
+    def collect(self, dates, exchanges_open):
+        """Fetch, parse (and ingest) `dates`; returns {date: {exchange: metrics}}."""
+        self.manifests  # open every manifest before the fetch threads start
+
+        # Downloads run concurrently (bounded per exchange, rate limited per host);
+        # each file is parsed on this thread as soon as its download completes.
+        fetch_jobs = [
+            (exchange, date_obj, partial(self.fetch, exchange, date_obj))
+            for date_obj in dates
+            for exchange in self.exchanges
+            if exchange in exchanges_open[date_obj]
+        ]
+        # A fetch yields the cached file's path, or the downloaded bytes which
+        # are parsed (and ingested) straight from memory.
+        totals = {date_obj: {} for date_obj in dates}
+        # The fused pass reads only in chunks; the full-read reference mode
+        # (fast=False) still ingests with a second read
+        fused = self.fast and self.can_ingest()
+        try:
+            for exchange, date_obj, source in iter_fetched(fetch_jobs, self.concurrency):
+                if source is None:
+                    continue
+                metrics = totals[date_obj][exchange] = self.parse(exchange, date_obj, source, ingest=fused)
+                if self.ingest_contracts and not fused and metrics is not None:
+                    self.ingest(exchange, date_obj, source)
+                self.metrics.day(exchange, date_obj.strftime("%Y-%m-%d"), ok=metrics is not None)
+        finally:
+            self.flush_cache_writes()
+        if self.shard is None:
+            # Shards share the cache directory: only the merge step evicts
+            self.trim_caches()
+        return totals
+
+    def write_summary(self, store, rows, compact=False):
+        with self.metrics.stage("write") as stats:
+            if compact:
+                stats["rows"] = store.append(rows)
+                store.compact()
+            else:
+                stats["rows"] = store.upsert(rows)
+            stats["file_bytes"] = os.path.getsize(store.path) if os.path.exists(store.path) else 0
+        if config.ANALYTICS and store.path == self.output:
+            self.update_analytics()
+
+    @property
+    def analytics(self):
+        from .analytics import SummaryAnalytics
+
+        return SummaryAnalytics(
+            self.output, list(self.profile.headline.values()),
+            windows=config.ANALYTICS_WINDOWS, span=config.ANALYTICS_EWMA_SPAN,
+            z_window=config.ANALYTICS_Z_WINDOW, z_threshold=config.ANALYTICS_Z_THRESHOLD,
+        )
+
+    def update_analytics(self):
+        try:
+            with self.metrics.stage("analytics") as stats:
+                stats["rows"] = self.analytics.update()
+        except Exception as e:
+            # Derived data: never worth failing the run over
+            print(f"⚠️ Warning: could not update the analytics for {self.output}: {e}")
+
+    def report_sessions(self):
+        if self._sessions is None:
+            return
+        for exchange, counters in self._sessions.counters().items():
+            print(f"{exchange} HTTP: {counters['requests']} requests, {counters['warmups']} cookie warm-ups, "
+                  f"{counters['handshakes']} new connections, {counters['reused']} reused")
+        for host, stats in self.rate_limits.report().items():
+            rate = "unlimited" if stats["rate"] == float("inf") else f"{stats['rate']:.2f} req/s"
+            print(f"{host}: {rate} at the end, {stats['throttled']} throttled, "
+                  f"{stats['errors']} errors, {stats['pauses']} pauses, {stats['retries_denied']} retries denied")
+        self._sessions.close()
+
+    def report_stages(self):
+        if not self.metrics.stages:
+            return
+        print("\nStage summary:")
+        print(self.metrics.summary())
+        if self.metrics.path:
+            print(f"Per-stage metrics appended to {self.metrics.path}")
+
+    # ---- modes ----
+
+    def run_daily(self):
+        # Usually at most one new day: the watermarks answer "anything due?"
+        # without reading the summary or importing pandas/numpy/requests
+        check_coverage(self.exchanges, self.start, self.end, fallback=True)
+        state = Watermarks(self.output)
+        store = None
+        pending = self.plan_from_watermarks(state)
+        if pending is None:
+            store = self.open_summary()
+            pending = self.plan_from_summary(store)
+        if state.gaps is None and os.path.exists(self.output):
+            store = store or self.open_summary()
+            self.seed_gaps(state, store)
+        retries = self.plan_retries(state, pending)
+
+        if not pending and not retries:
+            if store is not None:
+                self.advance_watermarks(state)
+            print("\n✅ No new data to update.")
+            print("\nProcess completed.")
+            return
+
+        store = store or self.open_summary()
+        if retries:
+            cells = sum(len(exchanges) for exchanges in retries.values())
+            print(f"Retrying {cells} missing (date, exchange) cells on {len(retries)} days")
+
+        # New days and retried cells are fetched in one concurrent batch
+        work = dict(sorted({**pending, **retries}.items()))
+        rows = self.summary_rows(work, retries, state)
+
+        # Retried dates already have a row: only the newly filled cells change
+        self.write_summary(store, rows)
+        self.advance_watermarks(state)
+        print(f"\n✅ Updated {self.output} with {len(pending)} new entries and "
+              f"{len(rows) - len(pending)} filled gaps.")
+        self.report_sessions()
+
+    def run_poll(self, interval=None, until=None, window=None):
+        # Same-evening run: every due (date, exchange) file up to today is
+        # fetched as soon as the exchange publishes it. Until then it is only
+        # probed, so waiting costs no downloads, retries or negative-cache
+        # entries; what is still missing at the deadline becomes a gap.
+        # With a `window` (minutes) the run stops early; what it leaves is a
+        # gap the next run picks up, not yet counted as a failed attempt.
+        interval = interval or config.POLL_INTERVAL
+        window = window or config.POLL_WINDOW
+        hour, minute = until or config.POLL_UNTIL
+        now = datetime.now(config.IST)
+        cutoff = now.replace(hour=hour, minute=minute, second=0, microsecond=0).timestamp()
+        deadline = min(cutoff, now.timestamp() + window * 60) if window else cutoff
+
+        check_coverage(self.exchanges, self.start, self.end, fallback=True)
+        state = Watermarks(self.output)
+        store = self.open_summary()
+        if state.gaps is None and os.path.exists(self.output):
+            self.seed_gaps(state, store)
+        pending = self.plan_from_watermarks(state)
+        if pending is None:
+            pending = self.plan_from_summary(store)
+        retries = self.plan_retries(state, pending)
+        waiting = sorted(
+            (date_obj, exchange) for date_obj, exchanges in {**pending, **retries}.items() for exchange in exchanges
+        )
+        waiting = self.poll(store, state, waiting, interval, deadline)
+
+        # Still missing at the deadline: an empty row now, a gap for later runs
+        final = deadline >= cutoff
+        self.record_unpublished(store, state, waiting, final)
+        self.flush_manifests()
+        self.advance_watermarks(state)
+        if waiting and final:
+            print(f"\n⚠️ Warning: {len(waiting)} files were not published by "
+                  f"{hour:02d}:{minute:02d} IST; the next run retries them.")
+        elif waiting:
+            print(f"\n{len(waiting)} files not published within the {window:.0f}-minute window; "
+                  f"the next run keeps polling for them until {hour:02d}:{minute:02d} IST.")
+        else:
+            print(f"\n✅ {self.output} is up to date to {self.end.strftime('%Y-%m-%d')}.")
+        self.report_sessions()
+
+    def poll(self, store, state, waiting, interval, deadline):
+        """Probe the `waiting` (date, exchange) cells every `interval` seconds,
+        fetching each as it is published; returns those still missing at the
+        deadline."""
+        while waiting:
+            ready = self.published(waiting)
+            if ready:
+                self.fetch_ready(store, state, ready)
+                waiting = [cell for cell in waiting if cell not in ready]
+            if not waiting or time.time() + interval > deadline:
+                break
+            labels = ", ".join(f"{exchange} {date_obj.strftime('%Y-%m-%d')}" for date_obj, exchange in waiting)
+            print(f"\nNot published yet: {labels}. Checking again in {interval:.0f}s...")
+            time.sleep(interval)
+        return waiting
+
+    def published(self, waiting):
+        # Older days are not waited for: their fetch records them as usual
+        return [
+            (date_obj, exchange) for date_obj, exchange in waiting
+            if (self.end - date_obj).days >= config.RECENT_DAYS
+            or self.manifests[exchange].lookup(self.adapters[exchange].filename(date_obj)) == HIT
+            or self.probe(exchange, date_obj)
+        ]
+
+    def fetch_ready(self, store, state, ready):
+        work = {}
+        for date_obj, exchange in ready:
+            work.setdefault(date_obj, []).append(exchange)
+        # Days that already have a row only get their new cells filled in
+        filling = {d: e for d, e in work.items() if d.strftime("%Y-%m-%d") in store}
+        self.write_summary(store, self.summary_rows(work, filling, state))
+        state.save()
+
+    def record_unpublished(self, store, state, waiting, final):
+        for date_obj, exchange in waiting:
+            if final:
+                state.add_gap(exchange, date_obj.strftime("%Y-%m-%d"), "not published by the poll deadline")
+            else:
+                state.add_gap(exchange, date_obj.strftime("%Y-%m-%d"), "not published yet", attempts=0)
+        empty = sorted({date_obj.strftime("%Y-%m-%d") for date_obj, _ in waiting} - store.dates)
+        if empty:
+            self.write_summary(store, [{"Date": iso_date} for iso_date in empty])
+
+    def summary_rows(self, work, retries, state):
+        """Collect `work` ({date: exchanges}) and turn it into summary rows,
+        recording each cell's outcome in `state`."""
+        totals = self.collect(list(work), work)
+        rows = []
+        for date_obj, exchanges in work.items():
+            iso_date = date_obj.strftime("%Y-%m-%d")
+            row = {"Date": iso_date}
+            for exchange in exchanges:
+                metrics = totals[date_obj].get(exchange)
+                self.record_outcome(state, exchange, date_obj, metrics)
+                row.update(metrics or {})
+            if date_obj in retries:
+                if len(row) == 1:
+                    continue
+                filled = [exchange for exchange in exchanges if totals[date_obj].get(exchange) is not None]
+                print(f"\n✅ {iso_date}: filled {', '.join(filled)}")
+            else:
+                echoed = " ".join(
+                    f"{exchange.lower()}_total {row.get(self.profile.headline[exchange])}"
+                    for exchange in self.exchanges
+                )
+                print(f"\n✅ {iso_date}: {echoed}")
+            rows.append(row)
+        return rows
+
+    def shard_path(self, index, shards):
+        return os.path.join(self.output + SHARD_SUFFIX, f"{index}-of-{shards}.csv")
+
+    def shard_days(self, index, shards):
+        """The shard's share of the trading days. Days are dealt out by date
+        ordinal, so the split is the same on every machine and run."""
+        return [(date_obj, exchanges) for date_obj, exchanges in self.trading_days()
+                if date_obj.toordinal() % shards == index]
+
+    def run_backfill(self, shards=1, shard_index=None, workers=None):
+        # One shard here (e.g. a CI matrix job), or all of them in worker
+        # processes followed by the merge into the summary
+        if shard_index is not None:
+            self.run_shard(shard_index, shards)
+            return
+        from concurrent.futures import ProcessPoolExecutor
+
+        # Everything but the rate limits, which each shard scales for itself;
+        # sessions and metrics are rebuilt in the worker from their settings
+        options = {
+            "profile": self.profile, "output": self.output, "start": self.start, "end": self.end,
+            "adapters": self.adapters, "sessions": self._sessions, "concurrency": self.concurrency,
+            "retries": self.retries, "timeout": self.timeout, "backoff": self.backoff, "fast": self.fast,
+            "ingest": self.ingest_contracts, "contract_dir": self.contract_dir, "cache": self.cache_downloads,
+            "metrics": self.metrics, "series": self.index_series, "series_dir": self.series_dir,
+        }
+        workers = min(workers or shards, shards)
+        print(f"\nBackfilling {self.start.strftime('%Y-%m-%d')} to {self.end.strftime('%Y-%m-%d')} "
+              f"in {shards} shards on {workers} worker processes...")
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(backfill_shard, options, index, shards): index for index in range(shards)}
+            for future, index in futures.items():
+                try:
+                    future.result()
+                except Exception as e:
+                    # Its checkpoints are merged below; rerun to finish it
+                    print(f"⚠️ Warning: shard {index} stopped early: {e}")
+        self.run_merge(shards)
+
+    def run_shard(self, index, shards):
+        if not 0 <= index < shards:
+            raise ValueError(f"shard index {index} is outside 0..{shards - 1}")
+        self.shard = (index, shards)
+        path = self.shard_path(index, shards)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        store = self.open_summary(path)
+        state = Watermarks(path)
+
+        days = self.shard_days(index, shards)
+        pending = {date_obj: exchanges for date_obj, exchanges in days if date_obj.strftime("%Y-%m-%d") not in store}
+        retries = {date_obj: exchanges for date_obj, exchanges in self.plan_retries(state, pending).items()
+                   if date_obj.toordinal() % shards == index}
+        work = sorted({**pending, **retries}.items())
+        print(f"\nShard {index} of {shards}: {len(days)} trading days, {len(days) - len(pending)} already done, "
+              f"{len(retries)} with gaps to retry")
+
+        # Checkpoint after every batch: the rows go to the shard's summary and
+        # the failed cells to its gap list, so a restart resumes from here
+        batch_days = config.BACKFILL_BATCH_DAYS
+        for offset in range(0, len(work), batch_days):
+            batch = dict(work[offset:offset + batch_days])
+            rows = self.summary_rows(batch, {d: e for d, e in batch.items() if d in retries}, state)
+            self.write_summary(store, rows)
+            state.save()
+            print(f"\n✅ Shard {index} of {shards}: {min(offset + batch_days, len(work))}/{len(work)} days done")
+        self.report_sessions()
+
+    def run_merge(self, shards):
+        # Fold every shard's rows, gaps and cache manifest into the main ones
+        store = self.open_summary()
+        state = Watermarks(self.output)
+        if state.gaps is None and os.path.exists(self.output):
+            self.seed_gaps(state, store)
+        outputs = self.load_shards(shards)
+        for path, shard_rows, _ in outputs:
+            self.merge_shard_gaps(state, path, shard_rows)
+        self.merge_shard_manifests(shards)
+        rows = self.merge_shard_rows(store, [row for _, shard_rows, _ in outputs for row in shard_rows])
+        self.merge_watermarks(state, store)
+        state.save()
+        # Finished shards are in the summary now; unfinished ones are kept so
+        # rerunning the backfill resumes them
+        self.remove_shards([path for path, _, finished in outputs if finished])
+        if self.ingest_contracts and self.index_series:
+            self.update_series()
+        self.trim_caches()
+        print(f"\n✅ Merged {len(rows)} days from {shards} shards into {self.output}.")
+
+    def load_shards(self, shards):
+        """[(path, rows, finished)] for every shard that wrote an output;
+        a finished shard holds a row for each of its days."""
+        outputs = []
+        for index in range(shards):
+            path = self.shard_path(index, shards)
+            if not os.path.exists(path):
+                print(f"⚠️ Warning: shard {index} of {shards} has no output at {path}")
+                continue
+            shard_store = self.open_summary(path)
+            finished = all(date_obj.strftime("%Y-%m-%d") in shard_store for date_obj, _ in self.shard_days(index, shards))
+            outputs.append((path, shard_store.read_rows(), finished))
+        return outputs
+
+    def merge_shard_gaps(self, state, path, shard_rows):
+        # Cells a shard filled close the main gaps; the ones it missed open them
+        for row in shard_rows:
+            for exchange in self.exchanges:
+                if any(row.get(column) for column in output_columns(self.profile.metrics[exchange])):
+                    state.fill_gap(exchange, row["Date"][:10])
+        for exchange, gaps in (Watermarks(path).gaps or {}).items():
+            for iso_date, gap in gaps.items():
+                state.add_gap(exchange, iso_date, gap["reason"], gap["retry_after"], gap.get("attempts", 1))
+
+    def merge_shard_rows(self, store, rows):
+        # Shards are dealt out round-robin: put the rows back in date order
+        rows.sort(key=lambda row: row["Date"])
+        self.write_summary(store, rows, compact=True)
+        return rows
+
+    def merge_shard_manifests(self, shards):
+        for exchange, adapter in self.adapters.items():
+            for index in range(shards):
+                shard_manifest = os.path.join(adapter.cache_dir, shard_manifest_name(index, shards))
+                if os.path.exists(shard_manifest):
+                    self.manifests[exchange].merge(shard_manifest)
+                    os.remove(shard_manifest)
+
+    def remove_shards(self, paths):
+        for path in paths:
+            for shard_file in (path, path + INDEX_SUFFIX, path + WATERMARK_SUFFIX):
+                if os.path.exists(shard_file):
+                    os.remove(shard_file)
+        shard_dir = self.output + SHARD_SUFFIX
+        if os.path.isdir(shard_dir) and not os.listdir(shard_dir):
+            os.rmdir(shard_dir)
+
+    def merge_watermarks(self, state, store):
+        """Advance each exchange's mark over the unbroken run of its trading
+        days that the summary now holds (a row, possibly with gaps)."""
+        marks = {}
+        for exchange in self.exchanges:
+            for date_obj in trading_dates(exchange, self.start, self.end):
+                iso_date = date_obj.strftime("%Y-%m-%d")
+                if iso_date not in store:
+                    break
+                marks[exchange] = iso_date
+        state.advance(marks, self.start.strftime("%Y-%m-%d"), self.summary_columns)
+
+    def run_total(self):
+        # Grand total over the whole range, without touching any summary CSV
+        days = self.trading_days()
+        totals = self.collect([date_obj for date_obj, _ in days], dict(days))
+        for exchange in self.exchanges:
+            headline = self.profile.headline[exchange]
+            total = sum((day.get(exchange) or {}).get(headline) or 0 for day in totals.values())
+            print(f"\n✅ Total {LABELS[exchange]} on {exchange} from {self.start.strftime('%d-%b-%Y')} "
+                  f"to {self.end.strftime('%d-%b-%Y')}: {total}")
+        self.report_sessions()
+
+    def run_rebuild(self, workers=None):
+        # Re-aggregate every cached day on all cores; network is never touched.
+        from concurrent.futures import ProcessPoolExecutor
+
+        jobs = []
+        rows = {}
+        for date_obj, exchanges in self.trading_days():
+            for exchange in exchanges:
+                adapter = self.adapters[exchange]
+                iso_date = date_obj.strftime("%Y-%m-%d")
+                # Only files that pass the manifest check; corrupt ones get quarantined here
+                filename = adapter.filename(date_obj)
+                if self.manifests[exchange].lookup(filename) != HIT:
+                    continue
+                index = self.manifests[exchange].archive_index(filename)
+                if index is not None and index["member"] is None:
+                    # The archive index already says there is nothing to parse
+                    self.manifests[exchange].mark_parsed(filename, True, "options member missing")
+                    rows.setdefault(iso_date, {"Date": iso_date})
+                    continue
+                jobs.append((exchange, iso_date, filename, self.manifests[exchange].file_path(filename), index))
+
+        if not jobs:
+            self.flush_manifests()
+            print("\n✅ No cached files to rebuild from.")
+            return
+
+        workers = workers or os.cpu_count() or 1
+        print(f"\nRebuilding {len(jobs)} cached files with {workers} worker processes...")
+        exchanges, dates, _, paths, indexes = zip(*jobs)
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(
+                aggregate_cached_file,
+                [self.adapters[e] for e in exchanges], dates, paths,
+                [self.profile.metrics[e] for e in exchanges], [self.fast] * len(jobs), indexes,
+                chunksize=max(1, len(jobs) // (workers * 4)),
+            ))
+
+        for (exchange, iso_date, filename, _, _), (metrics, error) in zip(jobs, results):
+            if error:
+                print(f"{iso_date}: Error during rebuild: {exchange}: {error}")
+            self.manifests[exchange].mark_parsed(filename, error is None, error or "")
+            rows.setdefault(iso_date, {"Date": iso_date}).update(metrics or {})
+        self.flush_manifests()
+
+        # Rebuilt rows are appended and compaction folds them over the old ones;
+        # dates without cached files keep their existing values
+        store = self.open_summary()
+        self.write_summary(store, rows.values(), compact=True)
+        print(f"\n✅ Rebuilt {len(rows)} days into {self.output}.")
+
+    def run_analytics(self, period=None):
+        from .analytics import resample
+
+        analytics = self.analytics
+        rows = analytics.update()
+        frame = analytics.read_frame()
+        print(f"\n✅ {analytics.path}: {len(frame)} days, {rows} computed in this run.")
+        spikes = frame[frame.filter(like="_spike").any(axis=1)]
+        for _, row in spikes.tail(10).iterrows():
+            flagged = [c[:-len("_spike")] for c in frame.columns if c.endswith("_spike") and row[c]]
+            print(f"Spike on {row['Date'].strftime('%Y-%m-%d')}: {', '.join(flagged)}")
+        if period:
+            import pandas as pd
+
+            summary = latest_cells(pd.read_csv(self.output, dtype={"Date": str}))
+            table = resample(summary, analytics.columns, period)
+            print(table.to_string())
+
+    def run_series(self, symbol, instrument=None, expiry=None, by_contract=False):
+        # One underlying's history straight from the series index
+        index = self.series_index
+        started = time.perf_counter()
+        if by_contract:
+            frame = index.history(symbol, instrument=instrument, expiry=expiry)
+        else:
+            frame = index.daily(symbol, instrument=instrument, expiry=expiry)
+        elapsed = time.perf_counter() - started
+        frame = frame[frame["exchange"].isin(self.exchanges)]
+        frame = frame[(frame["date"] >= self.start) & (frame["date"] <= self.end)] if len(frame) else frame
+        if frame.empty:
+            print(f"\nNo series for {symbol} in {self.series_dir} (run ingest to build it).")
+            return
+        print(frame.to_string(index=False))
+        print(f"\n✅ {symbol}: {len(frame)} rows read in {elapsed * 1000:.1f} ms.")
+
+    def query_tables(self, extra=()):
+        """One SummaryTable per profile summary (this run's --output for its
+        own profile), plus `extra` (name, path) pairs such as older CSVs."""
+        from .query_service import SummaryTable
+
+        tables = []
+        for name, profile in PROFILES.items():
+            path = self.output if profile is self.profile else profile.output
+            columns = {exchange: output_columns(profile.metrics[exchange]) for exchange in profile.exchanges}
+            tables.append(SummaryTable(name, path, columns))
+        tables += [SummaryTable(name, path) for name, path in extra]
+        return tables
+
+    def run_serve(self, host=config.QUERY_HOST, port=config.QUERY_PORT, extra=()):
+        from .query_service import QueryService, make_server
+
+        service = QueryService(self.query_tables(extra), cache_size=config.QUERY_CACHE_SIZE)
+        for table in service.tables.values():
+            table.refresh()
+            info = table.describe()
+            print(f"{table.name}: {table.path} ({info['days']} days)")
+        server = make_server(service, host, port)
+        print(f"\n✅ Serving the summaries read-only on http://{host}:{port}/ (Ctrl+C to stop)")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+            print(f"Result cache: {service.cache.stats()}")
+
+    def run_compact(self):
+        store = self.open_summary()
+        store.compact(columns=self.summary_columns)
+        print(f"\n✅ Compacted {self.output}: {len(store.dates)} dates.")
+
+    def run_ingest(self):
+        # Backfill the contract store from cached files it does not hold yet
+        for date_obj, exchanges in self.trading_days():
+            iso_date = date_obj.strftime("%Y-%m-%d")
+            for exchange in exchanges:
+                if not self.ingest_contracts:
+                    self.flush_manifests()
+                    return
+                filename = self.adapters[exchange].filename(date_obj)
+                cache = self.manifests[exchange]
+                if not self.contract_store.has_day(exchange, iso_date) and cache.lookup(filename) == HIT:
+                    self.ingest(exchange, date_obj, cache.file_path(filename))
+        self.flush_cache_writes()
+        if self.ingest_contracts and self.index_series:
+            # Days stored before the index existed (or by backfill shards)
+            self.update_series()
+        print(f"\n✅ Contract store at {self.contract_dir} is up to date.")
+
+    def state_paths(self, include_cache=False, include_contracts=False):
+        """Files (and directories) that make up this pipeline's resumable state."""
+        from .analytics import ANALYTICS_SUFFIX, STATE_SUFFIX
+
+        paths = [self.output, self.output + INDEX_SUFFIX, self.output + WATERMARK_SUFFIX,
+                 self.output + ANALYTICS_SUFFIX, self.output + STATE_SUFFIX]
+        for adapter in self.adapters.values():
+            paths.append(os.path.join(adapter.cache_dir, MANIFEST_NAME))
+            if include_cache:
+                paths.append(os.path.join(adapter.cache_dir, OBJECTS_DIR))
+        if include_contracts:
+            paths += [self.contract_dir, self.series_dir]
+        return paths
+
+    def run_export(self, snapshot_path, include_cache=False, include_contracts=False):
+        from .snapshot import export_snapshot
+
+        archived = export_snapshot(self.state_paths(include_cache, include_contracts), snapshot_path)
+        size = os.path.getsize(snapshot_path)
+        print(f"\n✅ Saved {len(archived)} state paths to {snapshot_path} ({size / 1e6:.2f} MB).")
+
+    def run_import(self, snapshot_path, force=False):
+        from .snapshot import import_snapshot
+
+        if not os.path.exists(snapshot_path):
+            print(f"\n✅ No state snapshot at {snapshot_path}; starting from scratch.")
+            return
+        restored, kept = import_snapshot(snapshot_path, force=force)
+        for path in kept:
+            print(f"Keeping local {path} (use --force to overwrite it from the snapshot)")
+        print(f"\n✅ Restored {len(restored)} files from {snapshot_path}.")
+
+
+def backfill_shard(options, index, shards):
+    """Process-pool job: run one backfill shard in a pipeline of its own."""
+    # Every shard paces itself, so together they keep the configured spacing
+    intervals = {host: interval * shards for host, interval in config.HOST_MIN_INTERVAL.items()}
+    pipeline = Pipeline(rate_limits=HostRateLimits(intervals), **options)
+    try:
+        pipeline.run_backfill(shards, index)
+    finally:
+        pipeline.metrics.close()
@@ -0,0 +1,280 @@
+import bisect
+import csv
+import json
+import math
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ----------------- READ-ONLY QUERY SERVICE ------------------
+# Serves the summary CSVs over local HTTP/JSON so other tools stop copying
+# and re-parsing them:
+#
+#   GET /tables                                   names, columns, date range
+#   GET /rows?table=combined&start=2025-06-02&end=2025-06-30
+#            [&exchange=NSE] [&columns=NSE_NO_OF_TRADE,...]
+#   GET /totals?...same filters...                column sums and day count
+#   GET /stats                                    result cache hits/misses
+#
+# Each table is held in memory as date-sorted rows, so a date range is two
+# bisects. Every request stats the CSV first: the pipeline only ever appends
+# (summary_store.py), so a bigger file with the same inode is caught up by
+# parsing just the new bytes, and anything else (compaction replaces the
+# file) reloads it. Responses are cached, already encoded, in an LRU keyed
+# by the query and the file version, so a pipeline write invalidates them.
+# Lookups never block on a reload: readers use the last complete snapshot.
+
+
+def _value(text):
+    if text == "":
+        return None
+    try:
+        number = float(text)
+    except ValueError:
+        return text
+    if not math.isfinite(number):
+        # "nan"/"inf" cells (a 0/0 ratio) have no JSON spelling
+        return None
+    # Counts are written as "30195324.0" by pandas; serve them as integers
+    return int(number) if number.is_integer() else number
+
+
+class SummaryTable:
+    """In-memory copy of one summary CSV, kept in step with the file."""
+
+    def __init__(self, name, path, exchange_columns=None, date_column="Date"):
+        self.name = name
+        self.path = path
+        # Exchange -> its columns, for the `exchange` filter
+        self.exchange_columns = exchange_columns or {}
+        self.date_column = date_column
+        self.version = None
+        # (columns, sorted dates, {date: [values]}), swapped whole on reload
+        self.snapshot = ([], [], {})
+        self._header = None
+        self._offset = 0
+        self._lock = threading.Lock()
+
+    def _stat(self):
+        try:
+            st = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return st.st_ino, st.st_size, st.st_mtime_ns
+
+    def refresh(self):
+        """Catch up with the file if it changed; returns the version now served."""
+        version = self._stat()
+        if version == self.version:
+            return version
+        with self._lock:
+            version = self._stat()
+            if version != self.version:
+                appended = (
+                    version is not None and self.version is not None and self._header
+                    and version[0] == self.version[0] and version[1] >= self._offset
+                )
+                self._load(self._offset if appended else 0, version)
+            return self.version
+
+    def _load(self, offset, version):
+        if version is None:
+            self.snapshot, self._header, self._offset, self.version = ([], [], {}), None, 0, None
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            data = f.read(version[1] - offset)
+        # A line the pipeline is still writing is picked up on a later request
+        end = data.rfind(b"\n") + 1
+        lines = data[:end].decode("utf-8").splitlines()
+        reader = csv.reader(lines)
+        if offset == 0:
+            self._header = next(reader, None)
+            columns, dates, rows = [], [], {}
+        else:
+            # Copies: readers may still hold the previous snapshot
+            columns, dates, rows = self.snapshot
+            dates, rows = list(dates), dict(rows)
+        header = self._header or []
+        if header:
+            date_index = header.index(self.date_column)
+            columns = [column for column in header if column != self.date_column]
+            sort = False
+            for record in reader:
+                if not record:
+                    continue
+                values = [_value(cell) for i, cell in enumerate(record) if i != date_index]
+                iso_date = record[date_index][:10]
+                if iso_date in rows:
+                    # Same merge as SummaryStore.compact: a later non-empty cell wins
+                    values = [new if new is not None else old for new, old in zip(values, rows[iso_date])]
+                else:
+                    sort = sort or (bool(dates) and iso_date < dates[-1])
+                    dates.append(iso_date)
+                rows[iso_date] = values
+            if sort:
+                dates.sort()
+        self.snapshot = (columns, dates, rows)
+        self._offset = offset + end
+        self.version = version
+
+    def select(self, start=None, end=None, columns=None):
+        """(columns, rows) for dates in [start, end]; each row is [date, *values]."""
+        all_columns, dates, rows = self.snapshot
+        columns = all_columns if columns is None else columns
+        unknown = [column for column in columns if column not in all_columns]
+        if unknown:
+            raise ValueError(f"{self.name}: unknown columns {unknown}")
+        positions = [all_columns.index(column) for column in columns]
+        lo = bisect.bisect_left(dates, start) if start else 0
+        hi = bisect.bisect_right(dates, end) if end else len(dates)
+        return columns, [[iso_date] + [rows[iso_date][i] for i in positions] for iso_date in dates[lo:hi]]
+
+    def describe(self):
+        columns, dates, _ = self.snapshot
+        return {
+            "name": self.name,
+            "path": self.path,
+            "columns": columns,
+            "exchanges": {exchange: cols for exchange, cols in self.exchange_columns.items()},
+            "days": len(dates),
+            "first_date": dates[0] if dates else None,
+            "last_date": dates[-1] if dates else None,
+        }
+
+
+class ResultCache:
+    """Thread-safe LRU of encoded responses."""
+
+    def __init__(self, size=256):
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            body = self._entries.get(key)
+            if body is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return body
+
+    def put(self, key, body):
+        with self._lock:
+            self._entries[key] = body
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.size:
+                self._entries.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"entries": len(self._entries), "size": self.size, "hits": self.hits, "misses": self.misses}
+
+
+class QueryError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _iso(text, name):
+    if not text:
+        return None
+    try:
+        return datetime.strptime(text[:10], "%Y-%m-%d").strftime("%Y-%m-%d")
+    except ValueError:
+        raise QueryError(400, f"{name}: expected YYYY-MM-DD, got {text!r}") from None
+
+
+class QueryService:
+    def __init__(self, tables, cache_size=256):
+        self.tables = {table.name: table for table in tables}
+        self.cache = ResultCache(cache_size)
+
+    def table(self, params):
+        name = params.get("table") or next(iter(self.tables), None)
+        table = self.tables.get(name)
+        if table is None:
+            raise QueryError(404, f"unknown table {name!r}; see /tables")
+        return table
+
+    def columns(self, table, params):
+        columns = params.get("columns")
+        columns = columns.split(",") if columns else None
+        exchange = params.get("exchange")
+        if exchange:
+            if exchange not in table.exchange_columns:
+                raise QueryError(400, f"{table.name}: no exchange {exchange!r}")
+            # Older summaries hold only some of the profile's columns
+            own = set(table.exchange_columns[exchange])
+            columns = [column for column in (columns or table.snapshot[0]) if column in own]
+        return columns
+
+    def handle(self, path, params):
+        """JSON body (bytes) for a GET; raises QueryError."""
+        if path == "/stats":
+            return json.dumps(self.cache.stats()).encode()
+        if path == "/tables":
+            for table in self.tables.values():
+                table.refresh()
+            return json.dumps([table.describe() for table in self.tables.values()]).encode()
+        if path not in ("/rows", "/totals"):
+            raise QueryError(404, f"unknown path {path}")
+
+        table = self.table(params)
+        key = (path, tuple(sorted(params.items())), table.name, table.refresh())
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+        try:
+            columns, rows = table.select(_iso(params.get("start"), "start"), _iso(params.get("end"), "end"),
+                                         self.columns(table, params))
+        except ValueError as e:
+            raise QueryError(400, str(e)) from None
+        if path == "/rows":
+            result = {"table": table.name, "columns": [table.date_column] + columns, "rows": rows}
+        else:
+            totals = {column: sum(row[i + 1] for row in rows if isinstance(row[i + 1], (int, float)))
+                      for i, column in enumerate(columns)}
+            result = {"table": table.name, "days": len(rows),
+                      "first_date": rows[0][0] if rows else None, "last_date": rows[-1][0] if rows else None,
+                      "totals": totals}
+        body = json.dumps(result, allow_nan=False).encode()
+        self.cache.put(key, body)
+        return body
+
+
+class QueryHandler(BaseHTTPRequestHandler):
+    # Keep-alive, so a client issuing many small queries reuses its connection
+    protocol_version = "HTTP/1.1"
+    service = None
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            status, body = 200, self.service.handle(url.path.rstrip("/") or "/tables", params)
+        except QueryError as e:
+            status, body = e.status, json.dumps({"error": str(e)}).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # one line per request would drown the terminal
+
+
+def make_server(service, host="127.0.0.1", port=8765):
+    handler = type("BoundQueryHandler", (QueryHandler,), {"service": service})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
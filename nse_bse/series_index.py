@@ -0,0 +1,236 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from .summary_store import atomic_write
+
+# ----------------- PER-UNDERLYING SERIES INDEX ------------------
+# Daily totals per (exchange, underlying, instrument type, expiry), kept as
+# fixed-width records in flat binary files so one underlying's whole history
+# is a few array slices instead of a scan over every bhavcopy:
+#
+#   meta.json        keys, indexed days, committed record counts
+#   base-<gen>.bin   records sorted by (key, day); base-<gen>.offsets.npy
+#                    holds each key's first record, so a key is one slice
+#   tail.bin         days appended since the last compaction, in day order
+#
+# Ingestion appends one day at a time to the tail (the same chunks that go
+# to the contract store are summed on the way through). Once the tail holds
+# COMPACT_RECORDS records it is merged into a new base generation; meta.json
+# is the commit point, and a torn tail append is truncated on open.
+
+RECORD = np.dtype([
+    ("key", "<i4"),
+    ("day", "<i4"),  # days since 1970-01-01
+    ("trades", "<i8"),
+    ("contracts", "<i8"),
+    ("open_interest", "<i8"),
+    ("turnover", "<f8"),
+    ("premium_turnover", "<f8"),
+])
+KEY_COLUMNS = ["symbol", "instrument", "expiry"]
+VALUE_COLUMNS = [name for name in RECORD.names if name not in ("key", "day")]
+COMPACT_RECORDS = 500_000
+META_NAME = "meta.json"
+TAIL_NAME = "tail.bin"
+
+
+class DaySeries:
+    """Sums one day's contract chunks per (symbol, instrument, expiry)."""
+
+    def __init__(self, expiry_format=None):
+        self.expiry_format = expiry_format
+        self._parts = []
+
+    def reset(self):
+        self._parts = []
+
+    def add(self, chunk):
+        keys = [column for column in KEY_COLUMNS if column in chunk.columns]
+        values = [column for column in VALUE_COLUMNS if column in chunk.columns]
+        if "symbol" not in keys or not values:
+            return
+        frame = chunk[keys + values].copy()
+        for column in values:
+            frame[column] = pd.to_numeric(frame[column], errors="coerce")
+        self._parts.append(frame.groupby(keys, observed=True, sort=False, dropna=False)[values].sum())
+
+    def frame(self):
+        """One row per key with every value column (missing ones as 0)."""
+        if not self._parts:
+            return pd.DataFrame(columns=KEY_COLUMNS + VALUE_COLUMNS)
+        parts = [part.reset_index() for part in self._parts]
+        frame = pd.concat(parts, ignore_index=True)
+        for column in KEY_COLUMNS:
+            if column not in frame.columns:
+                frame[column] = ""
+            frame[column] = frame[column].astype("string").str.strip().fillna("")
+        expiry = pd.to_datetime(frame["expiry"], format=self.expiry_format, errors="coerce")
+        frame["expiry"] = expiry.dt.strftime("%Y-%m-%d").fillna("")
+        for column in VALUE_COLUMNS:
+            if column not in frame.columns:
+                frame[column] = 0
+        return frame.groupby(KEY_COLUMNS, sort=False)[VALUE_COLUMNS].sum().reset_index()
+
+
+def tap(chunks, observer):
+    """Pass chunks through unchanged, showing each one to `observer.add` first."""
+    for chunk in chunks:
+        observer.add(chunk)
+        yield chunk
+
+
+def _day_number(iso_date):
+    return int(np.datetime64(iso_date, "D").astype("int64"))
+
+
+class SeriesIndex:
+    def __init__(self, root):
+        self.root = root
+        self.meta_path = os.path.join(root, META_NAME)
+        self.tail_path = os.path.join(root, TAIL_NAME)
+        self.keys = []
+        self.days = {}
+        self.generation = 0
+        self.base_count = 0
+        self.tail_count = 0
+        self._key_ids = {}
+        self._by_symbol = {}
+        self._base = None
+        self._offsets = None
+        if os.path.exists(self.meta_path):
+            with open(self.meta_path) as f:
+                meta = json.load(f)
+            self.keys = [tuple(key) for key in meta["keys"]]
+            self.days = {exchange: set(days) for exchange, days in meta["days"].items()}
+            self.generation = meta["generation"]
+            self.base_count = meta["base_count"]
+            self.tail_count = meta["tail_count"]
+        for key_id, key in enumerate(self.keys):
+            self._remember(key_id, key)
+        committed = self.tail_count * RECORD.itemsize
+        if os.path.exists(self.tail_path) and os.path.getsize(self.tail_path) > committed:
+            # Torn append (or a compaction that committed before truncating)
+            with open(self.tail_path, "r+b") as f:
+                f.truncate(committed)
+
+    def _remember(self, key_id, key):
+        self._key_ids[key] = key_id
+        self._by_symbol.setdefault(key[1], []).append(key_id)
+
+    def _base_path(self, generation):
+        return os.path.join(self.root, f"base-{generation}.bin")
+
+    def _offsets_path(self, generation):
+        return os.path.join(self.root, f"base-{generation}.offsets.npy")
+
+    def _save_meta(self):
+        meta = {
+            "keys": [list(key) for key in self.keys],
+            "days": {exchange: sorted(days) for exchange, days in self.days.items()},
+            "generation": self.generation,
+            "base_count": self.base_count,
+            "tail_count": self.tail_count,
+        }
+        atomic_write(self.meta_path, json.dumps(meta).encode())
+
+    def has_day(self, exchange, iso_date):
+        return iso_date in self.days.get(exchange, ())
+
+    # ---- writes ----
+
+    def add_day(self, exchange, iso_date, frame):
+        """Append one day's per-key totals (DaySeries.frame()); returns the records written."""
+        os.makedirs(self.root, exist_ok=True)
+        records = np.zeros(len(frame), dtype=RECORD)
+        ids = []
+        for symbol, instrument, expiry in frame[KEY_COLUMNS].itertuples(index=False):
+            key = (exchange, symbol, instrument, expiry)
+            key_id = self._key_ids.get(key)
+            if key_id is None:
+                key_id = len(self.keys)
+                self.keys.append(key)
+                self._remember(key_id, key)
+            ids.append(key_id)
+        records["key"] = ids
+        records["day"] = _day_number(iso_date)
+        for column in VALUE_COLUMNS:
+            records[column] = pd.to_numeric(frame[column], errors="coerce").fillna(0).to_numpy()
+        with open(self.tail_path, "ab") as f:
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        self.tail_count += len(records)
+        self.days.setdefault(exchange, set()).add(iso_date)
+        self._save_meta()
+        if self.tail_count >= COMPACT_RECORDS:
+            self.compact()
+        return len(records)
+
+    def compact(self):
+        """Merge the tail into a new base generation sorted by (key, day)."""
+        records = np.concatenate([self._base_records(), self._tail_records()])
+        records = records[np.lexsort((records["day"], records["key"]))]
+        offsets = np.searchsorted(records["key"], np.arange(len(self.keys) + 1)).astype("int64")
+        generation = self.generation + 1
+        atomic_write(self._base_path(generation), records.tobytes())
+        np.save(self._offsets_path(generation), offsets)
+        old = self.generation
+        self.generation, self.base_count, self.tail_count = generation, len(records), 0
+        self._save_meta()
+        self._base = self._offsets = None
+        with open(self.tail_path, "r+b") as f:
+            f.truncate(0)
+        for path in (self._base_path(old), self._offsets_path(old)):
+            if os.path.exists(path):
+                os.remove(path)
+
+    # ---- reads ----
+
+    def _base_records(self):
+        if not self.base_count:
+            return np.zeros(0, dtype=RECORD)
+        if self._base is None:
+            self._base = np.memmap(self._base_path(self.generation), dtype=RECORD, mode="r", shape=(self.base_count,))
+            self._offsets = np.load(self._offsets_path(self.generation))
+        return self._base
+
+    def _tail_records(self):
+        if not self.tail_count:
+            return np.zeros(0, dtype=RECORD)
+        return np.fromfile(self.tail_path, dtype=RECORD, count=self.tail_count)
+
+    def key_ids(self, symbol, exchange=None, instrument=None, expiry=None):
+        return [
+            key_id for key_id in self._by_symbol.get(symbol, [])
+            if (exchange is None or self.keys[key_id][0] == exchange)
+            and (instrument is None or self.keys[key_id][2] == instrument)
+            and (expiry is None or self.keys[key_id][3] == expiry)
+        ]
+
+    def history(self, symbol, exchange=None, instrument=None, expiry=None):
+        """Every record of the matching keys: one row per (key, date)."""
+        ids = self.key_ids(symbol, exchange, instrument, expiry)
+        base = self._base_records()
+        parts = []
+        if len(base):
+            # Keys added after the last compaction have no base slice
+            parts += [base[self._offsets[i]:self._offsets[i + 1]] for i in ids if i + 1 < len(self._offsets)]
+        tail = self._tail_records()
+        if len(tail):
+            parts.append(tail[np.isin(tail["key"], ids)])
+        records = np.concatenate(parts) if parts else np.zeros(0, dtype=RECORD)
+        frame = pd.DataFrame(records)
+        keys = [self.keys[i] for i in frame["key"]]
+        frame.insert(0, "date", records["day"].astype("datetime64[D]"))
+        for position, column in enumerate(["exchange", "symbol", "instrument", "expiry"]):
+            frame.insert(1 + position, column, [key[position] for key in keys])
+        return frame.drop(columns=["key", "day"]).sort_values(["date", "exchange", "instrument", "expiry"],
+                                                              ignore_index=True)
+
+    def daily(self, symbol, exchange=None, instrument=None, expiry=None):
+        """The matching keys summed per date (and exchange)."""
+        frame = self.history(symbol, exchange, instrument, expiry)
+        return frame.groupby(["date", "exchange"])[VALUE_COLUMNS].sum().reset_index()
@@ -0,0 +1,88 @@
+import io
+import json
+import os
+import shutil
+import tarfile
+import time
+
+from .summary_store import _fsync_dir
+
+# ----------------- STATE SNAPSHOTS ------------------
+# Everything a daily run needs to pick up where the last one stopped, in one
+# .tar.gz: the summary CSV and its index, the watermarks/gaps and the cache
+# manifests (negative entries included), optionally the cached objects and
+# the contract store too. CI runners start from a fresh checkout, so the
+# scheduled workflow restores the snapshot before the run and saves a new
+# one after it; the run then only fetches the new day.
+#
+# Paths are stored relative to the working directory and restored to the
+# same place. On import, files that already exist locally are kept unless
+# force=True.
+
+SNAPSHOT_VERSION = 1
+DEFAULT_SNAPSHOT = "nse_bse_state.tar.gz"
+META_NAME = "snapshot.json"
+
+
+def _arcname(path):
+    relative = os.path.relpath(path)
+    if relative.startswith(os.pardir) or os.path.isabs(relative):
+        raise ValueError(f"{path} is outside the working directory; cannot snapshot it")
+    return relative.replace(os.sep, "/")
+
+
+def export_snapshot(paths, snapshot_path=DEFAULT_SNAPSHOT):
+    """Write the existing `paths` (files or directories) to one .tar.gz.
+
+    Returns the list of archived top-level paths.
+    """
+    archived = [p for p in paths if os.path.exists(p)]
+    meta = {
+        "version": SNAPSHOT_VERSION,
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "paths": [_arcname(p) for p in archived],
+    }
+    tmp_path = f"{snapshot_path}.tmp"
+    with tarfile.open(tmp_path, "w:gz", compresslevel=6) as tar:
+        data = json.dumps(meta, indent=1).encode()
+        info = tarfile.TarInfo(META_NAME)
+        info.size = len(data)
+        info.mtime = int(time.time())
+        tar.addfile(info, io.BytesIO(data))
+        for path in archived:
+            tar.add(path, arcname=_arcname(path))
+    os.replace(tmp_path, snapshot_path)
+    _fsync_dir(snapshot_path)
+    return archived
+
+
+def _safe_target(name):
+    target = os.path.normpath(name)
+    if os.path.isabs(target) or target.startswith(os.pardir):
+        raise ValueError(f"refusing to restore {name!r} outside the working directory")
+    return target
+
+
+def import_snapshot(snapshot_path=DEFAULT_SNAPSHOT, force=False):
+    """Restore a snapshot into the working directory; returns (restored, kept)."""
+    restored, kept = [], []
+    with tarfile.open(snapshot_path, "r:gz") as tar:
+        meta_member = tar.getmember(META_NAME)
+        meta = json.load(tar.extractfile(meta_member))
+        if meta.get("version") != SNAPSHOT_VERSION:
+            raise ValueError(f"{snapshot_path}: unsupported snapshot version {meta.get('version')}")
+        for member in tar:
+            if member.name == META_NAME or not member.isfile():
+                continue
+            target = _safe_target(member.name)
+            if os.path.exists(target) and not force:
+                kept.append(target)
+                continue
+            os.makedirs(os.path.dirname(target) or ".", exist_ok=True)
+            tmp_path = f"{target}.tmp"
+            with tar.extractfile(member) as src, open(tmp_path, "wb") as dst:
+                shutil.copyfileobj(src, dst, 1 << 20)
+            os.utime(tmp_path, (member.mtime, member.mtime))
+            os.replace(tmp_path, target)
+            restored.append(target)
+    return restored, kept
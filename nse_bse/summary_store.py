@@ -0,0 +1,245 @@
+import csv
+import io
+import json
+import os
+
+# ----------------- INCREMENTAL SUMMARY STORE ------------------
+# The summary CSV is only ever appended to. A sidecar index
+# (<csv>.idx.json) records the processed dates and the byte length of the
+# last committed append, so:
+#   - a daily run never re-reads or rewrites the history, and
+#   - a torn append (crash mid-write) is truncated away on the next open.
+# Writing a date again (a filled gap) appends a superseding row: readers
+# merge a date's rows in write order, a later non-empty cell winning, the
+# same as compact() does. Sorting / de-duplication happens only in compact(),
+# run when asked (the compact mode, merges, rebuilds) or by upsert() once
+# superseded rows make up a quarter of the file.
+
+INDEX_SUFFIX = ".idx.json"
+TAIL_BYTES = 64
+# upsert() compacts past max(this, a quarter of the dates) superseded rows
+COMPACT_MIN_SUPERSEDED = 64
+
+
+def _fsync_dir(path):
+    try:
+        fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+    except OSError:  # not supported on Windows
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+def atomic_write(path, data):
+    # Per-process temp name: backfill shards may write the same cache object
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    _fsync_dir(path)
+
+
+def _format(value):
+    if value is None:
+        return ""
+    try:
+        # pd.NA / NaN render as empty cells, like DataFrame.to_csv
+        if value != value:
+            return ""
+    except TypeError:
+        return ""
+    if hasattr(value, "item"):
+        value = value.item()
+    return str(value)
+
+
+def merge_rows(rows, date_column="Date"):
+    """One row per date, in order of first appearance; a later non-empty cell wins."""
+    latest = {}
+    for row in rows:
+        merged = latest.setdefault(row[date_column][:10], {k: "" for k in row if k is not None})
+        merged.update({k: v for k, v in row.items() if k is not None and v != ""})
+    return latest
+
+
+def latest_cells(frame, date_column="Date"):
+    """merge_rows() for a DataFrame read straight from the CSV, sorted by date."""
+    return frame.groupby(frame[date_column].astype(str).str[:10], sort=True).last().reset_index(drop=True)
+
+
+class SummaryStore:
+    def __init__(self, path, columns, date_column="Date"):
+        self.path = path
+        self.index_path = path + INDEX_SUFFIX
+        self.date_column = date_column
+        self.columns = list(columns)
+        self.dates = set()
+        self.last_date = None
+        self.sorted = True
+        # Rows appended for a date the file already held
+        self.superseded = 0
+        self._size = 0
+        self._open()
+
+    # ---- index ----
+
+    def _open(self):
+        if not os.path.exists(self.path):
+            self._size = 0
+            return
+        index = None
+        if os.path.exists(self.index_path):
+            with open(self.index_path) as f:
+                index = json.load(f)
+        actual_size = os.path.getsize(self.path)
+        if index is None or actual_size < index["size"] or self._tail(index["size"]) != index.get("tail") \
+                or "superseded" not in index and not index["sorted"]:
+            # No index yet, the CSV was rewritten outside the store, or an
+            # older index that did not count superseded rows: build it once
+            self._reindex()
+            return
+        if actual_size > index["size"]:
+            print(f"⚠️ Warning: discarding {actual_size - index['size']} bytes of an unfinished write to {self.path}")
+            with open(self.path, "r+b") as f:
+                f.truncate(index["size"])
+        self.columns = index["columns"]
+        self.dates = set(index["dates"])
+        self.last_date = index["last_date"]
+        self.sorted = index["sorted"]
+        self.superseded = index.get("superseded", 0)
+        self._size = index["size"]
+
+    def _reindex(self):
+        rows = self._read_all()
+        with open(self.path, newline="") as f:
+            header = next(csv.reader(f), None)
+        if header:
+            self.columns = header
+        dates = [row[self.date_column][:10] for row in rows]
+        self.dates = set(dates)
+        self.last_date = max(dates) if dates else None
+        self.sorted = dates == sorted(dates) and len(dates) == len(self.dates)
+        self.superseded = len(dates) - len(self.dates)
+        self._size = os.path.getsize(self.path)
+        self._write_index()
+
+    def _tail(self, size):
+        # Last committed bytes, to tell our own torn append from an outside rewrite
+        with open(self.path, "rb") as f:
+            f.seek(max(0, size - TAIL_BYTES))
+            return f.read(min(size, TAIL_BYTES)).decode("utf-8", errors="replace")
+
+    def _write_index(self):
+        index = {
+            "columns": self.columns,
+            "size": self._size,
+            "tail": self._tail(self._size) if self._size else "",
+            "dates": sorted(self.dates),
+            "last_date": self.last_date,
+            "sorted": self.sorted,
+            "superseded": self.superseded,
+        }
+        atomic_write(self.index_path, json.dumps(index).encode())
+
+    # ---- reads ----
+
+    def __contains__(self, iso_date):
+        return iso_date in self.dates
+
+    def _read_all(self):
+        if not os.path.exists(self.path):
+            return []
+        with open(self.path, newline="") as f:
+            return list(csv.DictReader(f))
+
+    def read_rows(self):
+        """One row per date (superseding rows merged in), in file order."""
+        rows = self._read_all()
+        if not self.superseded:
+            return rows
+        return list(merge_rows(rows, self.date_column).values())
+
+    def read_frame(self):
+        import pandas as pd
+
+        if not os.path.exists(self.path):
+            return pd.DataFrame(columns=self.columns)
+        frame = pd.read_csv(self.path, parse_dates=[self.date_column])
+        return latest_cells(frame, self.date_column) if self.superseded else frame
+
+    # ---- writes ----
+
+    def _encode(self, rows, header):
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        if header:
+            writer.writerow(self.columns)
+        for row in rows:
+            writer.writerow([_format(row.get(col)) for col in self.columns])
+        return buf.getvalue().encode()
+
+    def append(self, rows):
+        """Append rows (dicts keyed by column) and commit them to the index."""
+        rows = list(rows)
+        if not rows:
+            return 0
+        unknown = set().union(*rows) - set(self.columns)
+        if unknown:
+            raise ValueError(f"{self.path}: unknown columns {sorted(unknown)}; run compact() with the new columns first")
+        data = self._encode(rows, header=self._size == 0)
+        with open(self.path, "ab") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+
+        new_dates = [str(row[self.date_column])[:10] for row in rows]
+        for iso_date in new_dates:
+            if iso_date in self.dates:
+                self.superseded += 1
+                self.sorted = False
+            elif self.last_date is not None and iso_date < self.last_date:
+                self.sorted = False
+            self.dates.add(iso_date)
+            self.last_date = iso_date if self.last_date is None else max(self.last_date, iso_date)
+        self._size += len(data)
+        self._write_index()
+        return len(rows)
+
+    def upsert(self, rows):
+        """Append rows; a date already present gets a superseding row.
+
+        Only the cells a row fills are changed (see merge_rows). Either way
+        it is a plain append; the file is compacted only once superseded
+        rows pass max(COMPACT_MIN_SUPERSEDED, a quarter of the dates).
+        """
+        written = self.append(rows)
+        if self.superseded > max(COMPACT_MIN_SUPERSEDED, len(self.dates) // 4):
+            self.compact()
+        return written
+
+    def compact(self, columns=None):
+        """Rewrite the CSV sorted by date, one row per date.
+
+        Rows for the same date are merged in write order; a later non-empty
+        cell replaces an earlier one.
+        """
+        if columns is not None:
+            self.columns = list(columns)
+        if not os.path.exists(self.path):
+            return
+        latest = merge_rows(self._read_all(), self.date_column)
+        rows = [latest[d] for d in sorted(latest)]
+        data = self._encode(rows, header=True)
+        atomic_write(self.path, data)
+        self.dates = set(latest)
+        self.last_date = max(latest) if latest else None
+        self.sorted = True
+        self.superseded = 0
+        self._size = len(data)
+        self._write_index()
@@ -0,0 +1,228 @@
+import csv
+import os
+from datetime import date, datetime, timedelta
+
+from . import config
+
+# ----------------- TRADING CALENDAR ------------------
+# Per-exchange calendars built from holidays.csv (exchange, date, kind,
+# description). kind is "holiday" (weekday with no session) or
+# "special_session" (a session on a weekend/holiday, e.g. Budget Saturday or
+# Muhurat trading, when a bhavcopy is published). Each exchange has its own
+# rows: the two lists usually agree, but a day only one of them closes or
+# trades is just a row under that exchange.
+#
+# The calendar covers the years its rows span. A date outside them raises
+# CalendarNotCovered (config.CALENDAR_STRICT): counting every weekday as a
+# session would turn each unlisted holiday into a missing file. Scheduled
+# runs call check_coverage() first, which warns ahead of the data running
+# out and, past it, falls back to weekdays instead of failing mid-plan.
+#
+# For the covered span we precompute, once:
+#   days      every calendar day
+#   is_open   whether the exchange trades that day
+#   n_open    running count of trading days up to and including each day
+#   sessions  the trading days themselves
+# so a range is one slice and next/previous trading day are array lookups.
+# numpy is imported on first vector use; is_trading_day() is plain Python so
+# a quick "anything due?" check stays cheap.
+
+HOLIDAYS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "holidays.csv")
+
+_CALENDARS = {}
+
+
+class CalendarNotCovered(ValueError):
+    pass
+
+
+def _day(value):
+    """Accept date/datetime/ISO string/np.datetime64 and return datetime64[D]."""
+    import numpy as np
+
+    if isinstance(value, datetime):
+        value = value.date()
+    return np.datetime64(value, "D")
+
+
+def _date(value):
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return date.fromisoformat(str(value)[:10])
+
+
+def _year(day):
+    return int(str(day)[:4])
+
+
+def load_holidays(path=HOLIDAYS_FILE):
+    """{exchange: {kind: [iso dates]}}."""
+    data = {}
+    with open(path, newline="") as f:
+        for row in csv.DictReader(f):
+            entry = data.setdefault(row["exchange"], {"holiday": [], "special_session": []})
+            entry[row["kind"]].append(row["date"])
+    return data
+
+
+class TradingCalendar:
+    def __init__(self, exchange, holidays, special_sessions=()):
+        self.exchange = exchange
+        self.holiday_dates = {_date(d) for d in holidays}
+        self.special_dates = {_date(d) for d in special_sessions}
+        known = self.holiday_dates | self.special_dates
+        # Years the data covers; None: no data at all
+        self.first_year = min(known).year if known else None
+        self.last_year = max(known).year if known else None
+        self._warned = set()
+        # None: follow config.CALENDAR_STRICT
+        self.strict = None
+        self.start = None
+
+    def _build(self, start, end):
+        import numpy as np
+
+        self.start = start
+        self.end = end
+        self.days = np.arange(start, end + 1, dtype="datetime64[D]")
+        holidays = np.array(sorted(self.holiday_dates), dtype="datetime64[D]")
+        special = np.array(sorted(self.special_dates), dtype="datetime64[D]")
+        self.is_open = np.is_busday(self.days, holidays=holidays) | np.isin(self.days, special)
+        self.n_open = np.cumsum(self.is_open)
+        self.sessions = self.days[self.is_open]
+
+    def covers(self, year):
+        return self.first_year is not None and self.first_year <= year <= self.last_year
+
+    def covered_until(self):
+        return date(self.last_year, 12, 31) if self.last_year is not None else None
+
+    def check_covered(self, years):
+        """Raise CalendarNotCovered for years without holiday data (or, when
+        config.CALENDAR_STRICT is off, warn once and treat them as weekdays)."""
+        uncovered = sorted(y for y in set(years) if not self.covers(y))
+        if not uncovered:
+            return
+        span = f"{self.first_year}-{self.last_year}" if self.first_year is not None else "no years"
+        message = f"no {self.exchange} holiday data for {uncovered} (holidays.csv covers {span})"
+        if (config.CALENDAR_STRICT if self.strict is None else self.strict):
+            raise CalendarNotCovered(
+                f"{message}; add that year's holidays and special sessions to {HOLIDAYS_FILE}"
+            )
+        new = [y for y in uncovered if y not in self._warned]
+        if new:
+            self._warned.update(new)
+            print(f"⚠️ Warning: {message}; assuming weekdays only")
+
+    def _ensure(self, *values):
+        import numpy as np
+
+        lo = min(values)
+        hi = max(values)
+        if self.start is not None and lo >= self.start and hi <= self.end:
+            return
+        # Whole years, at least the span covered by the holiday data; outside
+        # it (lookahead, or CALENDAR_STRICT off) weekdays count as sessions
+        start = np.datetime64(f"{min(self.first_year or _year(lo), _year(lo))}-01-01", "D")
+        end = np.datetime64(f"{max(self.last_year or _year(hi), _year(hi))}-12-31", "D")
+        if self.start is not None:
+            start, end = min(start, self.start), max(end, self.end)
+        self._build(start, end)
+
+    def _pos(self, day):
+        return int((day - self.start).astype(int))
+
+    def is_trading_day(self, value):
+        day = _date(value)
+        self.check_covered({day.year})
+        if day in self.special_dates:
+            return True
+        return day.weekday() < 5 and day not in self.holiday_dates
+
+    def iter_trading_days(self, start, end):
+        """Sessions in [start, end] as dates, walked in plain Python.
+
+        For the handful of days after a watermark this is cheaper than
+        trading_days(), which needs numpy and the full-span arrays.
+        """
+        day, last = _date(start), _date(end)
+        while day <= last:
+            if self.is_trading_day(day):
+                yield day
+            day += timedelta(days=1)
+
+    def trading_days(self, start, end):
+        """All sessions in [start, end] as datetime64[D], in one slice."""
+        import numpy as np
+
+        lo, hi = _day(start), _day(end)
+        if hi < lo:
+            return np.array([], dtype="datetime64[D]")
+        self.check_covered(range(_year(lo), _year(hi) + 1))
+        self._ensure(lo, hi)
+        i, j = self._pos(lo), self._pos(hi)
+        return self.sessions[self.n_open[i] - self.is_open[i]:self.n_open[j]]
+
+    def next_trading_day(self, value):
+        """First session strictly after `value`."""
+        day = _day(value)
+        self._ensure(day, day + 14)
+        k = self.n_open[self._pos(day)]
+        if k >= len(self.sessions):
+            self._ensure(self.start, self.end + 366)
+            return self.next_trading_day(value)
+        self.check_covered({_year(day), _year(self.sessions[k])})
+        return self.sessions[k]
+
+    def previous_trading_day(self, value):
+        """Last session strictly before `value`."""
+        day = _day(value)
+        self._ensure(day - 14, day)
+        i = self._pos(day)
+        k = self.n_open[i] - self.is_open[i]
+        if k == 0:
+            self._ensure(self.start - 366, self.end)
+            return self.previous_trading_day(value)
+        self.check_covered({_year(day), _year(self.sessions[k - 1])})
+        return self.sessions[k - 1]
+
+
+def get_calendar(exchange, path=HOLIDAYS_FILE):
+    key = (exchange, path)
+    if key not in _CALENDARS:
+        entry = load_holidays(path).get(exchange, {})
+        _CALENDARS[key] = TradingCalendar(exchange, entry.get("holiday", []), entry.get("special_session", []))
+    return _CALENDARS[key]
+
+
+def check_coverage(exchanges, start, end, fallback=False, path=HOLIDAYS_FILE):
+    """Check the calendars cover [start, end] before a run plans anything.
+
+    Uncovered years raise CalendarNotCovered, or with `fallback` (scheduled
+    runs) count as weekdays for the rest of the process, with a warning.
+    Data that ends within config.CALENDAR_WARN_DAYS of `end` is warned about.
+    """
+    end = _date(end)
+    years = range(_date(start).year, end.year + 1)
+    for exchange in exchanges:
+        calendar = get_calendar(exchange, path)
+        if fallback and not all(calendar.covers(y) for y in years):
+            calendar.strict = False
+            print(f"⚠️ Warning: {exchange} trading days are guessed as weekdays: "
+                  f"add the missing years to {path} and re-run to get holidays right")
+        calendar.check_covered(years)
+        last = calendar.covered_until()
+        if last is not None and end <= last and (last - end).days < config.CALENDAR_WARN_DAYS:
+            print(f"⚠️ Warning: {exchange} holiday data ends on {last}; "
+                  f"add {last.year + 1}'s holidays and special sessions to {path} before then")
+
+
+def to_datetimes(days):
+    """datetime64[D] array -> naive midnight datetimes, as the scripts use."""
+    return [datetime(d.year, d.month, d.day) for d in days.astype(date)]
+
+
+def trading_dates(exchange, start, end):
+    return to_datetimes(get_calendar(exchange).trading_days(start, end))
@@ -0,0 +1,101 @@
+import json
+import os
+import time
+
+from . import config
+from .summary_store import atomic_write
+
+# ----------------- WATERMARKS ------------------
+# <summary csv>.watermark.json remembers, per exchange, the last trading day
+# that has been written to the summary. A daily run then only has to look at
+# the calendar days after it, and when there are none it can stop before
+# opening the summary, the caches or the network: the cost of a no-op run no
+# longer grows with the length of the history.
+#
+# The marks are only trusted for the same start date and summary columns
+# they were recorded with; otherwise the run falls back to a full scan of
+# the summary index and records fresh marks afterwards.
+#
+# Days at or before a mark whose cells are still empty for an exchange
+# (download failed, file not published yet, parse error) are kept as gaps,
+# each with the earliest time worth retrying it, so later runs re-fetch just
+# those (date, exchange) cells. After config.GAP_MAX_ATTEMPTS tries a gap is
+# given up on: it stays in the file (and is reported) but is no longer due.
+
+WATERMARK_SUFFIX = ".watermark.json"
+
+
+class Watermarks:
+    def __init__(self, summary_path, max_attempts=None):
+        self.path = summary_path + WATERMARK_SUFFIX
+        self.max_attempts = max_attempts or config.GAP_MAX_ATTEMPTS
+        self.start = None
+        self.columns = None
+        self.marks = {}
+        self.gaps = None  # None: never recorded (state from before gap tracking)
+        if os.path.exists(self.path):
+            with open(self.path) as f:
+                state = json.load(f)
+            self.start = state.get("start")
+            self.columns = state.get("columns")
+            self.marks = state.get("marks", {})
+            self.gaps = state.get("gaps")
+
+    def valid_for(self, start, columns, exchanges):
+        """Whether the marks can stand in for scanning the summary."""
+        return (
+            self.start == start
+            and self.columns == list(columns)
+            and all(exchange in self.marks for exchange in exchanges)
+        )
+
+    def get(self, exchange):
+        return self.marks.get(exchange)
+
+    def advance(self, marks, start, columns):
+        """Move marks forward (never back)."""
+        for exchange, iso_date in marks.items():
+            current = self.marks.get(exchange)
+            if current is None or iso_date > current:
+                self.marks[exchange] = iso_date
+        self.start = start
+        self.columns = list(columns)
+
+    # ---- gaps ----
+
+    def gaps_due(self, exchanges, now=None):
+        """{iso_date: [exchange, ...]} of gaps whose retry time has come."""
+        now = time.time() if now is None else now
+        due = {}
+        for exchange in exchanges:
+            for iso_date, gap in (self.gaps or {}).get(exchange, {}).items():
+                if gap["retry_after"] <= now and not self.given_up(gap):
+                    due.setdefault(iso_date, []).append(exchange)
+        return due
+
+    def given_up(self, gap):
+        return gap.get("attempts", 0) >= self.max_attempts
+
+    def add_gap(self, exchange, iso_date, reason, retry_after=0, attempts=None):
+        """Record a failed try. `attempts`, instead of adding one to the
+        recorded count, carries a count kept elsewhere (a backfill shard's),
+        or 0 for a check that does not count as a try (a short poll window)."""
+        if self.gaps is None:
+            self.gaps = {}
+        gaps = self.gaps.setdefault(exchange, {})
+        recorded = gaps.get(iso_date, {}).get("attempts", 0)
+        count = recorded + 1 if attempts is None else max(recorded, attempts)
+        gaps[iso_date] = {"reason": reason, "retry_after": retry_after, "attempts": count}
+        if count >= self.max_attempts > recorded:
+            print(f"⚠️ Warning: {exchange} {iso_date} still missing after {count} attempts ({reason}); "
+                  f"no longer retrying it. If the exchange was closed, add the day to holidays.csv")
+
+    def fill_gap(self, exchange, iso_date):
+        if self.gaps is not None:
+            self.gaps.get(exchange, {}).pop(iso_date, None)
+
+    def save(self):
+        if self.gaps is None:
+            self.gaps = {}
+        state = {"start": self.start, "columns": self.columns, "marks": self.marks, "gaps": self.gaps}
+        atomic_write(self.path, json.dumps(state, indent=1, sort_keys=True).encode())
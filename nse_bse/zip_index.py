@@ -0,0 +1,118 @@
+import csv
+import io
+import struct
+import zipfile
+import zlib
+
+# ----------------- ZIP MEMBER INDEX ------------------
+# Opening a cached fo{date}.zip with zipfile means reading its central
+# directory and looking the options member up by name, for every file on
+# every rebuild. The archive never changes once cached (objects are content
+# addressed), so that is done once, when the file enters the cache, and the
+# result kept in its manifest entry:
+#
+#   {"member": "op02062025.csv",         the bhavcopy, None if absent
+#    "members": {name: {"offset", "data_offset", "compress_size",
+#                       "file_size", "crc", "method"}},
+#    "header": [...], "delimiter": ","}   first line of the member
+#
+# open_member() then seeks straight to the member's data and inflates it as
+# a stream, checking the CRC at the end like zipfile does, and the parsers
+# take the recorded header and delimiter instead of splitting the first line.
+
+LOCAL_HEADER = b"PK\x03\x04"
+LOCAL_HEADER_SIZE = 30
+READ_SIZE = 1 << 16
+
+
+class MemberReader(io.RawIOBase):
+    """Raw stream over one stored or deflated member, starting at its data."""
+
+    mode = "rb"
+
+    def __init__(self, raw, member, name=""):
+        self._raw = raw
+        self._name = name
+        self._left = member["compress_size"]
+        self._crc_expected = member["crc"]
+        self._inflate = zlib.decompressobj(-15) if member["method"] == zipfile.ZIP_DEFLATED else None
+        self._crc = 0
+        self._buffer = b""
+        self._pos = 0
+        self._eof = False
+
+    def readable(self):
+        return True
+
+    def _fill(self):
+        while self._pos == len(self._buffer) and not self._eof:
+            chunk = self._raw.read(min(READ_SIZE, self._left))
+            if not chunk and self._left:
+                raise EOFError(f"{self._name}: archive ends inside the member")
+            self._left -= len(chunk)
+            data = self._inflate.decompress(chunk) if self._inflate else chunk
+            if not self._left:
+                if self._inflate:
+                    data += self._inflate.flush()
+                self._eof = True
+            self._crc = zlib.crc32(data, self._crc)
+            if self._eof and self._crc != self._crc_expected:
+                raise zipfile.BadZipFile(f"Bad CRC-32 for file {self._name!r}")
+            self._buffer, self._pos = data, 0
+
+    def readinto(self, b):
+        self._fill()
+        n = min(len(b), len(self._buffer) - self._pos)
+        b[:n] = self._buffer[self._pos:self._pos + n]
+        self._pos += n
+        return n
+
+
+def open_member(raw, index, name=None):
+    """Buffered binary stream of member `name` (default: the indexed
+    bhavcopy) of the archive open as `raw`, without reading its directory."""
+    name = name or index["member"]
+    member = index["members"][name]
+    raw.seek(member["offset"])
+    if raw.read(4) != LOCAL_HEADER:
+        raise zipfile.BadZipFile(f"{name}: no local header at offset {member['offset']}; stale archive index")
+    raw.seek(member["data_offset"])
+    return io.BufferedReader(MemberReader(raw, member, name), buffer_size=READ_SIZE)
+
+
+def _dialect(line):
+    text = line.decode("utf-8", errors="replace").strip().lstrip("\ufeff")
+    try:
+        delimiter = csv.Sniffer().sniff(text, delimiters=",;|\t").delimiter
+    except csv.Error:
+        delimiter = ","
+    return [column.strip() for column in text.split(delimiter)], delimiter
+
+
+def build_index(raw, pick):
+    """Index of the archive open as `raw` (seekable); `pick(names)` chooses
+    the bhavcopy member or returns None."""
+    members = {}
+    with zipfile.ZipFile(raw) as z:
+        for info in z.infolist():
+            raw.seek(info.header_offset)
+            local = raw.read(LOCAL_HEADER_SIZE)
+            if local[:4] != LOCAL_HEADER or info.flag_bits & 0x1:
+                raise zipfile.BadZipFile(f"{info.filename}: unreadable local header")
+            name_length, extra_length = struct.unpack("<HH", local[26:30])
+            members[info.filename] = {
+                "offset": info.header_offset,
+                "data_offset": info.header_offset + LOCAL_HEADER_SIZE + name_length + extra_length,
+                "compress_size": info.compress_size,
+                "file_size": info.file_size,
+                "crc": info.CRC,
+                "method": info.compress_type,
+            }
+    index = {"member": pick(list(members)), "members": members, "header": None, "delimiter": None}
+    if index["member"] is None:
+        return index
+    if members[index["member"]]["method"] not in (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED):
+        return None  # other codecs (bzip2, lzma) are left to zipfile
+    with open_member(raw, index) as f:
+        index["header"], index["delimiter"] = _dialect(f.readline(READ_SIZE))
+    return index
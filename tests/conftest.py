@@ -0,0 +1,60 @@
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+sys.path.insert(0, os.path.join(REPO_DIR, "benchmarks"))
+
+from fake_exchange import FakeExchange  # noqa: E402
+from synthetic import BSE_HEADER, NSE_HEADER, _bse_row, _nse_row, write_csv  # noqa: E402
+
+NSE_PATH = "/archives/fo/mkt/fo{}.zip"
+BSE_PATH = "/download/Bhavcopy/Derivative/MS_{}.csv"
+
+
+def nse_zip(date_obj, body):
+    """fo{DDMMYYYY}.zip holding `body` as op{DDMMYYYY}.csv."""
+    date_str = date_obj.strftime("%d%m%Y")
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr(f"op{date_str}.csv", body)
+    return buf.getvalue()
+
+
+@pytest.fixture(scope="session")
+def bhavcopies(tmp_path_factory):
+    """One small synthetic NSE and BSE bhavcopy (bytes), reused for every day."""
+    directory = tmp_path_factory.mktemp("bhavcopies")
+    nse, bse = str(directory / "nse.csv"), str(directory / "bse.csv")
+    write_csv(nse, NSE_HEADER, _nse_row, 50_000, seed=1)
+    write_csv(bse, BSE_HEADER, _bse_row, 30_000, seed=2)
+    with open(nse, "rb") as f, open(bse, "rb") as g:
+        return f.read(), g.read()
+
+
+@pytest.fixture
+def exchanges(bhavcopies):
+    """Start fake NSE (127.0.0.1) and BSE (localhost) servers; `serve(dates)`
+    publishes the bhavcopies for those dates and returns both servers."""
+    servers = []
+
+    def serve(dates, **behaviour):
+        nse_body, bse_body = bhavcopies
+        nse = FakeExchange(
+            {NSE_PATH.format(d.strftime("%d%m%Y")): nse_zip(d, nse_body) for d in dates},
+            host="127.0.0.1", **behaviour,
+        ).start()
+        bse = FakeExchange(
+            {BSE_PATH.format(f"{d.strftime('%Y%m%d')}-01"): bse_body for d in dates},
+            host="localhost", **behaviour,
+        ).start()
+        servers.extend([nse, bse])
+        return nse, bse
+
+    yield serve
+    for server in servers:
+        server.stop()
@@ -0,0 +1,55 @@
+import csv
+import io
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from conftest import BSE_PATH, NSE_PATH
+from nse_bse import config
+from nse_bse.exchanges import BseDerivativeAdapter, NseFoAdapter
+from nse_bse.http_session import ExchangeSessions
+from nse_bse.pipeline import Pipeline
+from nse_bse.trading_calendar import trading_dates
+from nse_bse.watermark import Watermarks
+
+START, END = datetime(2025, 3, 3), datetime(2025, 3, 21)
+
+
+def test_sharded_backfill_merges_into_one_sorted_summary(exchanges, bhavcopies, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    days = trading_dates("NSE", START, END)
+    missing = days[4]
+    nse, bse = exchanges(days)
+    del nse.files[NSE_PATH.format(missing.strftime("%d%m%Y"))]
+
+    output = str(tmp_path / "summary.csv")
+    pipeline = Pipeline(
+        output=output, start=START, end=END, ingest=False, series=False, backoff=0.01,
+        adapters={
+            "NSE": NseFoAdapter(nse.base_url + NSE_PATH, cache_dir=str(tmp_path / "nse")),
+            "BSE": BseDerivativeAdapter(bse.base_url + BSE_PATH, cache_dir=str(tmp_path / "bse")),
+        },
+        sessions=ExchangeSessions(
+            {"NSE": {"hosts": ["127.0.0.1"], "warmup_url": nse.base_url + "/"},
+             "BSE": {"hosts": ["localhost"], "headers": config.BSE_HEADERS}},
+        ),
+    )
+    pipeline.run_backfill(shards=3, workers=3)
+
+    with open(output, newline="") as f:
+        rows = list(csv.DictReader(f))
+    assert [row["Date"] for row in rows] == [d.strftime("%Y-%m-%d") for d in days]
+    nse_trades = int(pd.read_csv(io.BytesIO(bhavcopies[0]))["NO_OF_TRADE"].sum())
+    bse_trades = int(pd.read_csv(io.BytesIO(bhavcopies[1]))["No. of Trades"].sum())
+    for row in rows:
+        expected = "" if row["Date"] == missing.strftime("%Y-%m-%d") else nse_trades
+        assert (row["NSE_NO_OF_TRADE"] and int(float(row["NSE_NO_OF_TRADE"]))) == expected
+        assert int(float(row["BSE_No_of_Trades"])) == bse_trades
+
+    # Merged shards are gone; marks and the one gap moved to the main state
+    assert not os.path.exists(output + ".shards")
+    state = Watermarks(output)
+    assert state.marks == {"NSE": END.strftime("%Y-%m-%d"), "BSE": END.strftime("%Y-%m-%d")}
+    assert list(state.gaps["NSE"]) == [missing.strftime("%Y-%m-%d")]
+    assert not state.gaps.get("BSE")
@@ -0,0 +1,27 @@
+from nse_bse import cache_manifest
+from nse_bse.cache_manifest import HIT, MISSING, CacheManifest, looks_like_csv
+
+CSV = b"Date,Trades\n2025-06-02,10\n"
+
+
+def test_changes_are_written_once_per_flush(tmp_path, monkeypatch):
+    writes = []
+
+    def counting_write(path, data, _write=cache_manifest.atomic_write):
+        writes.append(path)
+        return _write(path, data)
+
+    monkeypatch.setattr(cache_manifest, "atomic_write", counting_write)
+    cache = CacheManifest(str(tmp_path), looks_like_csv)
+    for day in range(1, 4):
+        cache.store(f"MS_2025060{day}.csv", CSV + str(day).encode())
+        cache.mark_parsed(f"MS_2025060{day}.csv", True)
+    cache.mark_missing("MS_20250606.csv", ttl=3600, reason="404")
+    assert cache.path not in writes
+
+    cache.flush()
+    cache.flush()
+    assert writes.count(cache.path) == 1
+    reopened = CacheManifest(str(tmp_path), looks_like_csv)
+    assert [reopened.lookup(f"MS_2025060{day}.csv") for day in range(1, 4)] == [HIT] * 3
+    assert reopened.lookup("MS_20250606.csv") == MISSING
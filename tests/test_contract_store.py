@@ -0,0 +1,83 @@
+import io
+import os
+from collections import Counter
+from datetime import datetime
+
+import pandas as pd
+import pytest
+
+from conftest import BSE_PATH, NSE_PATH
+from nse_bse import config
+from nse_bse.contract_store import ContractStore
+from nse_bse.exchanges import BseDerivativeAdapter, NseFoAdapter
+from nse_bse.http_session import ExchangeSessions
+from nse_bse.parsers import ColumnTypeError
+from nse_bse.pipeline import Pipeline
+from nse_bse.trading_calendar import trading_dates
+
+pytest.importorskip("pyarrow")
+
+
+def chunk(trades):
+    return pd.DataFrame({"symbol": ["NIFTY"] * len(trades), "trades": trades, "expiry": ["26-Jun-2025"] * len(trades)})
+
+
+def test_write_day_replaces_the_partition_and_leaves_nothing_staged(tmp_path):
+    store = ContractStore(str(tmp_path / "contracts"))
+    assert store.write_day("NSE", "2025-06-02", [chunk([1, 2]), chunk([3])], "%d-%b-%Y") == 3
+    assert store.write_day("NSE", "2025-06-02", [chunk([4])], "%d-%b-%Y") == 1
+    assert os.listdir(os.path.join(store.root, "_staging")) == []
+    assert store.has_day("NSE", "2025-06-02")
+    assert store.scan(["trades"], exchange="NSE")["trades"].tolist() == [4]
+
+
+def test_failed_write_keeps_the_old_partition(tmp_path):
+    store = ContractStore(str(tmp_path / "contracts"))
+    store.write_day("NSE", "2025-06-02", [chunk([1])])
+
+    def broken():
+        yield chunk([2])
+        raise ColumnTypeError("stray text")
+
+    with pytest.raises(ColumnTypeError):
+        store.write_day("NSE", "2025-06-02", broken())
+    assert os.listdir(os.path.join(store.root, "_staging")) == []
+    assert store.scan(["trades"])["trades"].tolist() == [1]
+
+
+def test_daily_run_reads_each_file_once_for_summary_and_store(exchanges, bhavcopies, tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    start, end = datetime(2025, 3, 3), datetime(2025, 3, 5)
+    days = trading_dates("NSE", start, end)
+    nse, bse = exchanges(days)
+
+    reads = Counter()
+    for adapter_class in (NseFoAdapter, BseDerivativeAdapter):
+        def counting_open(self, source, date_obj, index=None, _open=adapter_class.open):
+            reads[self.name, date_obj] += 1
+            return _open(self, source, date_obj, index)
+
+        monkeypatch.setattr(adapter_class, "open", counting_open)
+
+    pipeline = Pipeline(
+        output=str(tmp_path / "summary.csv"), start=start, end=end, ingest=True, series=True,
+        contract_dir=str(tmp_path / "contracts"), series_dir=str(tmp_path / "series"),
+        adapters={
+            "NSE": NseFoAdapter(nse.base_url + NSE_PATH, cache_dir=str(tmp_path / "nse")),
+            "BSE": BseDerivativeAdapter(bse.base_url + BSE_PATH, cache_dir=str(tmp_path / "bse")),
+        },
+        sessions=ExchangeSessions(
+            {"NSE": {"hosts": ["127.0.0.1"], "warmup_url": nse.base_url + "/"},
+             "BSE": {"hosts": ["localhost"], "headers": config.BSE_HEADERS}},
+        ),
+    )
+    pipeline.run_daily()
+
+    assert reads == Counter({(name, day): 1 for name in ("NSE", "BSE") for day in days})
+    nse_trades = int(pd.read_csv(io.BytesIO(bhavcopies[0]))["NO_OF_TRADE"].sum())
+    stored = pipeline.contract_store.scan(["trades", "trade_date"], exchange="NSE")
+    assert len(stored) == len(days) * len(pd.read_csv(io.BytesIO(bhavcopies[0])))
+    assert int(stored["trades"].sum()) == nse_trades * len(days)
+    summary = pd.read_csv(tmp_path / "summary.csv")
+    assert summary["NSE_NO_OF_TRADE"].tolist() == [nse_trades] * len(days)
+    assert all(pipeline.series_index.has_day("NSE", d.strftime("%Y-%m-%d")) for d in days)
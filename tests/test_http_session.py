@@ -0,0 +1,117 @@
+import time
+from datetime import datetime, timedelta
+
+import pytest
+import requests
+
+from conftest import NSE_PATH
+from nse_bse.fetcher import HostRateLimits, HostUnavailable
+from nse_bse.http_session import ExchangeSessions
+from nse_bse.pipeline import Pipeline
+
+DAYS = [datetime(2025, 6, 2), datetime(2025, 6, 3), datetime(2025, 6, 4)]
+
+
+def nse_sessions(nse, cookie_ttl=30 * 60):
+    return ExchangeSessions(
+        {"NSE": {"hosts": ["127.0.0.1"], "warmup_url": nse.base_url + "/"}}, cookie_ttl=cookie_ttl
+    )
+
+
+def test_cookies_warmed_once_and_connection_reused(exchanges):
+    nse, _ = exchanges(DAYS)
+    sessions = nse_sessions(nse)
+    for day in DAYS:
+        response = sessions.get(nse.base_url + NSE_PATH.format(day.strftime("%d%m%Y")), timeout=5)
+        assert response.status_code == 200
+    counters = sessions.counters()["NSE"]
+    assert counters["warmups"] == 1
+    assert counters["requests"] == len(DAYS)
+    assert counters["handshakes"] == 1
+    assert counters["reused"] == len(DAYS)  # the homepage request opened the connection
+    assert sessions.session("NSE").cookies.get("nsit") == "bench"
+    sessions.close()
+    assert sessions.counters()["NSE"]["handshakes"] == 1
+
+
+def test_expired_cookies_are_refreshed(exchanges):
+    nse, _ = exchanges(DAYS)
+    sessions = nse_sessions(nse, cookie_ttl=0)
+    for day in DAYS:
+        sessions.get(nse.base_url + NSE_PATH.format(day.strftime("%d%m%Y")), timeout=5)
+    assert sessions.counters()["NSE"]["warmups"] == len(DAYS)
+    assert nse.stats["requests"] == 2 * len(DAYS)
+
+
+def test_throttling_halves_the_rate_and_honours_retry_after():
+    limits = HostRateLimits({"h": 0.1})
+    url = "http://h/file"
+    limits.wait(url)
+    limits.record(url, 429, 0.01, retry_after="2")
+    report = limits.report()["h"]
+    assert report["rate"] == pytest.approx(5.0)
+    assert report["throttled"] == 1
+    host = limits._hosts["h"]
+    assert host.tokens <= -2 * host.rate
+
+
+def test_breaker_pauses_failing_host_then_probes():
+    limits = HostRateLimits({}, breaker_threshold=2, cooldown=0.05)
+    url = "http://h/file"
+    limits.record(url, 500)
+    limits.record(url, 500)
+    with pytest.raises(HostUnavailable):
+        limits.wait(url)
+    assert not limits.allow_retry(url)
+
+    time.sleep(0.06)
+    limits.wait(url)  # the single probe
+    with pytest.raises(HostUnavailable):
+        limits.wait(url)
+    limits.record(url, 200)
+    limits.wait(url)
+    assert limits.report()["h"]["paused"] is False
+
+
+def test_download_stops_at_paused_host(exchanges, tmp_path):
+    nse, _ = exchanges(DAYS, error_rate=1.0)
+    limits = HostRateLimits({}, breaker_threshold=2, cooldown=60)
+    pipeline = Pipeline(
+        output=str(tmp_path / "summary.csv"), sessions=nse_sessions(nse), rate_limits=limits,
+        retries=5, backoff=0.01,
+    )
+    url = nse.base_url + NSE_PATH.format(DAYS[0].strftime("%d%m%Y"))
+    stats = {}
+    assert pipeline.download(url, stats=stats) is None
+    # Two failures trip the breaker; the third attempt fails fast without a request
+    assert stats["attempts"] == 3
+    assert limits.report()["127.0.0.1"]["paused"] is True
+    assert nse.stats["500"] == 3  # the homepage warm-up plus two downloads
+
+
+def test_forbidden_response_reaches_the_limiter_before_the_rewarm(exchanges, tmp_path):
+    nse, _ = exchanges(DAYS)
+    sessions = nse_sessions(nse)
+    limits = HostRateLimits({})
+    pipeline = Pipeline(output=str(tmp_path / "summary.csv"), sessions=sessions, rate_limits=limits)
+    url = nse.base_url + NSE_PATH.format(DAYS[0].strftime("%d%m%Y"))
+
+    session = sessions.session("NSE")
+    real_request = session.request
+    statuses = []
+
+    def first_forbidden(method, request_url, **kwargs):
+        if request_url == url and not statuses:
+            statuses.append(403)
+            response = requests.Response()
+            response.status_code, response.url = 403, request_url
+            response.elapsed = timedelta(seconds=0.01)
+            response.headers["Retry-After"] = "1"
+            return response
+        return real_request(method, request_url, **kwargs)
+
+    session.request = first_forbidden
+    assert pipeline.download(url) is not None
+    report = limits.report()["127.0.0.1"]
+    assert report["throttled"] == 1 and report["rate"] < float("inf")
+    assert sessions.counters()["NSE"]["warmups"] == 2
@@ -0,0 +1,25 @@
+import json
+
+from nse_bse.query_service import QueryService, SummaryTable
+
+
+def test_rows_totals_and_non_finite_cells(tmp_path):
+    path = tmp_path / "summary.csv"
+    path.write_text(
+        "Date,NSE_NO_OF_TRADE,BSE_No_of_Trades,NSE_RATIO\n"
+        "2025-06-02,10.0,1,nan\n"
+        "2025-06-03,20.0,,inf\n"
+    )
+    service = QueryService([SummaryTable("combined", str(path), {"NSE": ["NSE_NO_OF_TRADE", "NSE_RATIO"]})])
+
+    rows = json.loads(service.handle("/rows", {"start": "2025-06-03"}))
+    assert rows["rows"] == [["2025-06-03", 20, None, None]]
+
+    totals = json.loads(service.handle("/totals", {"exchange": "NSE"}))
+    assert totals["totals"] == {"NSE_NO_OF_TRADE": 30, "NSE_RATIO": 0}
+    assert totals["days"] == 2
+
+    with open(path, "a") as f:
+        f.write("2025-06-04,5,2,-inf\n")
+    totals = json.loads(service.handle("/totals", {"exchange": "NSE"}))
+    assert totals["totals"]["NSE_NO_OF_TRADE"] == 35
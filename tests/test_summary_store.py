@@ -0,0 +1,78 @@
+import csv
+
+from nse_bse import summary_store
+from nse_bse.summary_store import SummaryStore
+
+COLUMNS = ["Date", "NSE_NO_OF_TRADE", "BSE_No_of_Trades"]
+
+
+def read(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_append_writes_header_once_and_survives_reopen(tmp_path):
+    path = str(tmp_path / "summary.csv")
+    store = SummaryStore(path, COLUMNS)
+    store.append([{"Date": "2025-06-02", "NSE_NO_OF_TRADE": 10, "BSE_No_of_Trades": 1}])
+    store.append([{"Date": "2025-06-03", "NSE_NO_OF_TRADE": 20}])
+    assert read(path) == [COLUMNS, ["2025-06-02", "10", "1"], ["2025-06-03", "20", ""]]
+
+    reopened = SummaryStore(path, COLUMNS)
+    assert "2025-06-03" in reopened and reopened.last_date == "2025-06-03"
+    assert reopened.sorted
+
+
+def test_torn_append_is_truncated_on_open(tmp_path):
+    path = str(tmp_path / "summary.csv")
+    SummaryStore(path, COLUMNS).append([{"Date": "2025-06-02", "NSE_NO_OF_TRADE": 10}])
+    with open(path, "ab") as f:
+        f.write(b"2025-06-03,2")
+    store = SummaryStore(path, COLUMNS)
+    assert store.dates == {"2025-06-02"}
+    assert read(path) == [COLUMNS, ["2025-06-02", "10", ""]]
+
+
+def test_upsert_appends_superseding_rows_that_readers_merge(tmp_path):
+    path = str(tmp_path / "summary.csv")
+    store = SummaryStore(path, COLUMNS)
+    store.append([
+        {"Date": "2025-06-03", "NSE_NO_OF_TRADE": 20},
+        {"Date": "2025-06-02", "NSE_NO_OF_TRADE": 10},
+    ])
+    assert not store.sorted
+    store.upsert([{"Date": "2025-06-03", "BSE_No_of_Trades": 2}])
+    assert read(path) == [COLUMNS, ["2025-06-03", "20", ""], ["2025-06-02", "10", ""], ["2025-06-03", "", "2"]]
+
+    reopened = SummaryStore(path, COLUMNS)
+    assert reopened.superseded == 1
+    assert [(r["Date"], r["NSE_NO_OF_TRADE"], r["BSE_No_of_Trades"]) for r in reopened.read_rows()] == [
+        ("2025-06-03", "20", "2"), ("2025-06-02", "10", ""),
+    ]
+    frame = reopened.read_frame()
+    assert frame["Date"].dt.strftime("%Y-%m-%d").tolist() == ["2025-06-02", "2025-06-03"]
+    assert frame["NSE_NO_OF_TRADE"].tolist() == [10, 20] and frame["BSE_No_of_Trades"].tolist()[1] == 2
+
+
+def test_upsert_compacts_once_superseded_rows_pile_up(tmp_path, monkeypatch):
+    monkeypatch.setattr(summary_store, "COMPACT_MIN_SUPERSEDED", 2)
+    path = str(tmp_path / "summary.csv")
+    store = SummaryStore(path, COLUMNS)
+    store.append([{"Date": "2025-06-02", "NSE_NO_OF_TRADE": 10}])
+    store.upsert([{"Date": "2025-06-02", "BSE_No_of_Trades": 1}])
+    store.upsert([{"Date": "2025-06-02", "NSE_NO_OF_TRADE": 11}])
+    assert len(read(path)) == 4
+    store.upsert([{"Date": "2025-06-02", "BSE_No_of_Trades": 2}])
+    assert read(path) == [COLUMNS, ["2025-06-02", "11", "2"]]
+    assert store.superseded == 0 and store.sorted
+
+
+def test_compact_adds_columns_and_keeps_later_cells(tmp_path):
+    path = str(tmp_path / "summary.csv")
+    store = SummaryStore(path, COLUMNS)
+    store.append([{"Date": "2025-06-02", "NSE_NO_OF_TRADE": 10}])
+    store.append([{"Date": "2025-06-02", "NSE_NO_OF_TRADE": 11, "BSE_No_of_Trades": 1}])
+    store.compact(COLUMNS + ["NSE_CONTRACTS"])
+    assert read(path) == [COLUMNS + ["NSE_CONTRACTS"], ["2025-06-02", "11", "1", ""]]
+    store.append([{"Date": "2025-06-03", "NSE_CONTRACTS": 5}])
+    assert SummaryStore(path, COLUMNS).columns == COLUMNS + ["NSE_CONTRACTS"]
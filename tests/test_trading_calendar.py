@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import pytest
+
+from nse_bse import config
+from nse_bse.trading_calendar import CalendarNotCovered, check_coverage, get_calendar, trading_dates
+
+HOLIDAYS = """exchange,date,kind,description
+NSE,2025-03-14,holiday,Holi
+NSE,2025-03-15,special_session,NSE Saturday session
+NSE,2025-12-25,holiday,Christmas
+BSE,2025-03-13,holiday,BSE only
+BSE,2025-03-14,holiday,Holi
+BSE,2025-12-25,holiday,Christmas
+"""
+
+
+@pytest.fixture
+def holidays(tmp_path):
+    path = tmp_path / "holidays.csv"
+    path.write_text(HOLIDAYS)
+    return str(path)
+
+
+def test_exchanges_keep_their_own_calendars(holidays):
+    nse, bse = get_calendar("NSE", holidays), get_calendar("BSE", holidays)
+    week = ("2025-03-10", "2025-03-16")
+    assert [str(d) for d in nse.trading_days(*week)] == [
+        "2025-03-10", "2025-03-11", "2025-03-12", "2025-03-13", "2025-03-15",
+    ]
+    assert [str(d) for d in bse.trading_days(*week)] == ["2025-03-10", "2025-03-11", "2025-03-12"]
+    assert not bse.is_trading_day("2025-12-25") and not nse.is_trading_day("2025-12-25")
+
+
+def test_uncovered_year_fails_loudly(holidays, monkeypatch):
+    calendar = get_calendar("NSE", holidays)
+    with pytest.raises(CalendarNotCovered, match=r"\[2026\]"):
+        calendar.trading_days("2025-12-01", "2026-01-10")
+    with pytest.raises(CalendarNotCovered):
+        calendar.is_trading_day("2024-06-03")
+    with pytest.raises(CalendarNotCovered):
+        calendar.next_trading_day("2025-12-31")
+
+    monkeypatch.setattr(config, "CALENDAR_STRICT", False)
+    assert str(calendar.next_trading_day("2025-12-31")) == "2026-01-01"
+
+
+def test_scheduled_runs_fall_back_to_weekdays_past_the_data(holidays, capsys):
+    check_coverage(["NSE", "BSE"], "2025-06-02", "2025-10-01", fallback=True, path=holidays)
+    assert "ends on 2025-12-31" not in capsys.readouterr().out
+    check_coverage(["NSE"], "2025-06-02", "2025-12-01", fallback=True, path=holidays)
+    assert "NSE holiday data ends on 2025-12-31" in capsys.readouterr().out
+
+    with pytest.raises(CalendarNotCovered):
+        check_coverage(["BSE"], "2025-12-01", "2026-01-05", path=holidays)
+    check_coverage(["NSE"], "2025-12-01", "2026-01-05", fallback=True, path=holidays)
+    assert "assuming weekdays only" in capsys.readouterr().out
+    nse = get_calendar("NSE", holidays)
+    assert [str(d) for d in nse.trading_days("2025-12-31", "2026-01-02")] == ["2025-12-31", "2026-01-01", "2026-01-02"]
+    with pytest.raises(CalendarNotCovered):
+        get_calendar("BSE", holidays).trading_days("2025-12-31", "2026-01-02")
+
+
+def test_shipped_calendar_covers_the_default_start():
+    start, end = config.START_DATE, datetime(2027, 12, 31)
+    for exchange in ("NSE", "BSE"):
+        days = trading_dates(exchange, start, end)
+        assert days[0] == start and days[-1] == datetime(2027, 12, 31)
@@ -0,0 +1,44 @@
+from nse_bse import config
+from nse_bse.watermark import Watermarks
+
+
+def test_gap_is_due_once_its_retry_time_passes(tmp_path):
+    state = Watermarks(str(tmp_path / "summary.csv"))
+    state.add_gap("NSE", "2025-06-02", "HTTP 404", retry_after=1000)
+    state.add_gap("BSE", "2025-06-02", "download or parse failed")
+    assert state.gaps_due(["NSE", "BSE"], now=999) == {"2025-06-02": ["BSE"]}
+    assert state.gaps_due(["NSE", "BSE"], now=1000) == {"2025-06-02": ["NSE", "BSE"]}
+
+    state.fill_gap("BSE", "2025-06-02")
+    state.save()
+    reloaded = Watermarks(str(tmp_path / "summary.csv"))
+    assert reloaded.gaps_due(["NSE", "BSE"], now=1000) == {"2025-06-02": ["NSE"]}
+
+
+def test_gap_is_given_up_after_max_attempts(tmp_path):
+    state = Watermarks(str(tmp_path / "summary.csv"))
+    for _ in range(config.GAP_MAX_ATTEMPTS - 1):
+        state.add_gap("NSE", "2025-03-14", "HTTP 404")
+    assert state.gaps_due(["NSE"], now=0) == {"2025-03-14": ["NSE"]}
+    state.add_gap("NSE", "2025-03-14", "HTTP 404")
+    assert state.gaps_due(["NSE"], now=0) == {}
+    assert state.gaps["NSE"]["2025-03-14"]["attempts"] == config.GAP_MAX_ATTEMPTS
+
+
+def test_shard_attempts_are_carried_not_restarted(tmp_path):
+    state = Watermarks(str(tmp_path / "summary.csv"), max_attempts=3)
+    state.add_gap("NSE", "2025-03-14", "HTTP 404", attempts=3)
+    assert state.gaps_due(["NSE"], now=0) == {}
+    # Merging the same shard again does not count its attempts twice
+    state.add_gap("BSE", "2025-03-14", "HTTP 404", attempts=2)
+    state.add_gap("BSE", "2025-03-14", "HTTP 404", attempts=2)
+    assert state.gaps["BSE"]["2025-03-14"]["attempts"] == 2
+
+
+def test_marks_only_move_forward(tmp_path):
+    state = Watermarks(str(tmp_path / "summary.csv"))
+    state.advance({"NSE": "2025-06-03"}, "2025-01-01", ["Date"])
+    state.advance({"NSE": "2025-06-02", "BSE": "2025-06-02"}, "2025-01-01", ["Date"])
+    assert state.marks == {"NSE": "2025-06-03", "BSE": "2025-06-02"}
+    assert state.valid_for("2025-01-01", ["Date"], ["NSE", "BSE"])
+    assert not state.valid_for("2024-01-01", ["Date"], ["NSE", "BSE"])
@@ -0,0 +1,68 @@
+import io
+import zipfile
+import zlib
+from datetime import datetime
+
+import pytest
+
+from conftest import nse_zip
+from nse_bse.exchanges import index_fo_zip
+from nse_bse.zip_index import open_member
+
+DAY = datetime(2025, 6, 2)
+
+
+@pytest.fixture
+def archive(bhavcopies):
+    return nse_zip(DAY, bhavcopies[0])
+
+
+def test_index_reads_the_member_like_zipfile(archive, bhavcopies):
+    index = index_fo_zip("fo02062025.zip", io.BytesIO(archive))
+    assert index["member"] == "op02062025.csv"
+    assert index["delimiter"] == ","
+    assert index["header"][:2] == ["INSTRUMENT", "SYMBOL"]
+    with open_member(io.BytesIO(archive), index) as f:
+        assert f.read() == bhavcopies[0]
+
+
+def corrupted(archive, compression, offset=100):
+    """`archive`'s member rewritten with `compression`, one bit flipped in its data."""
+    with zipfile.ZipFile(io.BytesIO(archive)) as z:
+        body = z.read("op02062025.csv")
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w", compression) as z:
+        z.writestr("op02062025.csv", body)
+    index = index_fo_zip("fo02062025.zip", buf)
+    data = bytearray(buf.getvalue())
+    data[index["members"]["op02062025.csv"]["data_offset"] + offset] ^= 0x01
+    return bytes(data), index
+
+
+def test_corrupt_stored_member_fails_the_crc_check(archive):
+    data, index = corrupted(archive, zipfile.ZIP_STORED)
+    with open_member(io.BytesIO(data), index) as f:
+        with pytest.raises(zipfile.BadZipFile, match="CRC"):
+            f.read()
+
+
+def test_corrupt_deflated_member_is_not_returned(archive):
+    data, index = corrupted(archive, zipfile.ZIP_DEFLATED, offset=1000)
+    with open_member(io.BytesIO(data), index) as f:
+        with pytest.raises((zipfile.BadZipFile, zlib.error)):
+            f.read()
+
+
+def test_stale_index_is_detected(archive):
+    index = index_fo_zip("fo02062025.zip", io.BytesIO(archive))
+    index["members"]["op02062025.csv"]["offset"] += 1
+    with pytest.raises(zipfile.BadZipFile, match="stale archive index"):
+        open_member(io.BytesIO(archive), index)
+
+
+def test_archive_without_the_bhavcopy(bhavcopies):
+    buf = io.BytesIO()
+    with zipfile.ZipFile(buf, "w") as z:
+        z.writestr("readme.txt", "nothing here")
+    index = index_fo_zip("fo02062025.zip", buf)
+    assert index["member"] is None and "readme.txt" in index["members"]